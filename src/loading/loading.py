@@ -1,11 +1,18 @@
 from src.loading.loading_utils import (
     read_file_list,
     process_parquet_files,
+    table_name_from_uri,
     connect_to_db,
-    load_data_into_warehouse,
+    load_data_concurrently,
+    read_load_ledger,
+    list_table_files,
+    stream_tables_into_warehouse,
+    STREAMING_LOAD_ENABLED,
 )
 import boto3
 import logging
+from functools import partial
+from urllib.parse import unquote_plus
 
 
 logger = logging.getLogger()
@@ -19,11 +26,20 @@ FILE_LIST_KEY = "test-processed/file_list.json"  # to be updated
 s3_client = boto3.client("s3", region_name=AWS_REGION)
 
 
+def get_file_list_location(event):
+    # Triggered by a batch manifest written by transformation,
+    # otherwise fall back to the configured file list
+    records = (event or {}).get("Records")
+    if not records:
+        return S3_PROCESSED_BUCKET, FILE_LIST_KEY
+    s3_event = records[0]["s3"]
+    return s3_event["bucket"]["name"], unquote_plus(s3_event["object"]["key"])
+
+
 def lambda_handler(event, context):
     try:
-        file_paths = read_file_list(
-            s3_client, S3_PROCESSED_BUCKET, FILE_LIST_KEY
-        )
+        bucket_name, file_list_key = get_file_list_location(event)
+        file_paths = read_file_list(s3_client, bucket_name, file_list_key)
         if not file_paths:
             logger.info("No files to process this time.")
             return {
@@ -31,7 +47,28 @@ def lambda_handler(event, context):
                 "message": "No files to process this time.",
             }
 
-        tables_data_frames = process_parquet_files(s3_client, file_paths)
+        connect = partial(connect_to_db, SECRET_NAME, AWS_REGION)
+        loaded_files = read_load_ledger(connect, file_paths)
+        if STREAMING_LOAD_ENABLED:
+            # Files are read row group by row group while loading
+            tables_data_frames = list_table_files(
+                s3_client, file_paths, loaded_files
+            )
+            load = partial(stream_tables_into_warehouse, s3_client)
+        else:
+            tables_data_frames = process_parquet_files(
+                s3_client, file_paths, loaded_files
+            )
+            load = None
+
+        if not tables_data_frames and all(
+            path in loaded_files for path in file_paths
+        ):
+            logger.info("All files have already been loaded.")
+            return {
+                "status": "Success",
+                "message": "All files have already been loaded.",
+            }
 
         if not tables_data_frames:
             return {
@@ -42,7 +79,13 @@ def lambda_handler(event, context):
                 ),
             }
 
-        if len(tables_data_frames) < len(file_paths):
+        # Several files can be merged into one table
+        expected_tables = {
+            table_name_from_uri(path)
+            for path in file_paths
+            if path not in loaded_files
+        }
+        if len(tables_data_frames) < len(expected_tables):
             logger.warning(
                 "Partial success: Some Parquet files could not be processed. "
                 "Check logs for details."
@@ -50,8 +93,9 @@ def lambda_handler(event, context):
         else:
             logger.info("All Parquet files processed successfully.")
 
-        with connect_to_db(SECRET_NAME, AWS_REGION) as conn:
-            results = load_data_into_warehouse(conn, tables_data_frames)
+        results = load_data_concurrently(
+            connect, tables_data_frames, load=load
+        )
 
         if not results["successfully_loaded"]:
             logger.error("Failure in loading data into the warehouse.")
@@ -1,7 +1,18 @@
 import json
 import logging
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from itertools import chain
+from tempfile import TemporaryDirectory
 from botocore.exceptions import ClientError
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 from io import BytesIO
 import re
 import boto3
@@ -18,8 +29,60 @@ DIM_PRIMARY_KEYS = {
     "dim_currency": "currency_id",
     "dim_design": "design_id",
     "dim_counterparty": "counterparty_id",
+    "dim_transaction": "transaction_id",
+    "dim_payment_type": "payment_type_id",
 }
 
+# Type 2 history columns, written by transformation for SCD2 dimensions
+SCD2_COLUMNS = ["valid_from", "valid_to", "is_current"]
+# Surrogate key column of SCD2 dimension versions, e.g. staff_key
+SCD2_SURROGATE_KEY = "{name}_key"
+
+# Source id of each fact row, matched with "=" so Postgres can use an
+# index or hash join when checking which staged rows already exist
+FACT_NATURAL_KEYS = {
+    "fact_sales_order": "sales_order_id",
+    "fact_purchase_order": "purchase_order_id",
+    "fact_payment": "payment_id",
+}
+
+# Rows are bulk loaded with COPY FROM STDIN into a staging table and
+# merged from there; LOAD_METHOD=insert falls back to parameterised
+# INSERTs
+COPY_ENABLED = os.getenv("LOAD_METHOD", "copy").lower() == "copy"
+
+# Multi-row INSERTs stay under Postgres' bind parameter limit and a
+# byte budget per statement, so memory and round trips are predictable
+MAX_BIND_PARAMETERS = 65535
+INSERT_BATCH_BYTES = int(
+    os.getenv("INSERT_BATCH_BYTES", str(4 * 1024 * 1024))
+)
+
+# Parquet files are downloaded and decoded concurrently, as S3 latency
+# dominates the loader's wall time
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "8"))
+
+# Transformation names each output file by its write time and a uuid
+FILE_TIMESTAMP = re.compile(r"(\d{14})(?:-[0-9a-f]{32})?\.parquet$")
+
+# Control table of loaded files. A file whose URI and ETag are
+# recorded is skipped before download, so retries and repeated
+# triggers for the same file list are cheap.
+LOAD_LEDGER_TABLE = "load_ledger"
+
+# Streaming mode copies each table's files to local storage and loads
+# them row group by row group, so memory is bounded by LOAD_BATCH_ROWS
+# rather than by the size of the files
+STREAMING_LOAD_ENABLED = (
+    os.getenv("LOAD_STREAMING", "false").lower() == "true"
+)
+LOAD_BATCH_ROWS = int(os.getenv("LOAD_BATCH_ROWS", "100000"))
+DOWNLOAD_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Tables are loaded concurrently, dimensions before the facts that
+# reference them, over at most this many database connections
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", "4"))
+
 
 def read_file_list(s3_client, bucket_name, key):
     try:
@@ -37,40 +100,171 @@ def read_file_list(s3_client, bucket_name, key):
         raise
 
 
-def process_parquet_files(s3_client, file_paths):
-    tables_data_frames = {}
-    for file_path in file_paths:
-        try:
-            match = re.match(r"s3://([^/]+)/(.+)", file_path)
-            if not match:
-                logger.error(f"Invalid S3 URI: {file_path}")
-                continue
-            bucket_name, key = match.groups()
+def parse_s3_uri(file_path):
+    match = re.match(r"s3://([^/]+)/(.+)", file_path)
+    return match.groups() if match else None
 
-            table_name = key.split("/")[1]
 
-            obj = s3_client.get_object(Bucket=bucket_name, Key=key)
-            parquet_content = obj["Body"].read()
-            buffer = BytesIO(parquet_content)
+def table_name_from_uri(file_path):
+    location = parse_s3_uri(file_path)
+    return location[1].split("/")[1] if location else None
 
-            df = pd.read_parquet(buffer)
-            tables_data_frames[table_name] = df
 
-            logger.info(f"Processed Parquet file for table: {table_name}")
-        except ClientError as e:
-            logger.error(
-                f"Error accessing Parquet file from S3: {file_path}: {e}",
-                exc_info=True,
+# Files without a timestamp (e.g. compacted files) sort first, as
+# they hold data written before any timestamped file
+def file_timestamp(file_path):
+    match = FILE_TIMESTAMP.search(file_path)
+    return match.group(1) if match else ""
+
+
+# Downloads and decodes one file, logging and returning None on error
+# so one bad file does not stop the others
+def read_parquet_file(s3_client, file_path, loaded_etag=None):
+    try:
+        location = parse_s3_uri(file_path)
+        if not location:
+            logger.error(f"Invalid S3 URI: {file_path}")
+            return None
+        bucket_name, key = location
+
+        table_name = key.split("/")[1]
+
+        request = {"Bucket": bucket_name, "Key": key}
+        if loaded_etag:
+            # Only downloaded if it changed since it was loaded
+            request["IfNoneMatch"] = loaded_etag
+        obj = s3_client.get_object(**request)
+        parquet_content = obj["Body"].read()
+        buffer = BytesIO(parquet_content)
+
+        table = pq.read_table(buffer)
+
+        logger.info(f"Processed Parquet file for table: {table_name}")
+        return table_name, (file_path, obj["ETag"]), table
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("304", "NotModified"):
+            logger.info(f"Skipping already loaded file: {file_path}")
+            return None
+        logger.error(
+            f"Error accessing Parquet file from S3: {file_path}: {e}",
+            exc_info=True,
+        )
+        return None
+    except Exception as e:
+        logger.error(
+            f"Error processing file: {file_path}: {e}", exc_info=True
+        )
+        return None
+
+
+# Concatenates a table's files oldest first, filling columns missing
+# from older files with nulls and widening types that changed. For
+# dimensions the latest row per primary key wins.
+# The (uri, etag, rows) of each file travel with the frame in
+# df.attrs["files"], for the load ledger.
+def merge_table_files(table_name, files):
+    files = sorted(files, key=lambda file: file_timestamp(file[0][0]))
+    tables = [table for _, table in files]
+    if len(tables) == 1:
+        df = tables[0].to_pandas()
+    else:
+        df = pa.concat_tables(
+            tables, promote_options="permissive"
+        ).to_pandas()
+        primary_key = DIM_PRIMARY_KEYS.get(table_name)
+        if primary_key in df.columns:
+            df = df.drop_duplicates(
+                subset=primary_key, keep="last", ignore_index=True
+            )
+        logger.info(
+            f"Merged {len(files)} Parquet files for table: {table_name}"
+        )
+    df.attrs["files"] = [
+        (uri, etag, table.num_rows) for (uri, etag), table in files
+    ]
+    return df
+
+
+def process_parquet_files(s3_client, file_paths, loaded_files=None):
+    loaded_files = loaded_files or {}
+    files_by_table = {}
+    workers = max(min(DOWNLOAD_WORKERS, len(file_paths)), 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(
+            lambda file_path: read_parquet_file(
+                s3_client, file_path, loaded_files.get(file_path)
+            ),
+            file_paths,
+        ):
+            if result is not None:
+                table_name, file, table = result
+                files_by_table.setdefault(table_name, []).append(
+                    (file, table)
+                )
+
+    tables_data_frames = {}
+    for table_name, files in files_by_table.items():
+        try:
+            tables_data_frames[table_name] = merge_table_files(
+                table_name, files
             )
-            continue
         except Exception as e:
             logger.error(
-                f"Error processing file: {file_path}: {e}", exc_info=True
+                f"Error merging Parquet files for table: {table_name}: {e}",
+                exc_info=True,
             )
-            continue
     return tables_data_frames
 
 
+# Returns {uri: etag} of the given files already loaded. The ledger is
+# an optimisation, so if it cannot be read every file is loaded.
+def read_load_ledger(connect, file_paths):
+    try:
+        conn = connect()
+        try:
+            conn.run(
+                sql=f"""
+                    CREATE TABLE IF NOT EXISTS "{LOAD_LEDGER_TABLE}" (
+                        "uri" TEXT NOT NULL,
+                        "etag" TEXT NOT NULL,
+                        "row_count" BIGINT NOT NULL,
+                        "loaded_at" TIMESTAMPTZ NOT NULL DEFAULT now(),
+                        PRIMARY KEY ("uri", "etag")
+                    );
+                """
+            )
+            rows = conn.run(
+                sql=f"""
+                    SELECT "uri", "etag" FROM "{LOAD_LEDGER_TABLE}"
+                    WHERE "uri" = ANY(:uris)
+                    ORDER BY "loaded_at";
+                """,
+                uris=list(file_paths),
+            )
+        finally:
+            conn.close()
+        return {uri: etag for uri, etag in rows}
+    except Exception as e:
+        logger.warning(f"Unable to read the load ledger: {e}")
+        return {}
+
+
+def record_loaded_files(conn, files):
+    if not files:
+        return
+    run_batched(
+        conn,
+        LOAD_LEDGER_TABLE,
+        pd.DataFrame(files, columns=["uri", "etag", "row_count"]),
+        lambda values: f"""
+            INSERT INTO "{LOAD_LEDGER_TABLE}" ("uri", "etag", "row_count")
+            VALUES {values}
+            ON CONFLICT ("uri", "etag") DO UPDATE
+            SET "row_count" = EXCLUDED."row_count", "loaded_at" = now();
+        """,
+    )
+
+
 def retrieve_db_credentials(secret_name, region_name):
     try:
         secrets_manager_client = boto3.client(
@@ -109,6 +303,475 @@ def connect_to_db(secret_name, region_name):
         raise
 
 
+def frame_records(df):
+    # Python values with NaN/NaT as None, so they bind as NULL
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+
+def batch_size(df):
+    by_parameters = MAX_BIND_PARAMETERS // len(df.columns)
+    row_bytes = df.memory_usage(index=False, deep=True).sum() / len(df)
+    by_bytes = int(INSERT_BATCH_BYTES // max(row_bytes, 1))
+    return max(min(by_parameters, by_bytes, len(df)), 1)
+
+
+def values_clause(rows, width):
+    return ", ".join(
+        "(" + ", ".join(f":p{row * width + col}" for col in range(width)) + ")"
+        for row in range(rows)
+    )
+
+
+# Runs a multi-row VALUES statement per batch of rows. Each batch
+# size is prepared once, so full batches reuse one server-side plan.
+# Returns the rows returned by each batch's statement.
+def run_batched(conn, table_name, df, statement_for):
+    records = frame_records(df)
+    width = len(df.columns)
+    size = batch_size(df)
+    prepared = {}
+    timings = []
+    returned = []
+    try:
+        for start in range(0, len(records), size):
+            batch = records[start:start + size]
+            if len(batch) not in prepared:
+                prepared[len(batch)] = conn.prepare(
+                    statement_for(values_clause(len(batch), width))
+                )
+            params = {
+                f"p{index}": value
+                for index, value in enumerate(chain.from_iterable(batch))
+            }
+            started = time.perf_counter()
+            returned.append(prepared[len(batch)].run(**params))
+            timings.append(time.perf_counter() - started)
+            logger.debug(
+                f"Wrote batch of {len(batch)} row(s) to '{table_name}' "
+                f"in {timings[-1]:.3f}s."
+            )
+    finally:
+        for statement in prepared.values():
+            statement.close()
+
+    logger.info(
+        f"Wrote {len(records)} row(s) to '{table_name}' in "
+        f"{len(timings)} batch(es) of up to {size}, "
+        f"{sum(timings):.3f}s total, slowest {max(timings):.3f}s."
+    )
+    return returned
+
+
+def insert_rows(conn, table_name, df):
+    columns = (", ").join([f'"{col}"' for col in df.columns])
+    return run_batched(
+        conn,
+        table_name,
+        df,
+        lambda values: f'INSERT INTO "{table_name}" ({columns}) '
+        f"VALUES {values};",
+    )
+
+
+# Integer columns with NULLs come back from Parquet as floats; whole
+# number floats are cast to int64 so integer columns accept them, as
+# Arrow writes large floats in exponent form (1.2345678901e+10)
+def arrow_column(values):
+    if pd.api.types.is_float_dtype(values):
+        present = values.dropna()
+        if np.isfinite(present).all() and (present % 1 == 0).all():
+            values = values.astype("Int64")
+    try:
+        return pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed Python types in one column: send their text and let
+        # Postgres cast it to the column type
+        return pa.array(
+            values.map(str, na_action="ignore"),
+            type=pa.string(),
+            from_pandas=True,
+        )
+
+
+# Encodes the frame for COPY column by column with Arrow's CSV writer
+# rather than row by row in Python. NULLs are written unquoted and
+# strings quoted, matching Postgres' CSV NULL handling.
+def frame_to_csv(df):
+    table = pa.Table.from_arrays(
+        [arrow_column(df[col]) for col in df.columns],
+        names=[str(col) for col in df.columns],
+    )
+    buffer = BytesIO()
+    pa_csv.write_csv(
+        table, buffer, pa_csv.WriteOptions(include_header=False)
+    )
+    buffer.seek(0)
+    return buffer
+
+
+def copy_rows(conn, table_name, df):
+    columns = ", ".join(f'"{col}"' for col in df.columns)
+    conn.run(
+        sql=f"""
+            COPY "{table_name}" ({columns}) FROM STDIN WITH (FORMAT csv);
+        """,
+        stream=frame_to_csv(df),
+    )
+
+
+def stage_rows(conn, stage, df):
+    if COPY_ENABLED:
+        copy_rows(conn, stage, df)
+    else:
+        insert_rows(conn, stage, df)
+
+
+# Session temp table with the target's column types for the loaded
+# columns only, so no defaults or sequences of the target are copied.
+# Loaders run inside the per-table transaction, which drops it.
+def create_stage_table(conn, table_name, stage, columns):
+    conn.run(
+        sql=f"""
+            CREATE TEMP TABLE "{stage}" ON COMMIT DROP AS
+            SELECT {columns} FROM "{table_name}" WITH NO DATA;
+        """
+    )
+
+
+# Stages each chunk in turn and merges it before staging the next, so
+# only one chunk is held at a time. Later chunks are merged after, and
+# so win over, earlier ones. Returns the total merge() count.
+def merge_chunks(conn, table_name, columns, chunks, merge):
+    stage = f"stage_{table_name}"
+    create_stage_table(
+        conn, table_name, stage, ", ".join(f'"{col}"' for col in columns)
+    )
+    merged = 0
+    for index, chunk in enumerate(chunks):
+        if index:
+            conn.run(sql=f'TRUNCATE "{stage}";')
+        stage_rows(conn, stage, chunk)
+        merged += merge(stage, chunk)
+    return merged
+
+
+# Facts are append-only: stage the rows, then insert the staged rows
+# not already in the target, compared on every loaded column, so the
+# dedupe runs inside Postgres instead of reading the table into Python.
+def load_fact_table(conn, table_name, columns, chunks):
+    column_list = ", ".join(f'"{col}"' for col in columns)
+    stage_columns = ", ".join(f'stage."{col}"' for col in columns)
+    natural_key = FACT_NATURAL_KEYS.get(table_name)
+    matches = " AND ".join(
+        (
+            f'target."{col}" = stage."{col}"'
+            if col == natural_key
+            else f'target."{col}" IS NOT DISTINCT FROM stage."{col}"'
+        )
+        for col in columns
+    )
+
+    def merge(stage, chunk):
+        conn.run(
+            sql=f"""
+                INSERT INTO "{table_name}" ({column_list})
+                SELECT DISTINCT {stage_columns}
+                FROM "{stage}" AS stage
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM "{table_name}" AS target
+                    WHERE {matches}
+                );
+            """
+        )
+        return conn.row_count
+
+    return merge_chunks(conn, table_name, columns, chunks, merge)
+
+
+# ON CONFLICT clause for dimension upserts. Rows whose values are
+# unchanged are not rewritten, which would otherwise leave a dead
+# tuple and WAL per row. Returns one row per inserted or updated row,
+# true when inserted (a new tuple has no deleting transaction).
+def upsert_clause(primary_key, columns):
+    value_columns = [col for col in columns if col != primary_key]
+    if not value_columns:
+        return f'ON CONFLICT ("{primary_key}") DO NOTHING RETURNING TRUE'
+    set_clause = ", ".join(
+        f'"{col}" = EXCLUDED."{col}"' for col in value_columns
+    )
+    target_values = ", ".join(f'target."{col}"' for col in value_columns)
+    excluded_values = ", ".join(f'EXCLUDED."{col}"' for col in value_columns)
+    return f"""
+        ON CONFLICT ("{primary_key}") DO UPDATE
+        SET {set_clause}
+        WHERE ({target_values}) IS DISTINCT FROM ({excluded_values})
+        RETURNING (target.xmax = 0)
+    """.strip()
+
+
+def count_upserted(counts, rows, staged):
+    inserted = sum(1 for (was_inserted,) in rows if was_inserted)
+    updated = sum(1 for _ in rows) - inserted
+    counts["inserted"] += inserted
+    counts["updated"] += updated
+    counts["unchanged"] += staged - inserted - updated
+
+
+# Upsert on the primary key from a staging table. Duplicate keys in a
+# chunk keep their last row, as ON CONFLICT cannot update a row twice.
+# Returns inserted, updated and unchanged row counts.
+def load_dimension_table(conn, table_name, columns, chunks):
+    primary_key = DIM_PRIMARY_KEYS[table_name]
+    column_list = ", ".join(f'"{col}"' for col in columns)
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    def merge(stage, chunk):
+        rows = conn.run(
+            sql=f"""
+                INSERT INTO "{table_name}" AS target ({column_list})
+                SELECT {column_list} FROM "{stage}"
+                {upsert_clause(primary_key, columns)};
+            """
+        )
+        count_upserted(counts, rows or [], len(chunk))
+        return len(chunk)
+
+    merge_chunks(
+        conn,
+        table_name,
+        columns,
+        (
+            chunk.drop_duplicates(subset=primary_key, keep="last")
+            for chunk in chunks
+        ),
+        merge,
+    )
+    return counts
+
+
+# Batched multi-row upserts for when COPY is not available. As with
+# staging, duplicate keys keep their last row. Adds to counts.
+def upsert_rows(conn, table_name, df, counts):
+    primary_key = DIM_PRIMARY_KEYS[table_name]
+    columns = ", ".join(f'"{col}"' for col in df.columns)
+    df = df.drop_duplicates(subset=primary_key, keep="last")
+    batches = run_batched(
+        conn,
+        table_name,
+        df,
+        lambda values: f"""
+            INSERT INTO "{table_name}" AS target ({columns})
+            VALUES {values}
+            {upsert_clause(primary_key, df.columns)};
+        """,
+    )
+    count_upserted(
+        counts, [row for rows in batches for row in rows or []], len(df)
+    )
+
+
+# Surrogate key column of a type 2 dimension, e.g. staff_key for
+# dim_staff, needed as the natural key repeats across versions
+def surrogate_key(table_name):
+    return SCD2_SURROGATE_KEY.format(name=table_name[len("dim_"):])
+
+
+def has_column(conn, table_name, column_name):
+    return bool(
+        conn.run(
+            sql="""
+                SELECT 1 FROM information_schema.columns
+                WHERE "table_schema" = current_schema()
+                AND "table_name" = :table_name
+                AND "column_name" = :column_name;
+            """,
+            table_name=table_name,
+            column_name=column_name,
+        )
+    )
+
+
+# One-off migration of a dimension to type 2, run explicitly by an
+# owner of the table (make migrate-scd2), never by the loader: adds
+# the history columns and an identity surrogate key that replaces the
+# natural key as primary key, as a natural key now has a row per
+# version. Foreign keys referencing the natural key would be dropped
+# with it, so the migration refuses to run while any exist unless
+# drop_foreign_keys is set, and then drops and logs each one. A
+# partial unique index keeps one current version per natural key.
+# Runs in its own transaction. Returns False if already migrated.
+def migrate_scd2_dimension(conn, table_name, drop_foreign_keys=False):
+    key = surrogate_key(table_name)
+    primary_key = DIM_PRIMARY_KEYS[table_name]
+    conn.run(sql="START TRANSACTION;")
+    try:
+        if has_column(conn, table_name, key):
+            conn.run(sql="ROLLBACK;")
+            logger.info(f"'{table_name}' already has surrogate key '{key}'.")
+            return False
+
+        foreign_keys = conn.run(
+            sql="""
+                SELECT CAST(conrelid AS regclass), conname FROM pg_constraint
+                WHERE confrelid = CAST(:table_name AS regclass)
+                AND contype = 'f';
+            """,
+            table_name=table_name,
+        )
+        if foreign_keys and not drop_foreign_keys:
+            references = ", ".join(
+                f"{name} on {table}" for table, name in foreign_keys
+            )
+            raise ValueError(
+                f"'{table_name}' is referenced by foreign key(s) "
+                f"{references}, rerun with --drop-foreign-keys to drop them."
+            )
+
+        conn.run(
+            sql=f"""
+                ALTER TABLE "{table_name}"
+                ADD COLUMN IF NOT EXISTS "valid_from" TIMESTAMP NOT NULL
+                    DEFAULT '-infinity',
+                ADD COLUMN IF NOT EXISTS "valid_to" TIMESTAMP,
+                ADD COLUMN IF NOT EXISTS "is_current" BOOLEAN NOT NULL
+                    DEFAULT TRUE,
+                ADD COLUMN "{key}" BIGINT GENERATED ALWAYS AS IDENTITY;
+            """
+        )
+        for table, name in foreign_keys:
+            conn.run(sql=f'ALTER TABLE {table} DROP CONSTRAINT "{name}";')
+            logger.warning(f"Dropped foreign key {name} on {table}.")
+        for (constraint,) in conn.run(
+            sql="""
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = CAST(:table_name AS regclass)
+                AND contype = 'p';
+            """,
+            table_name=table_name,
+        ):
+            conn.run(
+                sql=f"""
+                    ALTER TABLE "{table_name}"
+                    DROP CONSTRAINT "{constraint}";
+                """
+            )
+        conn.run(
+            sql=f'ALTER TABLE "{table_name}" ADD PRIMARY KEY ("{key}");'
+        )
+        conn.run(
+            sql=f"""
+                CREATE UNIQUE INDEX IF NOT EXISTS
+                "{table_name}_current_version"
+                ON "{table_name}" ("{primary_key}") WHERE "is_current";
+            """
+        )
+        conn.run(sql="COMMIT;")
+    except Exception:
+        conn.run(sql="ROLLBACK;")
+        raise
+    logger.info(f"Migrated '{table_name}' to type 2 with key '{key}'.")
+    return True
+
+
+# Type 2 close-and-insert: stage the new versions, close current
+# versions whose business columns differ, then insert staged rows
+# without a current version. Only staged (changed) rows are touched.
+# Duplicate keys in a chunk keep their last row, as two current
+# versions of a key would violate the current version index.
+def load_scd2_dimension(conn, table_name, columns, chunks):
+    primary_key = DIM_PRIMARY_KEYS[table_name]
+    business_columns = [
+        col
+        for col in columns
+        if col not in SCD2_COLUMNS and col != primary_key
+    ]
+    target_values = ", ".join(f'target."{col}"' for col in business_columns)
+    stage_values = ", ".join(f'stage."{col}"' for col in business_columns)
+    column_list = ", ".join(f'"{col}"' for col in columns)
+    stage_columns = ", ".join(f'stage."{col}"' for col in columns)
+
+    def merge(stage, chunk):
+        conn.run(
+            sql=f"""
+                UPDATE "{table_name}" AS target
+                SET "valid_to" = stage."valid_from", "is_current" = FALSE
+                FROM "{stage}" AS stage
+                WHERE target."{primary_key}" = stage."{primary_key}"
+                AND target."is_current"
+                AND ({target_values}) IS DISTINCT FROM ({stage_values});
+            """
+        )
+        conn.run(
+            sql=f"""
+                INSERT INTO "{table_name}" ({column_list})
+                SELECT {stage_columns}
+                FROM "{stage}" AS stage
+                LEFT JOIN "{table_name}" AS target
+                ON target."{primary_key}" = stage."{primary_key}"
+                AND target."is_current"
+                WHERE target."{primary_key}" IS NULL;
+            """
+        )
+        return len(chunk)
+
+    return merge_chunks(
+        conn,
+        table_name,
+        columns,
+        (
+            chunk.drop_duplicates(subset=primary_key, keep="last")
+            for chunk in chunks
+        ),
+        merge,
+    )
+
+
+# Loads one table from an iterable of DataFrame chunks in a single
+# transaction, together with its ledger entries
+def load_table(conn, table_name, columns, chunks, files):
+    conn.run(sql="START TRANSACTION;")
+    try:
+        if table_name.startswith("dim_") and "is_current" in columns:
+            if not has_column(conn, table_name, surrogate_key(table_name)):
+                raise ValueError(
+                    f"'{table_name}' has no surrogate key "
+                    f"'{surrogate_key(table_name)}', run "
+                    f"'make migrate-scd2 TABLES={table_name}' first."
+                )
+            versions = load_scd2_dimension(conn, table_name, columns, chunks)
+            message = (
+                f"Successfully loaded {versions} version(s) "
+                f"into '{table_name}'."
+            )
+        elif table_name.startswith("dim_"):
+            if COPY_ENABLED:
+                counts = load_dimension_table(
+                    conn, table_name, columns, chunks
+                )
+            else:
+                counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+                for chunk in chunks:
+                    upsert_rows(conn, table_name, chunk, counts)
+            message = (
+                f"Successfully loaded data into '{table_name}': "
+                f"{counts['inserted']} inserted, {counts['updated']} "
+                f"updated, {counts['unchanged']} unchanged."
+            )
+        else:
+            inserted = load_fact_table(conn, table_name, columns, chunks)
+            message = (
+                f"Successfully loaded {inserted} row(s) into '{table_name}'."
+                if inserted
+                else f"No new rows to insert into '{table_name}'."
+            )
+        record_loaded_files(conn, files)
+        conn.run(sql="COMMIT;")
+    except Exception:
+        conn.run(sql="ROLLBACK;")
+        raise
+    logger.info(message)
+
+
 def load_data_into_warehouse(conn, tables_data_frames):
     results = {
         "successfully_loaded": [],
@@ -123,54 +786,125 @@ def load_data_into_warehouse(conn, tables_data_frames):
                 results["skipped_empty"].append(table_name)
                 continue
 
-            columns = (", ").join([f'"{col}"' for col in df.columns])
-            placeholders = (", ").join(["%s"] * len(df.columns))
-            records = df.to_records(index=False).tolist()
+            load_table(
+                conn,
+                table_name,
+                list(df.columns),
+                [df],
+                df.attrs.get("files", []),
+            )
 
-            if table_name.startswith("dim_"):
-                primary_key = DIM_PRIMARY_KEYS[table_name]
-                set_clause = ", ".join(
-                    [
-                        f'"{col}" = EXCLUDED."{col}"'
-                        for col in df.columns
-                        if col != primary_key
-                    ]
-                )
-                query = f"""
-                    INSERT INTO "{table_name}" ({columns})
-                    VALUES ({placeholders})
-                    ON CONFLICT ("{primary_key}") DO UPDATE
-                    SET {set_clause};
-                """
-                conn.run(sql=query, params=records)
-                logger.info(f"Successfully loaded data into '{table_name}'.")
+            results["successfully_loaded"].append(table_name)
+
+        except Exception as e:
+            logger.error(
+                f"Error loading data into '{table_name}': {e}", exc_info=True
+            )
+            results["failed_to_load"].append(table_name)
+            continue
+
+    return results
+
+
+# Returns {table_name: [(uri, etag)]}, oldest file first, for streaming
+# loads. Uses HEAD requests, so skipped files are never downloaded.
+def list_table_files(s3_client, file_paths, loaded_files=None):
+    loaded_files = loaded_files or {}
+
+    def head(file_path):
+        location = parse_s3_uri(file_path)
+        if not location:
+            logger.error(f"Invalid S3 URI: {file_path}")
+            return None
+        bucket_name, key = location
+        request = {"Bucket": bucket_name, "Key": key}
+        if loaded_files.get(file_path):
+            request["IfNoneMatch"] = loaded_files[file_path]
+        try:
+            response = s3_client.head_object(**request)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("304", "NotModified"):
+                logger.info(f"Skipping already loaded file: {file_path}")
             else:
-                fact_query = f"""
-                    SELECT {columns}
-                    FROM "{table_name}";
-                """
-                existing_rows = conn.run(sql=fact_query)
-
-                existing_records = set(existing_rows)
-
-                new_records = [
-                    record
-                    for record in records
-                    if tuple(record) not in existing_records
-                ]
-
-                if new_records:
-                    query = f"""
-                        INSERT INTO "{table_name}" ({columns})
-                        VALUES ({placeholders});
-                    """
-                    conn.run(sql=query, params=new_records)
-                    logger.info(
-                        f"Successfully loaded {len(new_records)} "
-                        f"row(s) into '{table_name}'."
+                logger.error(
+                    f"Error accessing Parquet file from S3: {file_path}: {e}",
+                    exc_info=True,
+                )
+            return None
+        return key.split("/")[1], (file_path, response["ETag"])
+
+    table_files = {}
+    workers = max(min(DOWNLOAD_WORKERS, len(file_paths)), 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(head, file_paths):
+            if result is not None:
+                table_name, file = result
+                table_files.setdefault(table_name, []).append(file)
+    return {
+        table_name: sorted(files, key=lambda file: file_timestamp(file[0]))
+        for table_name, files in table_files.items()
+    }
+
+
+# Copies the object to disk in chunks; IfMatch ensures it is the
+# version listed, so the ledger records what was actually loaded
+def download_parquet_file(s3_client, file, path):
+    file_path, etag = file
+    bucket_name, key = parse_s3_uri(file_path)
+    body = s3_client.get_object(Bucket=bucket_name, Key=key, IfMatch=etag)[
+        "Body"
+    ]
+    with open(path, "wb") as local_file:
+        for chunk in body.iter_chunks(DOWNLOAD_CHUNK_BYTES):
+            local_file.write(chunk)
+
+
+# Streaming counterpart of load_data_into_warehouse, taking the output
+# of list_table_files. Columns missing from a file are loaded as NULL.
+def stream_tables_into_warehouse(s3_client, conn, table_files):
+    results = {
+        "successfully_loaded": [],
+        "failed_to_load": [],
+        "skipped_empty": [],
+    }
+
+    for table_name, files in table_files.items():
+        try:
+            with TemporaryDirectory() as directory, ExitStack() as stack:
+                parquet_files = []
+                for index, file in enumerate(files):
+                    path = os.path.join(directory, f"{index}.parquet")
+                    download_parquet_file(s3_client, file, path)
+                    parquet_files.append(
+                        stack.enter_context(pq.ParquetFile(path))
                     )
-                else:
-                    logger.info(f"No new rows to insert into '{table_name}'.")
+
+                columns = list(
+                    dict.fromkeys(
+                        col
+                        for parquet_file in parquet_files
+                        for col in parquet_file.schema_arrow.names
+                    )
+                )
+                chunks = (
+                    batch.to_pandas().reindex(columns=columns)
+                    for parquet_file in parquet_files
+                    for batch in parquet_file.iter_batches(
+                        batch_size=LOAD_BATCH_ROWS
+                    )
+                )
+                load_table(
+                    conn,
+                    table_name,
+                    columns,
+                    chunks,
+                    [
+                        (file_path, etag, parquet_file.metadata.num_rows)
+                        for (file_path, etag), parquet_file in zip(
+                            files, parquet_files
+                        )
+                    ],
+                )
 
             results["successfully_loaded"].append(table_name)
 
@@ -182,3 +916,62 @@ def load_data_into_warehouse(conn, tables_data_frames):
             continue
 
     return results
+
+
+# Loads every dimension concurrently, then every fact, so wall time
+# approaches the slowest table in each phase rather than the sum.
+# Each table loads in its own transaction on a pooled connection;
+# connections are opened on demand by connect() and closed at the end.
+# load(conn, tables) defaults to load_data_into_warehouse.
+def load_data_concurrently(
+    connect, tables_data_frames, workers=None, load=None
+):
+    results = {
+        "successfully_loaded": [],
+        "failed_to_load": [],
+        "skipped_empty": [],
+    }
+    dims = {
+        table_name: df
+        for table_name, df in tables_data_frames.items()
+        if table_name.startswith("dim_")
+    }
+    facts = {
+        table_name: df
+        for table_name, df in tables_data_frames.items()
+        if table_name not in dims
+    }
+    idle_connections = queue.Queue()
+    opened_connections = []
+
+    def load_one(item):
+        table_name, df = item
+        try:
+            conn = idle_connections.get_nowait()
+        except queue.Empty:
+            try:
+                conn = connect()
+            except Exception as e:
+                logger.error(
+                    f"Error loading data into '{table_name}': {e}",
+                    exc_info=True,
+                )
+                return {"failed_to_load": [table_name]}
+            opened_connections.append(conn)
+        try:
+            return (load or load_data_into_warehouse)(conn, {table_name: df})
+        finally:
+            idle_connections.put(conn)
+
+    workers = max(min(workers or LOAD_WORKERS, len(tables_data_frames)), 1)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for phase in (dims, facts):
+                for table_results in executor.map(load_one, phase.items()):
+                    for outcome, table_names in table_results.items():
+                        results[outcome].extend(table_names)
+    finally:
+        for conn in opened_connections:
+            conn.close()
+
+    return results
@@ -0,0 +1,36 @@
+from src.loading.loading import SECRET_NAME, AWS_REGION
+from src.loading.loading_utils import connect_to_db, migrate_scd2_dimension
+import argparse
+import logging
+
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+# Migrates dimensions to type 2 history before SCD2_DIMENSIONS lists
+# them, run by an owner of the warehouse tables rather than the load
+# role, e.g. python -m src.loading.migrations dim_staff dim_location
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Migrate warehouse dimensions to type 2 history."
+    )
+    parser.add_argument("tables", nargs="+", help="e.g. dim_staff")
+    parser.add_argument(
+        "--drop-foreign-keys",
+        action="store_true",
+        help="drop foreign keys referencing the dimensions' natural keys",
+    )
+    args = parser.parse_args(argv)
+
+    conn = connect_to_db(SECRET_NAME, AWS_REGION)
+    try:
+        for table_name in args.tables:
+            migrate_scd2_dimension(conn, table_name, args.drop_foreign_keys)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig()
+    main()
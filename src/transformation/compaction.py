@@ -0,0 +1,311 @@
+import logging
+import json
+import os
+import re
+import pyarrow as pa
+import pyarrow.parquet as pq
+from io import BytesIO
+from datetime import datetime, timedelta
+from botocore.exceptions import ClientError
+import src.transformation.transformationutil as util
+from src.transformation.transformation import (
+    s3_client,
+    S3_PROCESSED_BUCKET,
+    PROCESSED_FOLDER,
+    HISTORY_FOLDER,
+)
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Small files are merged into files of roughly this many bytes
+COMPACTION_TARGET_BYTES = int(
+    os.getenv("COMPACTION_TARGET_BYTES", str(128 * 1024 * 1024))
+)
+# Longest a writer can take from naming a data file to its upload being
+# visible, the 15 minute AWS Lambda timeout limit
+MAX_WRITE_MINUTES = 15
+# Files younger than this are left alone. A file named at or before the
+# new watermark but uploaded after it would be hidden from readers for
+# good, so the age has to stay well above MAX_WRITE_MINUTES
+COMPACTION_MIN_AGE_MINUTES = int(os.getenv("COMPACTION_MIN_AGE_MINUTES", "60"))
+COMPACTION_MIN_FILES = int(os.getenv("COMPACTION_MIN_FILES", "2"))
+# Source files stay in place unless enabled, readers skip them through
+# the manifest either way
+COMPACTION_DELETE_SOURCES = (
+    os.getenv("COMPACTION_DELETE_SOURCES", "false").lower() == "true"
+)
+COMPACTION_FOLDERS = [PROCESSED_FOLDER, HISTORY_FOLDER]
+MANIFEST_FOLDER = "_manifests"
+COMPACTED_PREFIX = "compacted-"
+TIMESTAMP_FORMAT = "%Y%m%d%H%M%S"
+# Uncompacted data files, named by util.data_file_stem
+DATA_FILE_NAME = re.compile(r"(\d{14})(?:-[0-9a-f]{32})?\.parquet$")
+
+
+def list_objects(bucket, prefix):
+    """
+    Lists every object under a prefix.
+
+    Returns:
+        list[dict]: The objects' Key and Size.
+    """
+    paginator = s3_client.get_paginator("list_objects_v2")
+    return [
+        {"Key": obj["Key"], "Size": obj["Size"]}
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix)
+        for obj in page.get("Contents", [])
+    ]
+
+
+def file_timestamp(key):
+    """
+    Returns the write timestamp of an uncompacted data file,
+    taken from its '<timestamp>-<uuid>.parquet' (or, for files
+    written before the suffix, '<timestamp>.parquet') name, or None.
+    """
+    match = DATA_FILE_NAME.match(key.rsplit("/", 1)[-1])
+    return match.group(1) if match else None
+
+
+def load_manifest(bucket, table_prefix):
+    """
+    Loads the latest manifest of a table.
+
+    Manifests are immutable and numbered, so the latest one is the
+    highest version. It lists the compacted files and a watermark:
+    uncompacted files written at or before it have been replaced.
+
+    Returns:
+        dict: The manifest, version 0 if the table was never compacted.
+    """
+    manifests = sorted(
+        obj["Key"]
+        for obj in list_objects(bucket, f"{table_prefix}{MANIFEST_FOLDER}/")
+    )
+    if not manifests:
+        return {"version": 0, "watermark": None, "files": []}
+    response = s3_client.get_object(Bucket=bucket, Key=manifests[-1])
+    return json.loads(response["Body"].read())
+
+
+def list_live_files(bucket, table_prefix, objects=None, manifest=None):
+    """
+    Lists the data files readers should use for a table: the
+    compacted files in its manifest plus any file written after
+    the manifest's watermark.
+
+    Args:
+        bucket (str): The processed bucket.
+        table_prefix (str): e.g. 'processed/fact_sales_order/'.
+
+    Returns:
+        list[str]: The live data file keys.
+    """
+    objects = objects if objects is not None else list_objects(
+        bucket, table_prefix
+    )
+    manifest = manifest or load_manifest(bucket, table_prefix)
+    watermark = manifest["watermark"]
+    recent = sorted(
+        obj["Key"]
+        for obj in objects
+        if file_timestamp(obj["Key"])
+        and (watermark is None or file_timestamp(obj["Key"]) > watermark)
+    )
+    return manifest["files"] + recent
+
+
+def plan_compaction(objects, manifest, cutoff, target_bytes):
+    """
+    Groups the uncompacted files written after the manifest's
+    watermark and at or before the cutoff into batches of about
+    target_bytes, per partition directory and in write order.
+
+    Returns:
+        list[list[dict]]: Batches of objects to merge.
+    """
+    watermark = manifest["watermark"]
+    eligible = sorted(
+        (
+            obj
+            for obj in objects
+            if file_timestamp(obj["Key"])
+            and file_timestamp(obj["Key"]) <= cutoff
+            and (watermark is None or file_timestamp(obj["Key"]) > watermark)
+        ),
+        key=lambda obj: obj["Key"],
+    )
+
+    batches = []
+    current_directory = None
+    for obj in eligible:
+        directory = obj["Key"].rsplit("/", 1)[0]
+        if (
+            directory != current_directory
+            or sum(item["Size"] for item in batches[-1]) >= target_bytes
+        ):
+            batches.append([])
+            current_directory = directory
+        batches[-1].append(obj)
+    return batches
+
+
+def write_compacted_file(bucket, table_name, keys, output_key):
+    """
+    Merges Parquet files into one file with sorted row groups,
+    using the table's writer profile. Files written with older
+    schemas are reconciled by adding missing columns as nulls.
+
+    Returns:
+        int: Number of rows written.
+    """
+    tables = [
+        pq.read_table(BytesIO(response["Body"].read()))
+        for response in (
+            s3_client.get_object(Bucket=bucket, Key=key) for key in keys
+        )
+    ]
+    merged = pa.concat_tables(tables, promote_options="default")
+
+    parquet_buffer = BytesIO()
+    util.write_parquet(table_name, merged.to_pandas(), parquet_buffer)
+    s3_client.put_object(
+        Bucket=bucket, Key=output_key, Body=parquet_buffer.getvalue()
+    )
+    return merged.num_rows
+
+
+def compact_table(
+    bucket,
+    table_prefix,
+    table_name,
+    now=None,
+    target_bytes=COMPACTION_TARGET_BYTES,
+    min_age_minutes=COMPACTION_MIN_AGE_MINUTES,
+):
+    """
+    Compacts the small files of one table (prefix) and swaps them in.
+
+    The merged files are written first, then the next manifest
+    version is created with a conditional put (If-None-Match), which
+    is the atomic swap: if another compaction committed that version
+    first, this run's files are deleted and nothing changes. Writers
+    are never affected, as only files older than min_age_minutes are
+    touched and new files land after the manifest's watermark.
+
+    Raises:
+        ValueError: If min_age_minutes does not exceed MAX_WRITE_MINUTES.
+
+    Returns:
+        dict: Summary of the compaction.
+    """
+    if min_age_minutes <= MAX_WRITE_MINUTES:
+        raise ValueError(
+            f"Compaction min age of {min_age_minutes} minutes does not "
+            f"exceed the {MAX_WRITE_MINUTES} minute maximum write duration"
+        )
+    now = now or datetime.utcnow()
+    cutoff = (now - timedelta(minutes=min_age_minutes)).strftime(
+        TIMESTAMP_FORMAT
+    )
+    objects = list_objects(bucket, table_prefix)
+    manifest = load_manifest(bucket, table_prefix)
+    batches = plan_compaction(objects, manifest, cutoff, target_bytes)
+    source_keys = [obj["Key"] for batch in batches for obj in batch]
+
+    if len(source_keys) < COMPACTION_MIN_FILES:
+        logger.info(f"Nothing to compact for: {table_prefix}")
+        return {"table": table_prefix, "compacted": 0}
+
+    version = manifest["version"] + 1
+    written = []
+    rows = 0
+    try:
+        for index, batch in enumerate(batches):
+            directory = batch[0]["Key"].rsplit("/", 1)[0]
+            output_key = (
+                f"{directory}/{COMPACTED_PREFIX}{version:010d}-{index}.parquet"
+            )
+            rows += write_compacted_file(
+                bucket, table_name, [obj["Key"] for obj in batch], output_key
+            )
+            written.append(output_key)
+
+        new_manifest = {
+            "version": version,
+            "created_at": now.isoformat(),
+            "watermark": cutoff,
+            "files": manifest["files"] + written,
+        }
+        s3_client.put_object(
+            Bucket=bucket,
+            Key=f"{table_prefix}{MANIFEST_FOLDER}/{version:010d}.json",
+            Body=json.dumps(new_manifest),
+            IfNoneMatch="*",
+        )
+    except Exception as err:
+        for key in written:
+            s3_client.delete_object(Bucket=bucket, Key=key)
+        if (
+            isinstance(err, ClientError)
+            and err.response["Error"]["Code"] == "PreconditionFailed"
+        ):
+            logger.warning(
+                f"Concurrent compaction of {table_prefix}, discarding run"
+            )
+            return {"table": table_prefix, "compacted": 0}
+        raise
+
+    if COMPACTION_DELETE_SOURCES:
+        for key in source_keys:
+            s3_client.delete_object(Bucket=bucket, Key=key)
+
+    logger.info(
+        f"Compacted {len(source_keys)} file(s) ({rows} rows) of "
+        f"{table_prefix} into {len(written)} file(s)"
+    )
+    return {
+        "table": table_prefix,
+        "compacted": len(source_keys),
+        "files": written,
+        "rows": rows,
+        "version": version,
+    }
+
+
+def lambda_handler(event, context):
+    """
+    Compaction entry point, run on a schedule.
+
+    The event may restrict the run with "folders" (default
+    processed and history) and "tables" (default all tables).
+    """
+    event = event or {}
+    folders = event.get("folders", COMPACTION_FOLDERS)
+    results = []
+    failed = []
+
+    for folder in folders:
+        response = s3_client.list_objects_v2(
+            Bucket=S3_PROCESSED_BUCKET, Prefix=f"{folder}/", Delimiter="/"
+        )
+        tables = [
+            prefix["Prefix"].split("/")[1]
+            for prefix in response.get("CommonPrefixes", [])
+        ]
+        for table_name in event.get("tables", tables):
+            table_prefix = f"{folder}/{table_name}/"
+            try:
+                result = compact_table(
+                    S3_PROCESSED_BUCKET, table_prefix, table_name
+                )
+                results.append(result)
+            except Exception as err:
+                logger.error(f"Error compacting {table_prefix}: {err}")
+                failed.append(table_prefix)
+
+    return {
+        "statusCode": 500 if failed else 200,
+        "body": {"results": results, "failed": failed},
+    }
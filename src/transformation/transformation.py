@@ -2,11 +2,15 @@ import logging
 import boto3
 import src.transformation.transformationutil as util
 import pandas as pd
+import pyarrow as pa
 import json
 import os
+from datetime import datetime
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
+# Structured metric lines, kept apart from the pipeline's log messages
+metrics_logger = logging.getLogger("metrics")
 
 s3_client = boto3.client("s3")
 
@@ -16,68 +20,447 @@ S3_INGESTION_BUCKET = os.getenv(
 S3_PROCESSED_BUCKET = os.getenv("S3_PROCESSED_BUCKET")
 HISTORY_FOLDER = "history"
 PROCESSED_FOLDER = "processed"
+REFERENCE_FOLDER = "reference"
+# Snapshots are created as new versions with a conditional put, a
+# writer that loses the race reloads and retries up to this many times
+SNAPSHOT_WRITE_ATTEMPTS = int(os.getenv("SNAPSHOT_WRITE_ATTEMPTS", "5"))
+LEDGER_FOLDER = "ledger"
+# Per-batch file lists read by the loading lambda
+MANIFEST_FOLDER = "manifests"
+
+# Parquet writer settings, each profile is merged over the default.
+# use_dictionary/write_statistics take True/False or a list of columns,
+# no_dictionary lists the exceptions to use_dictionary=True (unique
+# keys, where a dictionary only adds overhead), sort_by orders rows
+# so row-group statistics prune well on load
+DEFAULT_PARQUET_PROFILE = {
+    "compression": "snappy",
+    "compression_level": None,
+    "row_group_size": 128 * 1024,
+    "use_dictionary": True,
+    "no_dictionary": [],
+    "sort_by": None,
+    "write_statistics": True,
+}
+PARQUET_WRITER_PROFILES = {
+    "fact_sales_order": {
+        "compression": "zstd",
+        "compression_level": 3,
+        "row_group_size": 256 * 1024,
+        "no_dictionary": ["sales_order_id"],
+        "sort_by": ["created_date", "sales_order_id"],
+        "write_statistics": [
+            "sales_order_id",
+            "created_date",
+            "last_updated_date",
+        ],
+    },
+    "fact_purchase_order": {
+        "compression": "zstd",
+        "compression_level": 3,
+        "row_group_size": 256 * 1024,
+        "no_dictionary": ["purchase_order_id"],
+        "sort_by": ["created_date", "purchase_order_id"],
+        "write_statistics": [
+            "purchase_order_id",
+            "created_date",
+            "last_updated_date",
+        ],
+    },
+    "fact_payment": {
+        "compression": "zstd",
+        "compression_level": 3,
+        "row_group_size": 256 * 1024,
+        "no_dictionary": ["payment_id", "transaction_id"],
+        "sort_by": ["created_date", "payment_id"],
+        "write_statistics": ["payment_id", "created_date", "payment_date"],
+    },
+    "dim_date": {
+        "no_dictionary": ["date_id"],
+        "sort_by": ["date_id"],
+    },
+    "dim_staff": {
+        "no_dictionary": ["staff_id", "email_address"],
+        "sort_by": ["staff_id"],
+    },
+    "dim_location": {
+        "no_dictionary": ["location_id"],
+        "sort_by": ["location_id"],
+    },
+    "dim_design": {
+        "no_dictionary": ["design_id"],
+        "sort_by": ["design_id"],
+    },
+    "dim_currency": {
+        "no_dictionary": ["currency_id"],
+        "sort_by": ["currency_id"],
+    },
+    "dim_counterparty": {
+        "no_dictionary": ["counterparty_id"],
+        "sort_by": ["counterparty_id"],
+    },
+}
+
+# Per-transform metrics, logged in CloudWatch embedded metric format
+METRICS_ENABLED = (
+    os.getenv("TRANSFORMATION_METRICS", "true").lower() == "true"
+)
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "Transformation")
+# tracemalloc reports exact Python heap peaks but slows transforms down
+TRACE_MEMORY = os.getenv("TRACE_MEMORY", "false").lower() == "true"
+# Transforms slower than this many seconds save a cProfile dump, 0 = off
+PROFILE_THRESHOLD_SECONDS = float(os.getenv("PROFILE_THRESHOLD_SECONDS", "0"))
+PROFILE_FOLDER = "profiles"
+
+# Optional Hive-style layout for facts, one directory per day, e.g.
+# processed/fact_sales_order/created_date=2024-11-20/<timestamp>.parquet
+PARTITIONED_LAYOUT_ENABLED = (
+    os.getenv("PARTITIONED_LAYOUT", "false").lower() == "true"
+)
+PARTITION_COLUMNS = {
+    "fact_sales_order": "created_date",
+    "fact_purchase_order": "created_date",
+    "fact_payment": "created_date",
+}
+
+# Streaming mode parses, transforms and writes large ingestion
+# files in chunks of STREAM_CHUNK_ROWS records
+STREAMING_ENABLED = (
+    os.getenv("TRANSFORMATION_STREAMING", "false").lower() == "true"
+)
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "50000"))
+# Source tables with a row-wise output that can be built chunk by chunk
+STREAMABLE_TABLES = {"sales_order": "fact_sales_order"}
+# Arrow schema of each streamed output. The Parquet writer is opened
+# with it, so a chunk with all-null or differently inferred columns
+# cannot change the file's schema
+STREAM_OUTPUT_SCHEMAS = {
+    "fact_sales_order": pa.schema(
+        [
+            ("sales_order_id", pa.int64()),
+            ("created_date", pa.date32()),
+            ("created_time", pa.time64("us")),
+            ("last_updated_date", pa.date32()),
+            ("last_updated_time", pa.time64("us")),
+            ("sales_staff_id", pa.int64()),
+            ("counterparty_id", pa.int64()),
+            ("units_sold", pa.int64()),
+            ("unit_price", pa.string()),
+            ("currency_id", pa.int64()),
+            ("design_id", pa.int64()),
+            ("agreed_payment_date", pa.string()),
+            ("agreed_delivery_date", pa.string()),
+            ("agreed_delivery_location_id", pa.int64()),
+        ]
+    ),
+}
 
 
-# Predefined functions for ease of lookup
-TRANSFORMATION_FUNCTIONS = {
-    "sales_order": util.transform_fact_sales_order,
-    "staff": util.transform_dim_staff,
-    "address": util.transform_dim_location,
-    "design": util.transform_dim_design,
-    "currency": util.transform_dim_currency,
-    "counterparty": util.transform_dim_counterparty,
+# Primary key of each ingested table, used to upsert the
+# reference snapshots kept for lookup tables
+SOURCE_PRIMARY_KEYS = {
+    "counterparty": "counterparty_id",
+    "currency": "currency_id",
+    "department": "department_id",
+    "design": "design_id",
+    "staff": "staff_id",
+    "sales_order": "sales_order_id",
+    "address": "address_id",
+    "payment": "payment_id",
+    "purchase_order": "purchase_order_id",
+    "payment_type": "payment_type_id",
+    "transaction": "transaction_id",
 }
 
+# Star-schema outputs and the source tables (or other outputs) they are
+# built from, in the order the transformation function takes them.
+# "triggers" are the inputs whose changes require a rebuild (all inputs
+# by default), other inputs are read from their reference snapshot.
+# "partial" outputs are upserted by key and built only from the inputs
+# that changed, unchanged inputs are passed as empty datasets.
+# "optional" inputs are passed as empty datasets while they have no
+# reference snapshot yet instead of skipping the output, as they are
+# not triggers and the output would otherwise never be built.
+TRANSFORMATION_DAG = {
+    "fact_sales_order": {
+        "inputs": ["sales_order"],
+        "function": util.transform_fact_sales_order,
+    },
+    "fact_purchase_order": {
+        "inputs": ["purchase_order"],
+        "function": util.transform_fact_purchase_order,
+    },
+    "dim_date": {
+        "inputs": ["sales_order", "purchase_order", "payment"],
+        "partial": True,
+        "function": util.transform_dim_date,
+    },
+    "dim_staff": {
+        "inputs": ["staff", "department"],
+        "function": util.transform_dim_staff,
+    },
+    "dim_location": {
+        "inputs": ["address"],
+        "function": util.transform_dim_location,
+    },
+    "dim_design": {
+        "inputs": ["design"],
+        "function": util.transform_dim_design,
+    },
+    "dim_currency": {
+        "inputs": ["currency"],
+        "function": util.transform_dim_currency,
+    },
+    "dim_counterparty": {
+        "inputs": ["counterparty", "address"],
+        "function": util.transform_dim_counterparty,
+    },
+    "fact_payment": {
+        "inputs": ["payment", "transaction", "payment_type"],
+        "triggers": ["payment"],
+        "optional": ["transaction", "payment_type"],
+        "function": util.transform_fact_payment,
+    },
+    "dim_transaction": {
+        "inputs": ["transaction"],
+        "function": util.transform_dim_transaction,
+    },
+    "dim_payment_type": {
+        "inputs": ["payment_type"],
+        "function": util.transform_dim_payment_types,
+    },
+}
+# "thread" runs independent outputs on a thread pool, "process" on a
+# process pool sized to the available vCPUs. Threads are the default:
+# the pandas/Arrow kernels release the GIL and inputs are shared, while
+# processes copy every input and output through Arrow files, which only
+# pays off for large CPU-bound batches (backfills) on several vCPUs
+DAG_EXECUTOR = os.getenv("DAG_EXECUTOR", "thread")
+DAG_MAX_WORKERS = int(os.getenv("DAG_MAX_WORKERS", "0")) or None
+
+# Dimension primary keys, dimension files only carry rows whose
+# business columns changed since the last run
+DIM_PRIMARY_KEYS = {
+    "dim_date": "date_id",
+    "dim_staff": "staff_id",
+    "dim_location": "location_id",
+    "dim_currency": "currency_id",
+    "dim_design": "design_id",
+    "dim_counterparty": "counterparty_id",
+    "dim_transaction": "transaction_id",
+    "dim_payment_type": "payment_type_id",
+}
+CHANGE_DETECTION_ENABLED = (
+    os.getenv("CHANGE_DETECTION_ENABLED", "true").lower() == "true"
+)
+# Dimensions kept as type 2 history (valid_from/valid_to/is_current),
+# e.g. SCD2_DIMENSIONS=dim_staff,dim_counterparty,dim_location
+SCD2_DIMENSIONS = {
+    name.strip()
+    for name in os.getenv("SCD2_DIMENSIONS", "").split(",")
+    if name.strip()
+}
+
+
+def save_output(output_name, transformed_data, manifest=None):
+    """
+    Saves an output, reducing dimensions to their changed rows
+    first. The hash index is only advanced once the rows are saved.
+    Saved files are appended to the batch manifest, if given.
+
+    Returns:
+        bool: Whether the output was saved (or had nothing to save).
+    """
+    hash_index = None
+    if CHANGE_DETECTION_ENABLED and output_name in DIM_PRIMARY_KEYS:
+        transformed_data, hash_index = util.filter_changed_rows(
+            output_name,
+            transformed_data,
+            DIM_PRIMARY_KEYS[output_name],
+            S3_PROCESSED_BUCKET,
+        )
+        if transformed_data.empty:
+            logger.info(f"No changed rows, skipping output: {output_name}")
+            return True
+
+    # Changed rows become the new current versions
+    if output_name in SCD2_DIMENSIONS:
+        transformed_data = util.add_scd2_columns(
+            transformed_data, datetime.utcnow()
+        )
+
+    if PARTITIONED_LAYOUT_ENABLED and output_name in PARTITION_COLUMNS:
+        processed_key = util.save_partitioned_data(
+            output_name,
+            transformed_data,
+            S3_PROCESSED_BUCKET,
+            PARTITION_COLUMNS[output_name],
+            manifest=manifest,
+        )
+    else:
+        processed_key = util.save_transformed_data(
+            output_name,
+            transformed_data,
+            S3_PROCESSED_BUCKET,
+            manifest=manifest,
+        )
+    if processed_key is None:
+        return False
+
+    if hash_index is not None:
+        util.save_hash_index(output_name, hash_index, S3_PROCESSED_BUCKET)
+    return True
+
+
+def can_stream(table_name):
+    """
+    A source can be streamed when it is not a lookup for other
+    outputs and everything built from it is either its row-wise
+    output or dim_date.
+    """
+    if not STREAMING_ENABLED or table_name not in STREAMABLE_TABLES:
+        return False
+    if STREAMABLE_TABLES[table_name] not in STREAM_OUTPUT_SCHEMAS:
+        return False
+    # Streamed chunks go to a single file, not split by partition
+    if (
+        PARTITIONED_LAYOUT_ENABLED
+        and STREAMABLE_TABLES[table_name] in PARTITION_COLUMNS
+    ):
+        return False
+    if table_name in util.reference_sources(TRANSFORMATION_DAG):
+        return False
+    outputs = util.affected_outputs(TRANSFORMATION_DAG, {table_name})
+    return outputs <= {STREAMABLE_TABLES[table_name], "dim_date"}
+
+
+def stream_table(table_name, s3_key, manifest=None):
+    """
+    Streams an ingestion file through its row-wise transformation,
+    collecting the dates needed for dim_date along the way.
+
+    Returns:
+        bool: Whether every output was saved.
+    """
+    output_name = STREAMABLE_TABLES[table_name]
+    builds_dim_date = table_name in TRANSFORMATION_DAG["dim_date"]["inputs"]
+    dates = []
+
+    def collect_dates(chunk):
+        if builds_dim_date:
+            dates.append(util.extract_dates(chunk))
+
+    processed_key = util.stream_transform_table(
+        output_name,
+        s3_key,
+        TRANSFORMATION_DAG[output_name]["function"],
+        S3_PROCESSED_BUCKET,
+        STREAM_CHUNK_ROWS,
+        on_chunk=collect_dates,
+        manifest=manifest,
+    )
+    saved = processed_key is not None
+
+    if dates:
+        dim_date = util.dim_date(pd.concat(dates).drop_duplicates())
+        if dim_date is not None:
+            saved = save_output("dim_date", dim_date, manifest) and saved
+    return saved
+
 
 def lambda_handler(event, context):
     """Lambda handler function."""
     logger.info("Received event: %s", json.dumps(event))
 
     try:
+        known_tables = util.dag_sources(TRANSFORMATION_DAG)
+        sources = {}
+        # (key, etag, version id) of files to record in the ledger
+        loaded_files = []
+        streamed_files = []
+        # Files written by this invocation, listed for the loader
+        manifest = []
+
         # event contains the S3 object key of the ingested data
         # from being invoked by s3 ingestion bucket
         for record in event["Records"]:
-            s3_key = record["s3"]["object"]["key"]
+            s3_object = record["s3"]["object"]
+            s3_key = s3_object["key"]
+            etag = s3_object.get("eTag")
+            version_id = s3_object.get("versionId")
             logger.info(f"Processing file: {s3_key}")
             try:
                 # Fetching data from key
                 table_name = util.extract_table_name(s3_key=s3_key)
-                transform_function = TRANSFORMATION_FUNCTIONS.get(
-                    table_name, None
-                )
 
-                if not transform_function:
+                if table_name not in known_tables:
                     logger.warning(
                         f"No transformation logic exists, table: {table_name}"
                     )
                     continue
 
+                if etag and util.is_already_transformed(
+                    s3_key, etag, S3_PROCESSED_BUCKET, version_id
+                ):
+                    logger.info(f"Skipping already transformed file: {s3_key}")
+                    continue
+
+                if can_stream(table_name):
+                    if stream_table(table_name, s3_key, manifest) and etag:
+                        streamed_files.append((s3_key, etag, version_id))
+                    continue
+
                 # Load data from s3
                 data = util.load_data_from_s3_ingestion(key=s3_key)
-                transformed_data = util.process_table(
-                    table_name, transform_function, data
-                )
-
-                # Save transformed data
-                if transformed_data is not None:
-                    util.save_transformed_data(
-                        table_name,
-                        transformed_data,
-                        S3_PROCESSED_BUCKET)
-
-                # Handle dim date if 'sales_order'
-                if table_name == "sales_order":
-                    transformed_data = transform_function(data)
-                    dim_date = util.dim_date(pd.DataFrame(data))
-                    util.save_transformed_data(
-                        "dim_date",
-                        dim_date,
-                        S3_PROCESSED_BUCKET)
+                if data:
+                    sources.setdefault(table_name, []).extend(data)
+                    if etag:
+                        loaded_files.append((s3_key, etag, version_id))
 
             except Exception as record_error:
                 logger.error(f"Error parsing record {s3_key}: {record_error}")
                 continue
 
+        # Build every output affected by the changed tables exactly once
+        outputs = util.run_transformation_dag(
+            sources,
+            S3_PROCESSED_BUCKET,
+            max_workers=DAG_MAX_WORKERS,
+            executor=DAG_EXECUTOR,
+        )
+        # Outputs skipped for missing inputs or whose transform failed
+        # come back as None and count as not saved
+        failed_outputs = {
+            output_name
+            for output_name, transformed_data in outputs.items()
+            if transformed_data is None
+            or not save_output(output_name, transformed_data, manifest)
+        }
+
+        # Files that were written are listed even if others failed,
+        # the loader dedupes anything written again on a retry
+        manifest_saved = not manifest or (
+            util.write_batch_manifest(manifest, S3_PROCESSED_BUCKET)
+            is not None
+        )
+
+        # Only record inputs once every output built from them is
+        # safely written and listed, so their redelivery is retried
+        if manifest_saved:
+            recorded = streamed_files + [
+                loaded_file
+                for loaded_file in loaded_files
+                if not failed_outputs
+                & util.affected_outputs(
+                    TRANSFORMATION_DAG,
+                    {util.extract_table_name(loaded_file[0])},
+                )
+            ]
+            for s3_key, etag, version_id in recorded:
+                util.record_transformed(
+                    s3_key, etag, S3_PROCESSED_BUCKET, version_id
+                )
+
         logger.info("Transformation process completed")
         return {"statusCode": 200, "body": "Transformation complete"}
     except Exception as err:
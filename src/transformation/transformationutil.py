@@ -1,11 +1,55 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import json
+import codecs
+import cProfile
+import hashlib
+import os
+import re
+import resource
+import tempfile
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from botocore.exceptions import ClientError
 from io import BytesIO
 from datetime import datetime
 
+# Versioned snapshot files, '<prefix>/<version>.parquet'
+SNAPSHOT_VERSION = re.compile(r"/(\d{10})\.parquet$")
+# Whitespace and separators between records of a JSON array
+JSON_SEPARATOR = re.compile(r"[\s,]*")
+STREAM_READ_SIZE = 1024 * 1024
+# Partition of rows without a partition date, as named by Hive/Athena
+HIVE_DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+# CloudWatch units of the metrics emitted by emit_metrics
+METRIC_UNITS = {
+    "input_rows": "Count",
+    "output_rows": "Count",
+    "rows": "Count",
+    "wall_time_ms": "Milliseconds",
+    "cpu_time_ms": "Milliseconds",
+    "peak_memory_bytes": "Bytes",
+    "parquet_bytes": "Bytes",
+}
+
+
+def data_file_stem():
+    """
+    Returns the name of a new data file without its extension,
+    '<timestamp>-<uuid>', so writers in the same second never
+    overwrite each other's files.
+    """
+    timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    return f"{timestamp}-{uuid.uuid4().hex}"
 
-def save_transformed_data(table_name, data, S3_PROCESSED_BUCKET):
+
+def save_transformed_data(
+    table_name, data, S3_PROCESSED_BUCKET, partition=None, manifest=None
+):
     from src.transformation.transformation import (
         PROCESSED_FOLDER,
         HISTORY_FOLDER,
@@ -16,6 +60,15 @@ def save_transformed_data(table_name, data, S3_PROCESSED_BUCKET):
     """
     Save transformed DataFrames as
     Parquet files to the processed S3 bucket.
+
+    Args:
+        partition (str): Optional Hive-style directory the file is
+        written under, e.g. 'created_date=2024-11-20'.
+        manifest (list): Optional batch manifest the saved file's
+        entry is appended to.
+
+    Returns:
+        str: The processed s3 key, or None if it was not saved.
     """
     try:
         if not isinstance(data, pd.DataFrame) or data.empty:
@@ -23,17 +76,18 @@ def save_transformed_data(table_name, data, S3_PROCESSED_BUCKET):
                 f"Invalid or empty DataFrame provided for table: {table_name}"
             )
 
-        now = datetime.utcnow()
-        timestamp = now.strftime("%Y%m%d%H%M%S")
+        stem = data_file_stem()
 
         # Defining S3 paths
-        processed_key = f"{PROCESSED_FOLDER}/{table_name}/{timestamp}.parquet"
-        history_key = f"{HISTORY_FOLDER}/{table_name}/{timestamp}.parquet"
+        file_name = f"{partition}/{stem}" if partition else stem
+        processed_key = f"{PROCESSED_FOLDER}/{table_name}/{file_name}.parquet"
+        history_key = f"{HISTORY_FOLDER}/{table_name}/{file_name}.parquet"
 
         parquet_buffer = BytesIO()
+        schema = None
 
         try:
-            data.to_parquet(parquet_buffer, index=False, engine="pyarrow")
+            schema = write_parquet(table_name, data, parquet_buffer)
         except Exception as err:
             logger.error(
                 f"Error converting data to parquet: {table_name}, {err}"
@@ -54,6 +108,26 @@ def save_transformed_data(table_name, data, S3_PROCESSED_BUCKET):
             logger.info(f"Saved latest data to: {processed_key}")
         except Exception as err:
             logger.error(f"Error saving to s3 for table: {table_name}, {err}")
+            return None
+
+        emit_metrics(
+            table_name,
+            "save",
+            rows=len(data),
+            parquet_bytes=len(parquet_buffer.getvalue()),
+        )
+
+        if manifest is not None:
+            manifest.append(
+                manifest_entry(
+                    table_name,
+                    processed_key,
+                    S3_PROCESSED_BUCKET,
+                    len(data),
+                    schema,
+                    len(parquet_buffer.getvalue()),
+                )
+            )
 
         # If it's a fact 'sales_order' table, append to the history folder
         if table_name.startswith("fact"):
@@ -70,6 +144,7 @@ def save_transformed_data(table_name, data, S3_PROCESSED_BUCKET):
                     f"Error saving historical data: {table_name}, {err}"
                 )
 
+        return processed_key
     except ValueError as ve:
         logger.error(
             f"Validation error in saving data for table: {table_name} - {ve}"
@@ -80,24 +155,1198 @@ def save_transformed_data(table_name, data, S3_PROCESSED_BUCKET):
         )
 
 
-def process_table(table_name, transform_function, data):
-    from src.transformation.transformation import logger
+def partition_values(data, partition_column):
+    """
+    Returns the Hive partition value (YYYY-MM-DD) of each row,
+    rows without a date go to the default partition.
+    """
+    dates = pd.to_datetime(
+        data[partition_column].astype(str), errors="coerce"
+    )
+    return dates.dt.strftime("%Y-%m-%d").fillna(HIVE_DEFAULT_PARTITION)
+
+
+def save_partitioned_data(
+    table_name, data, S3_PROCESSED_BUCKET, partition_column, manifest=None
+):
+    from src.transformation.transformation import logger
+
+    """
+    Splits a DataFrame by date and saves each part under its
+    Hive-style partition, e.g.
+    processed/fact_sales_order/created_date=2024-11-20/<timestamp>.parquet
+
+    Returns:
+        list[str]: The processed s3 keys, or None if any part
+        was not saved.
+    """
+    try:
+        if not isinstance(data, pd.DataFrame) or data.empty:
+            raise ValueError(
+                f"Invalid or empty DataFrame provided for table: {table_name}"
+            )
+
+        values = partition_values(data, partition_column)
+        processed_keys = []
+        for value, partition_data in data.groupby(values, sort=True):
+            processed_key = save_transformed_data(
+                table_name,
+                partition_data.reset_index(drop=True),
+                S3_PROCESSED_BUCKET,
+                partition=f"{partition_column}={value}",
+                manifest=manifest,
+            )
+            if processed_key is None:
+                return None
+            processed_keys.append(processed_key)
+        return processed_keys
+    except ValueError as ve:
+        logger.error(
+            f"Validation error in saving data for table: {table_name} - {ve}"
+        )
+    except Exception as err:
+        logger.error(
+            f"Error saving partitioned data for table {table_name}: {err}"
+        )
+
+
+def list_partitioned_files(
+    table_name,
+    S3_PROCESSED_BUCKET,
+    start_date=None,
+    end_date=None,
+    folder=None,
+):
+    from src.transformation.transformation import PROCESSED_FOLDER
+    from src.transformation.compaction import list_live_files
+
+    """
+    Lists the live Parquet files of a table, pruning date partitions
+    outside [start_date, end_date] by key alone. Files written
+    before partitioning was enabled cannot be pruned and are
+    always returned.
+
+    Files are listed through the table's compaction manifest, so
+    source files already merged into a compacted file are left out
+    and no row is returned twice.
+
+    Args:
+        start_date, end_date (datetime.date): Optional inclusive bounds.
+        folder (str): The processed (default) or history folder.
+
+    Returns:
+        list[str]: The matching s3 keys.
+    """
+    prefix = f"{folder or PROCESSED_FOLDER}/{table_name}/"
+    start = start_date.isoformat() if start_date else None
+    end = end_date.isoformat() if end_date else None
+
+    keys = []
+    for key in list_live_files(S3_PROCESSED_BUCKET, prefix):
+        directories = key[len(prefix):].split("/")[:-1]
+        partition = next(
+            (d.split("=", 1)[1] for d in directories if "=" in d), None
+        )
+        if partition is not None and (start or end):
+            if partition == HIVE_DEFAULT_PARTITION:
+                continue
+            if (start and partition < start) or (end and partition > end):
+                continue
+        keys.append(key)
+    return sorted(keys)
+
+
+def schema_hash(schema):
+    """
+    Returns a stable hash of a Parquet file's column names and
+    types, ignoring pandas metadata.
+    """
+    if schema is None:
+        return None
+    return hashlib.sha256(
+        schema.remove_metadata().to_string().encode()
+    ).hexdigest()
+
+
+def manifest_entry(table_name, key, S3_PROCESSED_BUCKET, rows, schema, size):
+    """
+    Describes one written Parquet file for the loader's file list.
+    """
+    return {
+        "uri": f"s3://{S3_PROCESSED_BUCKET}/{key}",
+        "table": table_name,
+        "rows": rows,
+        "schema_hash": schema_hash(schema),
+        "bytes": size,
+    }
+
+
+def write_batch_manifest(entries, S3_PROCESSED_BUCKET):
+    from src.transformation.transformation import (
+        MANIFEST_FOLDER,
+        s3_client,
+        logger,
+    )
+
+    """
+    Writes the file list of one transformation batch for the
+    loader, {"files": [...uris], "entries": [...]}.
+
+    Every batch gets its own immutable manifest, created with a
+    conditional put (If-None-Match) so concurrent invocations can
+    never overwrite each other's list.
+
+    Returns:
+        str: The manifest s3 key, or None if it was not written.
+    """
+    now = datetime.utcnow()
+    batch_id = f"{now.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex}"
+    key = f"{MANIFEST_FOLDER}/{batch_id}.json"
+    body = {
+        "batch_id": batch_id,
+        "created_at": now.isoformat(),
+        "files": [entry["uri"] for entry in entries],
+        "entries": entries,
+    }
+    try:
+        s3_client.put_object(
+            Bucket=S3_PROCESSED_BUCKET,
+            Key=key,
+            Body=json.dumps(body),
+            ContentType="application/json",
+            IfNoneMatch="*",
+        )
+        logger.info(f"Saved manifest of {len(entries)} file(s) to: {key}")
+        return key
+    except ClientError as ce:
+        logger.error(f"Error saving manifest {key}: {ce}")
+
+
+# Warm-container cache of inputs already recorded in the ledger
+transformed_inputs = set()
+
+
+def ledger_key(s3_key, etag, version_id=None):
+    from src.transformation.transformation import LEDGER_FOLDER
+
+    """
+    Returns the ledger marker key for one version of an
+    ingestion file.
+    """
+    return f"{LEDGER_FOLDER}/{s3_key}/{version_id or etag.strip(chr(34))}"
+
+
+def is_already_transformed(s3_key, etag, S3_PROCESSED_BUCKET, version_id=None):
+    from src.transformation.transformation import s3_client, logger
+
+    """
+    Checks the idempotency ledger for an ingestion file.
+
+    S3 notifications are delivered at least once, so a file
+    whose exact version (ETag or version id) has a ledger
+    marker has already been transformed and can be skipped.
+
+    Returns:
+        bool: True if the file version was already transformed.
+    """
+    key = ledger_key(s3_key, etag, version_id)
+    if key in transformed_inputs:
+        return True
+    try:
+        s3_client.head_object(Bucket=S3_PROCESSED_BUCKET, Key=key)
+        transformed_inputs.add(key)
+        return True
+    except ClientError as ce:
+        if ce.response["Error"]["Code"] not in ("404", "NoSuchKey"):
+            logger.warning(f"Unable to check ledger for {s3_key}: {ce}")
+        return False
+    except Exception as err:
+        logger.warning(f"Unable to check ledger for {s3_key}: {err}")
+        return False
+
+
+def record_transformed(s3_key, etag, S3_PROCESSED_BUCKET, version_id=None):
+    from src.transformation.transformation import s3_client, logger
+
+    """
+    Writes the ledger marker for a transformed ingestion file.
+    """
+    key = ledger_key(s3_key, etag, version_id)
+    try:
+        s3_client.put_object(
+            Bucket=S3_PROCESSED_BUCKET,
+            Key=key,
+            Body=b"",
+            Metadata={"transformed-at": datetime.utcnow().isoformat()},
+        )
+        transformed_inputs.add(key)
+        logger.info(f"Recorded transformed file in ledger: {key}")
+    except Exception as err:
+        logger.error(f"Error recording {s3_key} in ledger: {err}")
+
+
+def row_hashes(data, primary_key):
+    """
+    Computes a stable 64-bit hash per row over the business
+    (non-key) columns of a DataFrame.
+
+    Returns:
+        np.ndarray: uint64 hash per row.
+    """
+    business_columns = [col for col in data.columns if col != primary_key]
+    return pd.util.hash_pandas_object(
+        data[business_columns], index=False
+    ).to_numpy()
+
+
+def load_hash_index(output_name, primary_key, S3_PROCESSED_BUCKET):
+    from src.transformation.transformation import (
+        REFERENCE_FOLDER,
+        s3_client,
+        logger,
+    )
+
+    """
+    Loads the last known row hash per key of an output, from the
+    latest version of its hash index.
+
+    Returns:
+        pd.DataFrame: primary_key and row_hash columns, empty if
+        no index exists yet.
+    """
+    try:
+        _, key = latest_snapshot(
+            f"{REFERENCE_FOLDER}/hashes/{output_name}", S3_PROCESSED_BUCKET
+        )
+        if key is not None:
+            response = s3_client.get_object(
+                Bucket=S3_PROCESSED_BUCKET, Key=key
+            )
+            return pd.read_parquet(BytesIO(response["Body"].read()))
+        logger.info(f"No hash index for {output_name}")
+    except ClientError as ce:
+        logger.info(f"No hash index for {output_name}: {ce}")
+    except Exception as err:
+        logger.error(f"Error loading hash index for {output_name}: {err}")
+    return pd.DataFrame(
+        {
+            primary_key: pd.Series(dtype="int64"),
+            "row_hash": pd.Series(dtype="UInt64"),
+        }
+    )
+
+
+def filter_changed_rows(output_name, data, primary_key, S3_PROCESSED_BUCKET):
+    from src.transformation.transformation import logger
+
+    """
+    Reduces an output to the rows that are new or whose business
+    columns changed since the last saved run, by comparing row
+    hashes against the output's hash index.
+
+    Args:
+        output_name (str): The name of the output table.
+        data (pd.DataFrame): The transformed output.
+        primary_key (str): The output's key column.
+        S3_PROCESSED_BUCKET (str): Bucket holding the hash index.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: The changed rows and the
+        row hashes of this batch, to save into the hash index once
+        those rows are written (or all rows and None if changes
+        could not be detected).
+    """
+    try:
+        current = pd.DataFrame(
+            {
+                primary_key: data[primary_key].to_numpy(),
+                "row_hash": pd.array(
+                    row_hashes(data, primary_key), dtype="UInt64"
+                ),
+            }
+        )
+        previous = load_hash_index(
+            output_name, primary_key, S3_PROCESSED_BUCKET
+        )
+
+        merged = current.merge(
+            previous.astype({"row_hash": "UInt64"}),
+            on=primary_key,
+            how="left",
+            suffixes=("", "_previous"),
+        )
+        changed = (
+            (merged["row_hash"] != merged["row_hash_previous"])
+            .fillna(True)
+            .to_numpy(dtype=bool)
+        )
+        logger.info(
+            f"{output_name}: {changed.sum()} of {len(data)} row(s) changed"
+        )
+
+        return data[changed], current
+    except Exception as err:
+        # Fall back to writing every row without advancing the index
+        logger.error(f"Error detecting changed rows for {output_name}: {err}")
+        return data, None
+
+
+def add_scd2_columns(data, valid_from):
+    """
+    Marks dimension rows as new type 2 versions, valid from the
+    given time until superseded.
+
+    Args:
+        data (pd.DataFrame): New or changed dimension rows.
+        valid_from (datetime): Start of the versions' validity.
+
+    Returns:
+        pd.DataFrame: The rows with valid_from, valid_to and
+        is_current columns.
+    """
+    return data.assign(
+        valid_from=pd.Timestamp(valid_from),
+        valid_to=pd.NaT,
+        is_current=True,
+    )
+
+
+def save_hash_index(output_name, hash_index, S3_PROCESSED_BUCKET):
+    from src.transformation.transformation import (
+        REFERENCE_FOLDER,
+        SNAPSHOT_WRITE_ATTEMPTS,
+        s3_client,
+        logger,
+    )
+
+    """
+    Saves row hashes into the hash index of an output, as the
+    index's next version.
+
+    The hashes are merged over the latest version when it is
+    written, so if a concurrent invocation created that version
+    first they are merged again over its index and the write is
+    retried, rather than dropping the other invocation's hashes.
+
+    Args:
+        output_name (str): The name of the output table.
+        hash_index (pd.DataFrame): Key and row_hash of the rows
+            written, as returned by filter_changed_rows.
+        S3_PROCESSED_BUCKET (str): Bucket holding the hash index.
+    """
+    prefix = f"{REFERENCE_FOLDER}/hashes/{output_name}"
+    primary_key = next(col for col in hash_index if col != "row_hash")
+    try:
+        for attempt in range(1, SNAPSHOT_WRITE_ATTEMPTS + 1):
+            version, key = latest_snapshot(prefix, S3_PROCESSED_BUCKET)
+            merged = hash_index
+            if key is not None:
+                # Read errors are raised, an unreadable index must
+                # not be replaced by this batch's hashes alone
+                response = s3_client.get_object(
+                    Bucket=S3_PROCESSED_BUCKET, Key=key
+                )
+                previous = pd.read_parquet(BytesIO(response["Body"].read()))
+                merged = pd.concat(
+                    [previous.astype({"row_hash": "UInt64"}), hash_index],
+                    ignore_index=True,
+                ).drop_duplicates(subset=[primary_key], keep="last")
+            try:
+                put_snapshot(prefix, version + 1, merged, S3_PROCESSED_BUCKET)
+                return
+            except ClientError as ce:
+                if not is_precondition_failed(ce):
+                    raise
+                logger.warning(
+                    f"Concurrent update of hash index for {output_name}, "
+                    f"retrying (attempt {attempt})"
+                )
+        logger.error(
+            f"Gave up saving hash index for {output_name} after "
+            f"{SNAPSHOT_WRITE_ATTEMPTS} concurrent update(s)"
+        )
+    except Exception as err:
+        logger.error(f"Error saving hash index for {output_name}: {err}")
+
+
+def get_parquet_profile(table_name):
+    from src.transformation.transformation import (
+        DEFAULT_PARQUET_PROFILE,
+        PARQUET_WRITER_PROFILES,
+    )
+
+    """
+    Returns the Parquet writer profile for a table, merged
+    over the default profile.
+    """
+    return {
+        **DEFAULT_PARQUET_PROFILE,
+        **PARQUET_WRITER_PROFILES.get(table_name, {}),
+    }
+
+
+def to_arrow_table(data, profile, schema=None):
+    """
+    Converts a DataFrame to an Arrow table, sorted by the
+    profile's sort keys that are present in the data.
+    """
+    sort_by = [col for col in profile["sort_by"] or [] if col in data]
+    if sort_by:
+        data = data.sort_values(sort_by, kind="stable")
+    return pa.Table.from_pandas(data, schema=schema, preserve_index=False)
+
+
+def parquet_writer_options(profile, columns):
+    """
+    Builds pyarrow writer options from a profile, dropping
+    per-column settings for columns that are not present.
+
+    A use_dictionary of True with no_dictionary exceptions is
+    expanded to every other column, so columns missing from the
+    profile keep dictionary encoding.
+    """
+    options = {
+        "compression": profile["compression"],
+        "compression_level": profile["compression_level"],
+    }
+    for option in ["use_dictionary", "write_statistics"]:
+        value = profile[option]
+        if isinstance(value, (list, tuple)):
+            value = [col for col in value if col in columns]
+        options[option] = value
+    no_dictionary = profile.get("no_dictionary") or []
+    if options["use_dictionary"] is True and no_dictionary:
+        options["use_dictionary"] = [
+            col for col in columns if col not in no_dictionary
+        ]
+    return options
+
+
+def write_parquet(table_name, data, sink):
+    """
+    Writes a DataFrame to a Parquet sink using the writer
+    profile configured for the table.
+
+    Args:
+        table_name (str): The name of the output table.
+        data (pd.DataFrame): The data to write.
+        sink: Path or writable file-like object.
+
+    Returns:
+        pa.Schema: The schema of the written file.
+    """
+    profile = get_parquet_profile(table_name)
+    arrow_table = to_arrow_table(data, profile)
+    pq.write_table(
+        arrow_table,
+        sink,
+        row_group_size=profile["row_group_size"],
+        **parquet_writer_options(profile, arrow_table.column_names),
+    )
+    return arrow_table.schema
+
+
+def count_rows(data):
+    """
+    Returns the number of rows of a dataset, 0 if it has none.
+    """
+    try:
+        return len(data)
+    except TypeError:
+        return 0
+
+
+def peak_rss_bytes():
+    """
+    Returns the peak resident set size of this process so far.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def emit_metrics(table_name, stage, **metrics):
+    from src.transformation.transformation import (
+        METRICS_ENABLED,
+        METRICS_NAMESPACE,
+        metrics_logger,
+    )
+
+    """
+    Logs metrics for one table and stage as a structured log line
+    in CloudWatch embedded metric format, which CloudWatch turns
+    into metrics dimensioned by table and stage.
+
+    Returns:
+        dict: The logged record, or None if metrics are disabled.
+    """
+    if not METRICS_ENABLED:
+        return None
+
+    record = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": METRICS_NAMESPACE,
+                    "Dimensions": [["table", "stage"]],
+                    "Metrics": [
+                        {"Name": name, "Unit": METRIC_UNITS.get(name, "None")}
+                        for name in metrics
+                    ],
+                }
+            ],
+        },
+        "table": table_name,
+        "stage": stage,
+        **metrics,
+    }
+    metrics_logger.info(json.dumps(record))
+    return record
+
+
+def start_profiler():
+    """
+    Returns an enabled cProfile profiler, or None if another
+    profiler is already active.
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler
+
+
+def save_profile(table_name, profiler):
+    from src.transformation.transformation import (
+        PROFILE_FOLDER,
+        S3_PROCESSED_BUCKET,
+        s3_client,
+        logger,
+    )
+
+    """
+    Uploads a cProfile dump to the processed S3 bucket, it can be
+    read with pstats or snakeviz.
+
+    Returns:
+        str: The profile s3 key, or None if it was not saved.
+    """
+    timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
+    key = f"{PROFILE_FOLDER}/{table_name}/{timestamp}.prof"
+    try:
+        with tempfile.NamedTemporaryFile(suffix=".prof") as dump:
+            profiler.dump_stats(dump.name)
+            s3_client.upload_file(dump.name, S3_PROCESSED_BUCKET, key)
+        logger.info(f"Saved profile of slow transform to: {key}")
+        return key
+    except Exception as err:
+        logger.error(f"Error saving profile for table {table_name}: {err}")
+
+
+def process_table(table_name, transform_function, *data):
+    from src.transformation.transformation import (
+        METRICS_ENABLED,
+        TRACE_MEMORY,
+        PROFILE_THRESHOLD_SECONDS,
+        logger,
+    )
+
+    """
+    Process a specific table using its transformation function.
+
+    Rows in and out, wall and CPU time and peak memory are emitted
+    as metrics. Peak memory is the tracemalloc peak when
+    TRACE_MEMORY is set, otherwise how far the transform raised
+    the process peak RSS. Both are process wide, so transforms
+    running concurrently on threads share them.
+
+    Args:
+        table_name (str): The name of the table being processed.
+        transform_function (callable): The transformation
+            function to apply.
+        *data (list[dict]): The data to transform, one dataset
+            per input of the transformation function.
+
+    Returns:
+        pd.DataFrame: The transformed data.
+    """
+    logger.info(f"Processing table: {table_name}")
+    if not METRICS_ENABLED:
+        return transform_function(*data)
+
+    if TRACE_MEMORY:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        memory_before = tracemalloc.get_traced_memory()[0]
+    else:
+        memory_before = peak_rss_bytes()
+    profiler = start_profiler() if PROFILE_THRESHOLD_SECONDS else None
+
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        transformed_data = transform_function(*data)
+    finally:
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = time.thread_time() - cpu_start
+        if profiler is not None:
+            profiler.disable()
+
+    if TRACE_MEMORY:
+        peak_memory = tracemalloc.get_traced_memory()[1] - memory_before
+    else:
+        peak_memory = peak_rss_bytes() - memory_before
+
+    emit_metrics(
+        table_name,
+        "transform",
+        input_rows=sum(count_rows(dataset) for dataset in data),
+        output_rows=count_rows(transformed_data),
+        wall_time_ms=round(wall_time * 1000, 3),
+        cpu_time_ms=round(cpu_time * 1000, 3),
+        peak_memory_bytes=max(peak_memory, 0),
+    )
+    if profiler is not None and wall_time >= PROFILE_THRESHOLD_SECONDS:
+        save_profile(table_name, profiler)
+    return transformed_data
+
+
+def dag_sources(dag):
+    """
+    Returns the source tables the DAG is built from, i.e.
+    inputs that are not themselves outputs.
+    """
+    return {
+        table
+        for node in dag.values()
+        for table in node["inputs"]
+        if table not in dag
+    }
+
+
+def node_triggers(node):
+    """
+    Returns the inputs whose changes require the node to be rebuilt.
+    """
+    return node.get("triggers", node["inputs"])
+
+
+def reference_sources(dag):
+    """
+    Returns the source tables that need a reference snapshot,
+    i.e. lookups read by an output when another input changes.
+    """
+    sources = dag_sources(dag)
+    return {
+        table
+        for node in dag.values()
+        for table in node["inputs"]
+        if table in sources
+        and not node.get("partial")
+        and any(trigger != table for trigger in node_triggers(node))
+    }
+
+
+def affected_outputs(dag, changed):
+    """
+    Computes the minimal set of outputs affected by the changed
+    tables, following output-to-output dependencies.
+
+    Args:
+        dag (dict): Output name to node definition.
+        changed (set): Names of the changed source tables.
+
+    Returns:
+        set: Names of the outputs to rebuild.
+    """
+    affected = set()
+    dirty = set(changed)
+    while True:
+        newly_affected = {
+            output
+            for output, node in dag.items()
+            if output not in affected
+            and any(trigger in dirty for trigger in node_triggers(node))
+        }
+        if not newly_affected:
+            return affected
+        affected |= newly_affected
+        dirty |= newly_affected
+
+
+def dag_levels(dag, outputs):
+    """
+    Orders outputs (plus any upstream outputs they read) into
+    levels, where every node only depends on earlier levels, so
+    the nodes of a level can run in parallel.
+
+    Raises:
+        ValueError: If the DAG contains a cycle.
+    """
+    required = set()
+    pending = list(outputs)
+    while pending:
+        output = pending.pop()
+        if output in required:
+            continue
+        required.add(output)
+        pending.extend(
+            table for table in dag[output]["inputs"] if table in dag
+        )
+
+    levels = []
+    done = set()
+    while required - done:
+        level = sorted(
+            output
+            for output in required - done
+            if all(
+                table in done
+                for table in dag[output]["inputs"]
+                if table in dag
+            )
+        )
+        if not level:
+            raise ValueError("Transformation DAG contains a cycle")
+        levels.append(level)
+        done.update(level)
+    return levels
+
+
+def latest_snapshot(prefix, S3_PROCESSED_BUCKET):
+    from src.transformation.transformation import s3_client
+
+    """
+    Finds the latest version of a versioned snapshot.
+
+    Snapshots are immutable files named '<prefix>/<version>.parquet',
+    the latest is the highest version. A snapshot written before
+    versioning, '<prefix>.parquet', counts as version 0.
+
+    Returns:
+        tuple: (version, key) of the latest snapshot, or (0, None)
+        if there is none.
+    """
+    paginator = s3_client.get_paginator("list_objects_v2")
+    versions = [
+        (int(match.group(1)), obj["Key"])
+        for page in paginator.paginate(
+            Bucket=S3_PROCESSED_BUCKET, Prefix=f"{prefix}/"
+        )
+        for obj in page.get("Contents", [])
+        for match in [SNAPSHOT_VERSION.search(obj["Key"])]
+        if match
+    ]
+    if versions:
+        return max(versions)
+    try:
+        s3_client.head_object(
+            Bucket=S3_PROCESSED_BUCKET, Key=f"{prefix}.parquet"
+        )
+        return 0, f"{prefix}.parquet"
+    except ClientError as ce:
+        if ce.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            return 0, None
+        raise
+
+
+def put_snapshot(prefix, version, data, S3_PROCESSED_BUCKET):
+    from src.transformation.transformation import s3_client
+
+    """
+    Creates a snapshot version with a conditional put (If-None-Match),
+    so of two writers that read the same version only the first
+    creates the next one. Versions before the previous one are then
+    deleted, leaving readers that listed just before the put a
+    version to read.
+
+    Raises:
+        ClientError: 'PreconditionFailed' if the version exists.
+
+    Returns:
+        str: The key of the new snapshot.
+    """
+    key = f"{prefix}/{version:010d}.parquet"
+    parquet_buffer = BytesIO()
+    data.to_parquet(parquet_buffer, index=False, engine="pyarrow")
+    s3_client.put_object(
+        Bucket=S3_PROCESSED_BUCKET,
+        Key=key,
+        Body=parquet_buffer.getvalue(),
+        IfNoneMatch="*",
+    )
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(
+        Bucket=S3_PROCESSED_BUCKET, Prefix=f"{prefix}/"
+    ):
+        for obj in page.get("Contents", []):
+            match = SNAPSHOT_VERSION.search(obj["Key"])
+            if match and int(match.group(1)) < version - 1:
+                s3_client.delete_object(
+                    Bucket=S3_PROCESSED_BUCKET, Key=obj["Key"]
+                )
+    return key
+
+
+def is_precondition_failed(err):
+    """
+    Returns True if an S3 error is a failed conditional write.
+    """
+    return (
+        isinstance(err, ClientError)
+        and err.response["Error"]["Code"] == "PreconditionFailed"
+    )
+
+
+# Warm-container cache of reference snapshots, (bucket, table name)
+# to (key, records). Snapshot versions are immutable, so a cached
+# snapshot is reused while its key is still the latest version, and
+# keeps the same identity so lookup indexes built over it are
+# reused too
+reference_snapshots = {}
+
+
+def read_reference_snapshot(table_name, S3_PROCESSED_BUCKET):
+    from src.transformation.transformation import REFERENCE_FOLDER, s3_client
+
+    """
+    Reads the latest reference snapshot of a source table, through
+    the warm-container cache.
+
+    Returns:
+        tuple: (version, records), records None if there is no
+        snapshot yet.
+    """
+    version, key = latest_snapshot(
+        f"{REFERENCE_FOLDER}/{table_name}", S3_PROCESSED_BUCKET
+    )
+    if key is None:
+        return version, None
+    cached_key, cached_records = reference_snapshots.get(
+        (S3_PROCESSED_BUCKET, table_name), (None, None)
+    )
+    if key == cached_key:
+        return version, cached_records
+
+    response = s3_client.get_object(Bucket=S3_PROCESSED_BUCKET, Key=key)
+    snapshot = pd.read_parquet(BytesIO(response["Body"].read()))
+    records = snapshot.to_dict("records")
+    reference_snapshots[(S3_PROCESSED_BUCKET, table_name)] = (key, records)
+    return version, records
+
+
+def load_reference_data(table_name, S3_PROCESSED_BUCKET):
+    from src.transformation.transformation import logger
+
+    """
+    Loads the reference snapshot of a source table, the latest
+    version of every row seen so far.
+
+    Returns:
+        list[dict]: Snapshot records, or None if unavailable.
+    """
+    try:
+        _, records = read_reference_snapshot(table_name, S3_PROCESSED_BUCKET)
+        if records is None:
+            logger.warning(f"No reference data for table: {table_name}")
+        return records
+    except ClientError as ce:
+        logger.warning(f"No reference data for table: {table_name}: {ce}")
+    except Exception as err:
+        logger.error(f"Error loading reference data for {table_name}: {err}")
+
+
+def update_reference_data(table_name, data, S3_PROCESSED_BUCKET):
+    from src.transformation.transformation import (
+        REFERENCE_FOLDER,
+        SOURCE_PRIMARY_KEYS,
+        SNAPSHOT_WRITE_ATTEMPTS,
+        logger,
+    )
+
+    """
+    Upserts newly ingested rows into the reference snapshot of a
+    source table, keeping the latest row per primary key.
+
+    The upsert is written as the snapshot's next version. If a
+    concurrent invocation created that version first, the rows are
+    merged again over its snapshot and the write is retried, so no
+    invocation's rows are lost.
+
+    Returns:
+        list[dict]: The updated snapshot records, or None if the
+        snapshot could not be updated.
+    """
+    prefix = f"{REFERENCE_FOLDER}/{table_name}"
+    try:
+        primary_key = SOURCE_PRIMARY_KEYS[table_name]
+        for attempt in range(1, SNAPSHOT_WRITE_ATTEMPTS + 1):
+            version, existing = read_reference_snapshot(
+                table_name, S3_PROCESSED_BUCKET
+            )
+            snapshot = pd.DataFrame((existing or []) + list(data))
+            snapshot = snapshot.drop_duplicates(
+                subset=[primary_key], keep="last"
+            )
+            try:
+                key = put_snapshot(
+                    prefix, version + 1, snapshot, S3_PROCESSED_BUCKET
+                )
+            except ClientError as ce:
+                if not is_precondition_failed(ce):
+                    raise
+                logger.warning(
+                    f"Concurrent update of reference data for {table_name}, "
+                    f"retrying (attempt {attempt})"
+                )
+                continue
+
+            logger.info(f"Updated reference data: {key}")
+            records = snapshot.to_dict("records")
+            reference_snapshots[(S3_PROCESSED_BUCKET, table_name)] = (
+                key,
+                records,
+            )
+            return records
+        logger.error(
+            f"Gave up updating reference data for {table_name} after "
+            f"{SNAPSHOT_WRITE_ATTEMPTS} concurrent update(s)"
+        )
+    except Exception as err:
+        logger.error(f"Error updating reference data for {table_name}: {err}")
+
+
+def available_cpus():
+    """
+    Returns the number of vCPUs this process may run on.
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def write_arrow_file(data, path):
+    """
+    Writes records or a DataFrame to an Arrow IPC file.
+    """
+    if isinstance(data, pd.DataFrame):
+        table = pa.Table.from_pandas(data, preserve_index=False)
+    else:
+        table = pa.Table.from_pylist(list(data))
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read_arrow_file(path):
+    """
+    Memory-maps an Arrow IPC file and returns its table.
+    """
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def run_node_in_process(output, transform_function, input_paths, output_path):
+    """
+    Process pool entry point: reads the node's inputs from Arrow
+    files, builds the output and writes it back as an Arrow file.
+
+    Inputs are handed to the transform as DataFrames converted
+    column by column from the memory-mapped tables, rather than
+    rebuilt row by row as records.
+
+    Returns:
+        bool: Whether an output was written.
+    """
+    inputs = [read_arrow_file(path).to_pandas() for path in input_paths]
+    transformed_data = process_table(output, transform_function, *inputs)
+    if transformed_data is None:
+        return False
+    write_arrow_file(transformed_data, output_path)
+    return True
+
+
+def run_level_in_processes(level, dag, inputs, max_workers):
+    from src.transformation.transformation import logger
+
+    """
+    Builds independent outputs on a process pool.
+
+    Inputs are handed to the workers as Arrow IPC files in a
+    temporary directory rather than pickled, each dataset written
+    once however many outputs read it, and outputs come back the
+    same way.
+
+    Raises:
+        OSError: If the platform cannot start a process pool.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = {}
+        jobs = {}
+        for output in level:
+            input_paths = []
+            for data in inputs[output]:
+                if id(data) not in paths:
+                    paths[id(data)] = os.path.join(
+                        workdir, f"input_{len(paths)}.arrow"
+                    )
+                    write_arrow_file(data, paths[id(data)])
+                input_paths.append(paths[id(data)])
+            jobs[output] = input_paths
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers or available_cpus()
+        ) as pool:
+            futures = {
+                output: pool.submit(
+                    run_node_in_process,
+                    output,
+                    dag[output]["function"],
+                    jobs[output],
+                    os.path.join(workdir, f"{output}.arrow"),
+                )
+                for output in level
+            }
+            for output, future in futures.items():
+                try:
+                    results[output] = (
+                        read_arrow_file(
+                            os.path.join(workdir, f"{output}.arrow")
+                        ).to_pandas()
+                        if future.result()
+                        else None
+                    )
+                except Exception as err:
+                    logger.error(
+                        f"Error building output {output} in process: {err}"
+                    )
+                    results[output] = None
+    return results
+
+
+def run_transformation_dag(
+    sources,
+    S3_PROCESSED_BUCKET,
+    dag=None,
+    max_workers=None,
+    executor="thread",
+):
+    from src.transformation.transformation import (
+        TRANSFORMATION_DAG,
+        logger,
+    )
 
     """
-    Process a specific table using its transformation function.
+    Builds every output affected by the changed source tables
+    exactly once.
+
+    Each input is resolved a single time and shared between the
+    outputs that read it. An output is built from the changed rows
+    of its trigger when only one trigger changed, with any other
+    inputs read from their reference snapshot, while "partial"
+    outputs only receive the changed inputs. "optional" inputs
+    without a snapshot are passed as empty datasets, any other
+    missing input skips the output. Outputs of the same DAG level
+    are independent and run in parallel.
 
     Args:
-        table_name (str): The name of the table being processed.
-        transform_function (callable): The transformation
-            function to apply.
-        data (list[dict]): The data to transform.
+        sources (dict): Changed source table name to its new records.
+        S3_PROCESSED_BUCKET (str): Bucket holding reference snapshots.
+        dag (dict): Output name to node definition, defaults to
+            TRANSFORMATION_DAG.
+        max_workers (int): Pool size for each level.
+        executor (str): "thread" (default) or "process". Process
+            mode only pays off for large batches of CPU-bound
+            outputs on several vCPUs, as every input and output is
+            written to and read back from an Arrow file. It falls
+            back to threads where a process pool is unavailable
+            (e.g. AWS Lambda, which has no /dev/shm).
 
     Returns:
-        pd.DataFrame: The transformed data.
+        dict: Output name to transformed DataFrame (or None).
     """
-    logger.info(f"Processing table: {table_name}")
-    transformed_data = transform_function(data)
-    return transformed_data
+    dag = dag or TRANSFORMATION_DAG
+    references = {}
+
+    # Keep lookup snapshots current before anything reads them
+    for table_name in reference_sources(dag) & set(sources):
+        references[table_name] = update_reference_data(
+            table_name, sources[table_name], S3_PROCESSED_BUCKET
+        )
+
+    def reference(table_name):
+        if table_name not in references:
+            references[table_name] = load_reference_data(
+                table_name, S3_PROCESSED_BUCKET
+            )
+        return references[table_name]
+
+    affected = affected_outputs(dag, set(sources))
+    results = {}
+
+    def resolve_inputs(output):
+        node = dag[output]
+        changed_triggers = [
+            table
+            for table in node_triggers(node)
+            if table in sources or table in affected
+        ]
+        inputs = []
+        for table in node["inputs"]:
+            if table in dag:
+                inputs.append(results.get(table))
+            elif node.get("partial"):
+                inputs.append(sources.get(table, []))
+            elif table in sources and (
+                changed_triggers == [table] or len(node["inputs"]) == 1
+            ):
+                inputs.append(sources[table])
+            elif reference(table) is None and table in node.get(
+                "optional", []
+            ):
+                inputs.append([])
+            else:
+                inputs.append(reference(table))
+        return inputs
+
+    def run_in_threads(level, inputs):
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            built = pool.map(
+                lambda output: process_table(
+                    output, dag[output]["function"], *inputs[output]
+                ),
+                level,
+            )
+            return dict(zip(level, built))
+
+    for level in dag_levels(dag, affected):
+        inputs = {output: resolve_inputs(output) for output in level}
+        ready = []
+        for output in level:
+            if any(data is None for data in inputs[output]):
+                logger.warning(
+                    f"Missing input data, skipping output: {output}"
+                )
+                results[output] = None
+            else:
+                ready.append(output)
+
+        if executor == "process":
+            try:
+                results.update(
+                    run_level_in_processes(ready, dag, inputs, max_workers)
+                )
+                continue
+            except OSError as err:
+                logger.warning(
+                    f"Process pool unavailable, using threads: {err}"
+                )
+        results.update(run_in_threads(ready, inputs))
+
+    return results
 
 
 def extract_table_name(s3_key):
@@ -120,10 +1369,11 @@ def extract_table_name(s3_key):
 
 
 # Transformation helper functions
-def load_data_from_s3_ingestion(key):
+def load_data_from_s3_ingestion(key, columnar=False):
     from src.transformation.transformation import (
         logger,
         S3_INGESTION_BUCKET,
+        STREAM_CHUNK_ROWS,
         s3_client,
     )
 
@@ -131,8 +1381,16 @@ def load_data_from_s3_ingestion(key):
     Loads data from the ingestion bucket
     using a given key
 
+    JSON arrays (ingestion writes each table as one array) are
+    parsed incrementally from the streaming body, so the raw bytes
+    and a decoded copy of the file are never held alongside the
+    parsed records. Any other JSON document is read and parsed
+    whole.
+
     ARGS:
         key: string - s3 key file
+        columnar: bool - return the records as a pyarrow Table,
+            built chunk by chunk, instead of a list of dicts
 
     RETURNS:
         data from the ingestion bucket
@@ -150,9 +1408,19 @@ def load_data_from_s3_ingestion(key):
                 f"No 'Body' content in s3 response for key: {key}"
             )
 
-        content = response["Body"].read().decode("utf-8")
+        body = response["Body"]
+        head = body.read(STREAM_READ_SIZE)
+        if head.lstrip()[:1] == b"[":
+            chunks = iter_json_records(
+                body, STREAM_CHUNK_ROWS, STREAM_READ_SIZE, prefix=head
+            )
+            if columnar:
+                data = records_to_table(chunks)
+            else:
+                data = [record for chunk in chunks for record in chunk]
+        else:
+            data = json.loads(head + body.read())
         logger.info(f"Successfully loaded data from s3 key: {key}")
-        data = json.loads(content)
 
         return data
     except ClientError as ce:
@@ -169,6 +1437,287 @@ def load_data_from_s3_ingestion(key):
         )
 
 
+def iter_json_records(
+    stream, chunk_rows, read_size=STREAM_READ_SIZE, prefix=b""
+):
+    """
+    Incrementally parses a JSON array of records from a
+    file-like stream, yielding the records in chunks.
+
+    Only the unparsed tail of the latest read is held in
+    memory, so peak usage is bounded by the chunk size
+    rather than the size of the file. The complete records of
+    each read are parsed with a single json.loads, which shares
+    key strings between them, falling back to one record at a
+    time if the read does not end on a record boundary.
+
+    Args:
+        stream: file-like object with a read(size) method
+            (e.g. an s3 StreamingBody).
+        chunk_rows (int): Maximum number of records per chunk.
+        read_size (int): Number of bytes requested per read.
+        prefix (bytes): Bytes already read from the stream.
+
+    Yields:
+        list[dict]: Up to chunk_rows records.
+
+    Raises:
+        ValueError: If the stream is not a JSON array.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    started = False
+    chunk = []
+
+    while True:
+        block = prefix or stream.read(read_size)
+        prefix = b""
+        eof = not block
+        buffer = buffer[position:] + text_decoder.decode(
+            block or b"", final=eof
+        )
+        position = 0
+        batch = True
+
+        while True:
+            position = JSON_SEPARATOR.match(buffer, position).end()
+            if position >= len(buffer):
+                break
+
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array of records")
+                started = True
+                position += 1
+                continue
+
+            if buffer[position] == "]":
+                if chunk:
+                    yield chunk
+                return
+
+            # Records end with the last "}" of the read, unless it
+            # is nested or inside a string and the batch fails
+            records = None
+            end = buffer.rfind("}", position) + 1
+            if batch and end > position:
+                try:
+                    records = json.loads(f"[{buffer[position:end]}]")
+                    position = end
+                except json.JSONDecodeError:
+                    batch = False
+
+            if records is None:
+                try:
+                    record, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    # Record is split across reads, wait for more data
+                    break
+                records = [record]
+
+            chunk.extend(records)
+            while len(chunk) >= chunk_rows:
+                yield chunk[:chunk_rows]
+                chunk = chunk[chunk_rows:]
+
+        if eof:
+            raise ValueError("Unexpected end of JSON array")
+
+
+def records_to_table(chunks):
+    """
+    Builds a column-oriented pyarrow Table from chunks of
+    records, so only one chunk of dicts is alive at a time.
+    Column types that differ between chunks are promoted.
+
+    Returns:
+        pa.Table: The records, an empty table if there were none.
+    """
+    tables = [pa.Table.from_pylist(chunk) for chunk in chunks]
+    if not tables:
+        return pa.table({})
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+def extract_dates(data):
+    """
+    Extracts the distinct calendar dates from the date columns
+    of a dataset, used to build dim_date without keeping the
+    full dataset around.
+
+    Args:
+        data (list[dict]): Raw records.
+
+    Returns:
+        pd.DataFrame: Single 'date' column of unique dates.
+    """
+    dataset = pd.DataFrame(data)
+    date_columns = [
+        col
+        for col in dataset.columns
+        if "date" in col or "created_at" in col or "last_updated" in col
+    ]
+    dates = [
+        pd.to_datetime(dataset[col], format="mixed").dt.normalize()
+        for col in date_columns
+    ]
+    if not dates:
+        return pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]")})
+    return pd.DataFrame({"date": pd.concat(dates).dropna().unique()})
+
+
+def stream_transform_table(
+    table_name,
+    key,
+    transform_function,
+    S3_PROCESSED_BUCKET,
+    chunk_rows,
+    on_chunk=None,
+    manifest=None,
+):
+    from src.transformation.transformation import (
+        PROCESSED_FOLDER,
+        HISTORY_FOLDER,
+        S3_INGESTION_BUCKET,
+        STREAM_OUTPUT_SCHEMAS,
+        s3_client,
+        logger,
+    )
+
+    """
+    Streams an ingestion file through a row-wise transformation
+    function chunk by chunk, writing each transformed chunk as a
+    Parquet row group, then uploads the file to the processed
+    S3 bucket.
+
+    The Parquet file is spooled to local disk, so memory is
+    bounded by chunk_rows rather than the size of the file.
+    Every chunk is written with the table's declared output
+    schema from STREAM_OUTPUT_SCHEMAS.
+
+    Args:
+        table_name (str): The name of the table being processed.
+        key (str): s3 key of the ingestion file.
+        transform_function (callable): Row-wise transformation
+            function taking a list of records.
+        S3_PROCESSED_BUCKET (str): Destination bucket.
+        chunk_rows (int): Number of records per chunk/row group.
+        on_chunk (callable): Optional callback receiving each
+            raw chunk before it is transformed.
+        manifest (list): Optional batch manifest the written
+            file's entry is appended to.
+
+    Returns:
+        str: The processed s3 key, or None if nothing was written.
+    """
+    try:
+        if table_name not in STREAM_OUTPUT_SCHEMAS:
+            raise ValueError(f"No output schema declared for {table_name}")
+        schema = STREAM_OUTPUT_SCHEMAS[table_name]
+
+        logger.info(f"Streaming table: {table_name} from {key}")
+        response = s3_client.get_object(Bucket=S3_INGESTION_BUCKET, Key=key)
+
+        stem = data_file_stem()
+        processed_key = f"{PROCESSED_FOLDER}/{table_name}/{stem}.parquet"
+        history_key = f"{HISTORY_FOLDER}/{table_name}/{stem}.parquet"
+
+        profile = get_parquet_profile(table_name)
+        writer = None
+        rows = 0
+        with tempfile.NamedTemporaryFile(suffix=".parquet") as spool:
+            try:
+                for chunk in iter_json_records(response["Body"], chunk_rows):
+                    if on_chunk:
+                        on_chunk(chunk)
+
+                    transformed = transform_function(chunk)
+                    if transformed is None or transformed.empty:
+                        continue
+
+                    # Sort keys only order rows within each chunk
+                    arrow_table = to_arrow_table(
+                        transformed, profile, schema=schema
+                    )
+                    if writer is None:
+                        writer = pq.ParquetWriter(
+                            spool.name,
+                            schema,
+                            **parquet_writer_options(profile, schema.names),
+                        )
+                    writer.write_table(
+                        arrow_table, row_group_size=profile["row_group_size"]
+                    )
+                    rows += len(transformed)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+            if writer is None:
+                logger.warning(f"No rows to write for table: {table_name}")
+                return None
+
+            s3_client.upload_file(
+                spool.name, S3_PROCESSED_BUCKET, processed_key
+            )
+            logger.info(f"Streamed {rows} row(s) to: {processed_key}")
+            emit_metrics(
+                table_name,
+                "stream",
+                rows=rows,
+                parquet_bytes=os.path.getsize(spool.name),
+            )
+            if manifest is not None:
+                manifest.append(
+                    manifest_entry(
+                        table_name,
+                        processed_key,
+                        S3_PROCESSED_BUCKET,
+                        rows,
+                        writer.schema,
+                        os.path.getsize(spool.name),
+                    )
+                )
+
+        if table_name.startswith("fact"):
+            s3_client.copy_object(
+                Bucket=S3_PROCESSED_BUCKET,
+                Key=history_key,
+                CopySource={
+                    "Bucket": S3_PROCESSED_BUCKET,
+                    "Key": processed_key,
+                },
+            )
+            logger.info(f"Saved historical data to s3: {history_key}")
+
+        return processed_key
+    except ClientError as ce:
+        logger.error(f"Client error occurred streaming {table_name}: {ce}")
+    except ValueError as ve:
+        logger.error(f"Validation error streaming {table_name}: {ve}")
+    except Exception as err:
+        logger.error(
+            f"Unexpected error occurred streaming table {table_name}: {err}"
+        )
+
+
+def transform_dim_date(*datasets):
+    """
+    Builds dim_date from the date columns of raw datasets.
+
+    Args:
+        *datasets (list[dict]): Raw records with date columns.
+
+    Returns:
+        pd.DataFrame: dim_date table.
+    """
+    return dim_date(*[pd.DataFrame(dataset) for dataset in datasets])
+
+
 def dim_date(*datasets):
     from src.transformation.transformation import logger
 
@@ -275,6 +1824,72 @@ def dim_date(*datasets):
         logger.error(f"Unexpected exception has occurred: {err}")
 
 
+# Warm-container cache of lookup indexes, (key, columns) to the
+# dataset they were built from and the index
+lookup_indexes = {}
+
+
+def dataset_columns(data):
+    """
+    Returns the column names of a DataFrame or list of records.
+    """
+    if isinstance(data, pd.DataFrame):
+        return set(data.columns)
+    return set(data[0]) if data else set()
+
+
+def lookup_index(data, key, columns):
+    """
+    Builds a positional index over a lookup dataset on its key,
+    with the looked-up columns as arrays. The index is reused for
+    as long as the same dataset object is passed in, e.g. a cached
+    reference snapshot, so the hash table is built once per
+    snapshot rather than once per join.
+
+    Args:
+        data (list[dict] | pd.DataFrame): The lookup dataset.
+        key (str): The lookup key column, unique per row.
+        columns (list[str]): The columns to look up.
+
+    Returns:
+        tuple[pd.Index, dict]: The key index and the column arrays
+        aligned to it. Duplicate keys keep their last row.
+    """
+    cache_key = (key, tuple(columns))
+    cached = lookup_indexes.get(cache_key)
+    if cached is not None and cached[0] is data:
+        return cached[1]
+
+    lookup = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    index = pd.Index(lookup[key])
+    rows = slice(None)
+    if not index.is_unique:
+        rows = ~index.duplicated(keep="last")
+        index = index[rows]
+    arrays = {column: lookup[column].to_numpy()[rows] for column in columns}
+
+    built = (index, arrays)
+    lookup_indexes[cache_key] = (data, built)
+    return built
+
+
+def join_lookup(keys, index, arrays):
+    """
+    Inner-joins keys against a lookup index, keeping the order of
+    the keys.
+
+    Returns:
+        tuple[np.ndarray, dict]: Mask of the keys that matched and
+        the looked-up column values of the matched rows.
+    """
+    positions = index.get_indexer(keys)
+    matched = positions >= 0
+    positions = positions[matched]
+    return matched, {
+        column: values.take(positions) for column, values in arrays.items()
+    }
+
+
 def transform_dim_counterparty(counterparty_data, address_data):
     from src.transformation.transformation import logger
 
@@ -293,8 +1908,12 @@ def transform_dim_counterparty(counterparty_data, address_data):
         If required columns are missing or if inputs are invalid.
     """
     try:
-        dim_counterparty = pd.DataFrame(counterparty_data)
-        dim_address = pd.DataFrame(address_data)
+        dim_counterparty = (
+            pd.DataFrame(counterparty_data)
+            if not isinstance(counterparty_data, pd.DataFrame)
+            else counterparty_data
+        )
+        address_columns = dataset_columns(address_data)
 
         required_counterparty_columns = {
             "counterparty_id",
@@ -326,16 +1945,14 @@ def transform_dim_counterparty(counterparty_data, address_data):
         missing_cp_cols = required_counterparty_columns - set(
             dim_counterparty.columns
         )
-        missing_a_columns = required_address_columns - set(dim_address.columns)
+        missing_a_columns = required_address_columns - address_columns
 
         if missing_cp_cols or missing_a_columns:
             missing_info = []
             missing_cp_cols = required_counterparty_columns - set(
                 dim_counterparty.columns
             )
-            missing_a_columns = required_address_columns - set(
-                dim_address.columns
-            )
+            missing_a_columns = required_address_columns - address_columns
             if missing_cp_cols:
                 missing_info.append(
                     f"counterparty_data is missing columns: {missing_cp_cols}"
@@ -347,50 +1964,46 @@ def transform_dim_counterparty(counterparty_data, address_data):
             logger.error(f"{missing_info}")
             return pd.DataFrame(columns=final_columns)
 
-        dim_address.drop(
-            columns=["created_at", "last_updated"],
-            inplace=True,
-            errors="ignore",
-        )
-
-        dim_counterparty.drop(
-            columns=[
-                "created_at",
-                "last_updated",
-                "commercial_contact",
-                "delivery_contact",
+        # Looks up each counterparty's legal address by position
+        index, address = lookup_index(
+            address_data,
+            "address_id",
+            [
+                "address_line_1",
+                "address_line_2",
+                "district",
+                "city",
+                "postal_code",
+                "country",
+                "phone",
             ],
-            inplace=True,
-            errors="ignore",
-        )
-
-        dim_address = dim_address.rename(
-            columns={
-                "address_line_1": "counterparty_legal_address_line_1",
-                "address_line_2": "counterparty_legal_address_line_2",
-                "district": "counterparty_legal_district",
-                "city": "counterparty_legal_city",
-                "postal_code": "counterparty_legal_postal_code",
-                "country": "counterparty_legal_country",
-                "phone": "counterparty_legal_phone_number",
-            }
         )
-
-        merged_df = pd.merge(
-            dim_counterparty,
-            dim_address,
-            left_on="legal_address_id",
-            right_on="address_id",
-            how="inner",
+        matched, address = join_lookup(
+            dim_counterparty["legal_address_id"], index, address
         )
 
-        merged_df.drop(
-            columns=["legal_address_id", "address_id"],
-            inplace=True,
-            errors="ignore",
+        return pd.DataFrame(
+            {
+                "counterparty_id": dim_counterparty[
+                    "counterparty_id"
+                ].to_numpy()[matched],
+                "counterparty_legal_name": dim_counterparty[
+                    "counterparty_legal_name"
+                ].to_numpy()[matched],
+                "counterparty_legal_address_line_1": address[
+                    "address_line_1"
+                ],
+                "counterparty_legal_address_line_2": address[
+                    "address_line_2"
+                ],
+                "counterparty_legal_district": address["district"],
+                "counterparty_legal_city": address["city"],
+                "counterparty_legal_postal_code": address["postal_code"],
+                "counterparty_legal_country": address["country"],
+                "counterparty_legal_phone_number": address["phone"],
+            },
+            columns=final_columns,
         )
-
-        return merged_df[final_columns]
     except Exception as err:
         logger.error(
             f"Unexpected error occurred in transform_dim_counterparty: {err}"
@@ -415,12 +2028,12 @@ def transform_fact_sales_order(sales_order):
         If required columns are missing or invalid data is provided.
     """
     try:
-        if not isinstance(sales_order, list):
+        if not isinstance(sales_order, (list, pd.DataFrame)):
             raise ValueError(
                 f"Input data has to be a list but received {type(sales_order)}"
             )
 
-        if not sales_order:
+        if len(sales_order) == 0:
             raise ValueError("Empty data provided")
 
         fact_sales_order = (
@@ -543,12 +2156,125 @@ def transform_fact_sales_order(sales_order):
         # return None
 
 
-# Needs implementing
-def transform_fact_purchase_orders(transactions, dim_date):
+def to_date_column(values):
+    """
+    Parses ISO-8601 strings into an Arrow-backed date32 column
+    without creating a Python object per row.
+    """
+    timestamps = pa.array(pd.to_datetime(values, format="ISO8601"))
+    return pd.Series(
+        pd.arrays.ArrowExtensionArray(timestamps.cast(pa.date32())),
+        index=values.index,
+    )
+
+
+def split_datetime_column(values):
+    """
+    Splits ISO-8601 timestamp strings into Arrow-backed date32
+    and time64 columns, computed columnar rather than with the
+    per-row .dt.date/.dt.time object conversions.
+
+    Returns:
+        tuple[pd.Series, pd.Series]: The date and time columns.
+    """
+    timestamps = pa.array(pd.to_datetime(values, format="ISO8601"))
+    dates = timestamps.cast(pa.date32())
+    times = pc.cast(timestamps, pa.time64("us"), safe=False)
+    return (
+        pd.Series(pd.arrays.ArrowExtensionArray(dates), index=values.index),
+        pd.Series(pd.arrays.ArrowExtensionArray(times), index=values.index),
+    )
+
+
+def transform_fact_purchase_order(purchase_order_data):
+    from src.transformation.transformation import logger
+
     """
-    Transforms purchase transactions into fact_purchase_orders.
+    Transforms raw purchase orders into fact_purchase_order
+    using only vectorised column operations.
+
+    Args:
+        purchase_order_data (list[dict]):
+            Raw purchase order data.
+
+    Returns:
+        pd.DataFrame: Transformed fact_purchase_order DataFrame
+        or None if an error occurs.
+
+    Logs:
+        If required columns are missing or invalid data is provided.
     """
-    pass
+    try:
+        if not isinstance(purchase_order_data, (list, pd.DataFrame)):
+            raise ValueError("Input must be a list of dictionaries.")
+
+        if len(purchase_order_data) == 0:
+            raise ValueError("purchase_order_data must be populated")
+
+        purchase_order = pd.DataFrame(purchase_order_data)
+
+        required_columns = {
+            "purchase_order_id",
+            "created_at",
+            "last_updated",
+            "staff_id",
+            "counterparty_id",
+            "item_code",
+            "item_quantity",
+            "item_unit_price",
+            "currency_id",
+            "agreed_delivery_date",
+            "agreed_payment_date",
+            "agreed_delivery_location_id",
+        }
+        missing_columns = required_columns - set(purchase_order.columns)
+        if missing_columns:
+            raise ValueError(
+                f"purchase_order_data is missing columns: {missing_columns}"
+            )
+
+        created_date, created_time = split_datetime_column(
+            purchase_order["created_at"]
+        )
+        last_updated_date, last_updated_time = split_datetime_column(
+            purchase_order["last_updated"]
+        )
+
+        fact_purchase_order = pd.DataFrame(
+            {
+                "purchase_order_id": purchase_order["purchase_order_id"],
+                "created_date": created_date,
+                "created_time": created_time,
+                "last_updated_date": last_updated_date,
+                "last_updated_time": last_updated_time,
+                "staff_id": purchase_order["staff_id"],
+                "counterparty_id": purchase_order["counterparty_id"],
+                "item_code": purchase_order["item_code"],
+                "item_quantity": purchase_order["item_quantity"],
+                "item_unit_price": pd.to_numeric(
+                    purchase_order["item_unit_price"]
+                ),
+                "currency_id": purchase_order["currency_id"],
+                "agreed_delivery_date": to_date_column(
+                    purchase_order["agreed_delivery_date"]
+                ),
+                "agreed_payment_date": to_date_column(
+                    purchase_order["agreed_payment_date"]
+                ),
+                "agreed_delivery_location_id": purchase_order[
+                    "agreed_delivery_location_id"
+                ],
+            }
+        )
+
+        return fact_purchase_order
+    except ValueError as ve:
+        logger.error(f"Validation error: {ve}")
+    except Exception as err:
+        logger.error(
+            "Unexpected error occurred in transform_fact_purchase_order: "
+            f"{err}"
+        )
 
 
 def transform_dim_design(design_data):
@@ -568,7 +2294,7 @@ def transform_dim_design(design_data):
         If required columns are missing or if inputs are invalid.
     """
     try:
-        if not design_data:
+        if design_data is None or len(design_data) == 0:
             logger.warning(f"Design data is empty: {design_data}")
             return None
 
@@ -634,52 +2360,27 @@ def transform_dim_staff(staff_data, department_data):
         staff = (
             pd.DataFrame(staff_data)
             if not isinstance(staff_data, pd.DataFrame)
-            else staff_data.copy()
-        )
-        department = (
-            pd.DataFrame(department_data)
-            if not isinstance(department_data, pd.DataFrame)
-            else department_data.copy()
-        )
-        # Dropping unnecessary columns
-        department.drop(
-            columns=["manager", "created_at", "last_updated"],
-            inplace=True, errors="ignore"
+            else staff_data
         )
-        staff.drop(columns=["created_at", "last_updated"],
-                   inplace=True, errors="ignore")
 
-        dim_staff = pd.merge(
-            staff, department, on="department_id", how="inner"
+        # Looks up each member of staff's department by position
+        index, department = lookup_index(
+            department_data, "department_id", ["department_name", "location"]
         )
-        # Why is department_id twice here?
-        dim_staff.drop(
-            columns=["department_id", "department_id"],
-            inplace=True, errors="ignore"
+        matched, department = join_lookup(
+            staff["department_id"], index, department
         )
 
-        # Converting datatypes, not sure if its necessary
-        # dim_staff["staff_id"] = dim_staff["staff_id"].astype(int)
-        # dim_staff["first_name"] = dim_staff["first_name"].astype(str)
-        # dim_staff["last_name"] = dim_staff["last_name"].astype(str)
-        # dim_staff["department_name"] = dim_staff[
-        #   "department_name"
-        #  ].astype(str)
-        # dim_staff["location"] = dim_staff[
-        #   "department_location"
-        # ].astype(str)
-
-        # Reordering columns
-        dim_staff = dim_staff[
-            [
-                "staff_id",
-                "first_name",
-                "last_name",
-                "department_name",
-                "location",
-                "email_address",
-            ]
-        ]
+        dim_staff = pd.DataFrame(
+            {
+                "staff_id": staff["staff_id"].to_numpy()[matched],
+                "first_name": staff["first_name"].to_numpy()[matched],
+                "last_name": staff["last_name"].to_numpy()[matched],
+                "department_name": department["department_name"],
+                "location": department["location"],
+                "email_address": staff["email_address"].to_numpy()[matched],
+            }
+        )
 
         return dim_staff
     except Exception as err:
@@ -717,7 +2418,7 @@ def transform_dim_currency(currency_data):
             "JPY": "Japanese Yen",
         }
 
-        if not currency_data:
+        if currency_data is None or len(currency_data) == 0:
             logger.warning("No currency data provided.")
             return None
 
@@ -780,10 +2481,10 @@ def transform_dim_location(address_data):
     """
     try:
         # not sure if we want to raise the errors
-        if not isinstance(address_data, list):
+        if not isinstance(address_data, (list, pd.DataFrame)):
             raise ValueError("Input must be a list of dictionaries.")
 
-        if not address_data:
+        if len(address_data) == 0:
             raise ValueError("Input must be populated.")
 
         dim_address = (
@@ -831,10 +2532,10 @@ def transform_dim_transaction(transaction_data):
         or None if an error occurs.
     """
     try:
-        if not isinstance(transaction_data, list):
+        if not isinstance(transaction_data, (list, pd.DataFrame)):
             raise ValueError("Input must be a list of dictionaries.")
 
-        if not transaction_data:
+        if len(transaction_data) == 0:
             raise ValueError("transaction_data must be populated")
 
         dim_transaction = (
@@ -893,129 +2594,90 @@ def transform_fact_payment(
     from src.transformation.transformation import logger
 
     """
-    Transforms raw payments, transactions, and payment
-    type data into fact_payment.
+    Transforms raw payments into fact_payment using only
+    vectorised column operations, checking each payment's
+    transaction and payment type against their lookups.
 
     Args:
         payments_data (list[dict]):
             Raw payments data.
         transactions_data (list[dict]):
-            Raw transactions data.
+            Raw transactions data (lookup).
         payment_type_data (list[dict]):
-            Raw payment type data.
+            Raw payment type data (lookup).
 
     Returns:
         pd.DataFrame: Transformed fact_payment DataFrame
         or None if an error occurs.
     """
     try:
-        # Converting inputs to DataFrame if necessary
-        payments_df = (
-            pd.DataFrame(payments_data)
-            if not isinstance(payments_data, pd.DataFrame)
-            else payments_data.copy()
-        )
-        transactions_df = (
-            pd.DataFrame(transactions_data)
-            if not isinstance(transactions_data, pd.DataFrame)
-            else transactions_data.copy()
-        )
-        payment_type_df = (
-            pd.DataFrame(payment_type_data)
-            if not isinstance(payment_type_data, pd.DataFrame)
-            else payment_type_data.copy()
-        )
-
-        # Merging payments with transactions on `transaction_id`
-        fact_payment = pd.merge(
-            payments_df,
-            transactions_df[["transaction_id", "transaction_type"]],
-            on="transaction_id",
-            how="left",
-        )
-
-        # Merging with payment_type data on `payment_type_id`
-        fact_payment = pd.merge(
-            fact_payment,
-            payment_type_df[["payment_type_id", "payment_type_name"]],
-            on="payment_type_id",
-            how="left",
-        )
-
-        # Can also merge with sales_order on 'sales_order_id'
+        if len(payments_data) == 0:
+            raise ValueError("payments_data must be populated")
+
+        payments_df = pd.DataFrame(payments_data)
+
+        # Lookups are only used for referential checks, the ids are
+        # the foreign keys to dim_transaction and dim_payment_type.
+        # A lookup that has not been ingested yet is empty and its
+        # check is skipped rather than flagging every row
+        if len(transactions_data) and len(payment_type_data):
+            transaction_ids = pd.DataFrame(transactions_data)[
+                "transaction_id"
+            ]
+            payment_type_ids = pd.DataFrame(payment_type_data)[
+                "payment_type_id"
+            ]
+            unknown_transactions = ~payments_df["transaction_id"].isin(
+                transaction_ids
+            )
+            unknown_payment_types = ~payments_df["payment_type_id"].isin(
+                payment_type_ids
+            )
+            if unknown_transactions.any() or unknown_payment_types.any():
+                logger.warning(
+                    f"fact_payment has {unknown_transactions.sum()} row(s) "
+                    "with an unknown transaction and "
+                    f"{unknown_payment_types.sum()} row(s) with an unknown "
+                    "payment type"
+                )
+        else:
+            logger.info("fact_payment lookups not available yet")
 
-        # Converting 'created_at' and 'last_updated'
-        # into date and time components
-        fact_payment["created_at"] = pd.to_datetime(
-            fact_payment["created_at"], format="mixed"
+        created_date, created_time = split_datetime_column(
+            payments_df["created_at"]
         )
-        fact_payment["created_date"] = fact_payment["created_at"].dt.date
-        fact_payment["created_time"] = fact_payment["created_at"].dt.time
-
-        fact_payment["last_updated"] = pd.to_datetime(
-            fact_payment["last_updated"], format="mixed"
+        last_updated_date, last_updated_time = split_datetime_column(
+            payments_df["last_updated"]
         )
-        fact_payment["last_updated_date"] = fact_payment[
-            "last_updated"
-        ].dt.date
-        fact_payment["last_updated_time"] = fact_payment[
-            "last_updated"
-        ].dt.time
 
-        # Rename columns to match the schema
-        fact_payment = fact_payment.rename(
-            columns={
-                "payment_id": "payment_id",
-                "counterparty_id": "counterparty_id",
-                "payment_amount": "payment_amount",
-                "currency_id": "currency_id",
-                "payment_type_id": "payment_type_id",
-                "payment_type_name": "payment_type_name",
-                "paid": "paid",
-                "payment_date": "payment_date",
+        fact_payment = pd.DataFrame(
+            {
+                "payment_id": payments_df["payment_id"].astype("int64"),
+                "created_date": created_date,
+                "created_time": created_time,
+                "last_updated_date": last_updated_date,
+                "last_updated_time": last_updated_time,
+                "transaction_id": payments_df["transaction_id"].astype(
+                    "int64"
+                ),
+                "counterparty_id": payments_df["counterparty_id"].astype(
+                    "int64"
+                ),
+                "payment_amount": pd.to_numeric(
+                    payments_df["payment_amount"]
+                ).astype("float64"),
+                "currency_id": payments_df["currency_id"].astype("int64"),
+                "payment_type_id": payments_df["payment_type_id"].astype(
+                    "int64"
+                ),
+                "paid": payments_df["paid"].astype(bool),
+                "payment_date": to_date_column(payments_df["payment_date"]),
             }
         )
 
-        # Ensuring columns are in the correct order
-        fact_payment = fact_payment[
-            [
-                "payment_id",
-                "created_date",
-                "created_time",
-                "last_updated_date",
-                "last_updated_time",
-                "transaction_id",
-                "counterparty_id",
-                "payment_amount",
-                "currency_id",
-                "payment_type_id",
-                "payment_type_name",
-                "paid",
-                "payment_date",
-            ]
-        ]
-
-        # Converting data types
-        fact_payment["payment_id"] = fact_payment["payment_id"].astype(int)
-        fact_payment["transaction_id"] = fact_payment["transaction_id"].astype(
-            int
-        )
-        fact_payment["counterparty_id"] = fact_payment[
-            "counterparty_id"
-        ].astype(int)
-        fact_payment["payment_amount"] = fact_payment["payment_amount"].astype(
-            float
-        )
-        fact_payment["currency_id"] = fact_payment["currency_id"].astype(int)
-        fact_payment["payment_type_id"] = fact_payment[
-            "payment_type_id"
-        ].astype(int)
-        fact_payment["paid"] = fact_payment["paid"].astype(bool)
-        fact_payment["payment_date"] = pd.to_datetime(
-            fact_payment["payment_date"]
-        ).dt.date
-
         return fact_payment
+    except ValueError as ve:
+        logger.error(f"Validation error: {ve}")
     except Exception as err:
         logger.error(f"Unexpected error occurred with fact_payment: {err}")
 
@@ -1036,7 +2698,7 @@ def transform_dim_department(department_data):
             DataFrame or None if an error occurs.
     """
     try:
-        if isinstance(department_data, list) and not department_data:
+        if len(department_data) == 0:
             logger.info("Received empty list. Returning an empty DataFrame.")
             return pd.DataFrame(
                 columns=[
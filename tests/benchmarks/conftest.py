@@ -0,0 +1,125 @@
+import json
+import os
+import time
+import tracemalloc
+import pytest
+
+
+# Benchmarks are slow and are only collected when enabled, e.g.
+# RUN_BENCHMARKS=true BENCHMARK_SIZES=1000,100000 pytest tests/benchmarks
+if os.getenv("RUN_BENCHMARKS", "false").lower() != "true":
+    collect_ignore_glob = ["test_*.py"]
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.getenv(
+    "BENCHMARK_BASELINE", os.path.join(BENCHMARK_DIR, "baseline.json")
+)
+RESULTS_FILE = os.path.join(BENCHMARK_DIR, "results.json")
+BENCHMARK_SIZES = [
+    int(size)
+    for size in os.getenv("BENCHMARK_SIZES", "1000,100000,1000000").split(",")
+]
+# Allowed drop in rows/sec and growth in peak memory against the baseline
+BENCHMARK_TOLERANCE = float(os.getenv("BENCHMARK_TOLERANCE", "0.25"))
+SAVE_BASELINE = (
+    os.getenv("BENCHMARK_SAVE_BASELINE", "false").lower() == "true"
+)
+
+results = {}
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE) as baseline_file:
+        return json.load(baseline_file)
+
+
+def pytest_generate_tests(metafunc):
+    if "rows" in metafunc.fixturenames:
+        metafunc.parametrize(
+            "rows", BENCHMARK_SIZES, ids=[f"{n}rows" for n in BENCHMARK_SIZES]
+        )
+
+
+@pytest.fixture(scope="session")
+def baseline():
+    return load_baseline()
+
+
+@pytest.fixture
+def benchmark(request, baseline):
+    """
+    Times a function over a few rounds and traces its peak memory
+    in one more round, then fails if it is slower or uses more
+    memory than the stored baseline allows.
+    """
+
+    def run(rows, function, *args):
+        rounds = 3 if rows <= 100_000 else 1
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            function(*args)
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            function(*args)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        seconds = min(timings)
+        result = {
+            "rows": rows,
+            "seconds": round(seconds, 6),
+            "rows_per_sec": round(rows / seconds, 1),
+            "peak_memory_bytes": peak_memory,
+        }
+        name = request.node.name
+        results[name] = result
+
+        expected = baseline.get(name)
+        if expected and not SAVE_BASELINE:
+            min_rate = expected["rows_per_sec"] * (1 - BENCHMARK_TOLERANCE)
+            max_memory = expected["peak_memory_bytes"] * (
+                1 + BENCHMARK_TOLERANCE
+            )
+            assert result["rows_per_sec"] >= min_rate, (
+                f"{name} regressed to {result['rows_per_sec']:.0f} rows/sec, "
+                f"baseline {expected['rows_per_sec']:.0f}"
+            )
+            assert result["peak_memory_bytes"] <= max_memory, (
+                f"{name} peak memory grew to {peak_memory} bytes, "
+                f"baseline {expected['peak_memory_bytes']}"
+            )
+        return result
+
+    return run
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not results:
+        return
+    with open(RESULTS_FILE, "w") as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+    if SAVE_BASELINE:
+        stored = load_baseline()
+        stored.update(results)
+        with open(BASELINE_FILE, "w") as baseline_file:
+            json.dump(stored, baseline_file, indent=2, sort_keys=True)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not results:
+        return
+    terminalreporter.section("transformation benchmarks")
+    terminalreporter.write_line(
+        f"{'benchmark':<72} {'rows/sec':>14} {'peak MiB':>10}"
+    )
+    for name, result in sorted(results.items()):
+        terminalreporter.write_line(
+            f"{name:<72} {result['rows_per_sec']:>14,.0f} "
+            f"{result['peak_memory_bytes'] / 1024 / 1024:>10.1f}"
+        )
@@ -0,0 +1,371 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from io import BytesIO
+from unittest.mock import patch
+import src.transformation.transformationutil as util
+
+
+SEED = 2024
+
+
+def random_generator(rows):
+    return np.random.default_rng(SEED + rows)
+
+
+def timestamps(rng, rows):
+    seconds = rng.integers(0, 2 * 365 * 24 * 3600, rows)
+    values = pd.Timestamp("2022-11-03 14:20:49.962") + pd.to_timedelta(
+        seconds, unit="s"
+    )
+    return values.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def dates(rng, rows):
+    days = rng.integers(0, 2 * 365, rows)
+    values = pd.Timestamp("2022-11-03") + pd.to_timedelta(days, unit="D")
+    return values.strftime("%Y-%m-%d")
+
+
+def records(columns):
+    return pd.DataFrame(columns).to_dict("records")
+
+
+def lookup_rows(rows):
+    # Lookup tables stay small relative to the facts they describe
+    return max(rows // 100, 10)
+
+
+def make_sales_order(rows):
+    rng = random_generator(rows)
+    created = timestamps(rng, rows)
+    return records(
+        {
+            "sales_order_id": np.arange(1, rows + 1),
+            "created_at": created,
+            "last_updated": created,
+            "design_id": rng.integers(1, 500, rows),
+            "staff_id": rng.integers(1, 20, rows),
+            "counterparty_id": rng.integers(1, 20, rows),
+            "units_sold": rng.integers(1000, 100000, rows),
+            "unit_price": np.round(rng.uniform(2, 4, rows), 2).astype(str),
+            "currency_id": rng.integers(1, 4, rows),
+            "agreed_delivery_date": dates(rng, rows),
+            "agreed_payment_date": dates(rng, rows),
+            "agreed_delivery_location_id": rng.integers(1, 30, rows),
+        }
+    )
+
+
+def make_purchase_order(rows):
+    rng = random_generator(rows)
+    created = timestamps(rng, rows)
+    return records(
+        {
+            "purchase_order_id": np.arange(1, rows + 1),
+            "created_at": created,
+            "last_updated": created,
+            "staff_id": rng.integers(1, 20, rows),
+            "counterparty_id": rng.integers(1, 20, rows),
+            "item_code": rng.choice(["ZDOI5EA", "QLZLEXR", "6VHEPN5"], rows),
+            "item_quantity": rng.integers(1, 1000, rows),
+            "item_unit_price": np.round(rng.uniform(1, 1000, rows), 2),
+            "currency_id": rng.integers(1, 4, rows),
+            "agreed_delivery_date": dates(rng, rows),
+            "agreed_payment_date": dates(rng, rows),
+            "agreed_delivery_location_id": rng.integers(1, 30, rows),
+        }
+    )
+
+
+def make_payment(rows):
+    rng = random_generator(rows)
+    created = timestamps(rng, rows)
+    return records(
+        {
+            "payment_id": np.arange(1, rows + 1),
+            "created_at": created,
+            "last_updated": created,
+            "transaction_id": np.arange(1, rows + 1),
+            "counterparty_id": rng.integers(1, 20, rows),
+            "payment_amount": np.round(rng.uniform(1, 1e6, rows), 2).astype(
+                str
+            ),
+            "currency_id": rng.integers(1, 4, rows),
+            "payment_type_id": rng.integers(1, 5, rows),
+            "paid": rng.integers(0, 2, rows).astype(bool),
+            "payment_date": dates(rng, rows),
+            "company_ac_number": rng.integers(1e7, 1e8, rows),
+            "counterparty_ac_number": rng.integers(1e7, 1e8, rows),
+        }
+    )
+
+
+def make_transaction(rows):
+    rng = random_generator(rows)
+    created = timestamps(rng, rows)
+    sales = rng.integers(0, 2, rows).astype(bool)
+    order_ids = pd.Series(rng.integers(1, rows + 1, rows), dtype="Int64")
+    return records(
+        {
+            "transaction_id": np.arange(1, rows + 1),
+            "transaction_type": np.where(sales, "SALE", "PURCHASE"),
+            "sales_order_id": order_ids.where(sales),
+            "purchase_order_id": order_ids.where(~sales),
+            "created_at": created,
+            "last_updated": created,
+        }
+    )
+
+
+def make_payment_type(rows):
+    rng = random_generator(rows)
+    created = timestamps(rng, rows)
+    return records(
+        {
+            "payment_type_id": np.arange(1, rows + 1),
+            "payment_type_name": rng.choice(
+                ["SALES_RECEIPT", "SALES_REFUND", "PURCHASE_PAYMENT"], rows
+            ),
+            "created_at": created,
+            "last_updated": created,
+        }
+    )
+
+
+def make_address(rows):
+    rng = random_generator(rows)
+    created = timestamps(rng, rows)
+    ids = np.arange(1, rows + 1)
+    return records(
+        {
+            "address_id": ids,
+            "address_line_1": [f"{i} Pioneer Road" for i in ids],
+            "address_line_2": rng.choice(["", "Flat 1", "Unit 7"], rows),
+            "district": rng.choice(["Avon", "Kent", "Surrey"], rows),
+            "city": rng.choice(["Bath", "Leeds", "Derby", "York"], rows),
+            "postal_code": [f"{i:05d}" for i in ids],
+            "country": rng.choice(["UK", "France", "Spain"], rows),
+            "phone": [f"0{i:010d}" for i in ids],
+            "created_at": created,
+            "last_updated": created,
+        }
+    )
+
+
+def make_counterparty(rows):
+    rng = random_generator(rows)
+    created = timestamps(rng, rows)
+    ids = np.arange(1, rows + 1)
+    return records(
+        {
+            "counterparty_id": ids,
+            "counterparty_legal_name": [f"Company {i}" for i in ids],
+            "legal_address_id": rng.integers(1, lookup_rows(rows) + 1, rows),
+            "commercial_contact": [f"Contact {i}" for i in ids],
+            "delivery_contact": [f"Delivery {i}" for i in ids],
+            "created_at": created,
+            "last_updated": created,
+        }
+    )
+
+
+def make_department(rows):
+    rng = random_generator(rows)
+    created = timestamps(rng, rows)
+    ids = np.arange(1, rows + 1)
+    return records(
+        {
+            "department_id": ids,
+            "department_name": [f"Department {i}" for i in ids],
+            "location": rng.choice(["Manchester", "Leeds", "London"], rows),
+            "manager": [f"Manager {i}" for i in ids],
+            "created_at": created,
+            "last_updated": created,
+        }
+    )
+
+
+def make_staff(rows):
+    rng = random_generator(rows)
+    created = timestamps(rng, rows)
+    ids = np.arange(1, rows + 1)
+    return records(
+        {
+            "staff_id": ids,
+            "first_name": [f"First {i}" for i in ids],
+            "last_name": [f"Last {i}" for i in ids],
+            "department_id": rng.integers(1, lookup_rows(rows) + 1, rows),
+            "email_address": [f"staff{i}@terrifictotes.com" for i in ids],
+            "created_at": created,
+            "last_updated": created,
+        }
+    )
+
+
+def make_design(rows):
+    rng = random_generator(rows)
+    created = timestamps(rng, rows)
+    ids = np.arange(1, rows + 1)
+    return records(
+        {
+            "design_id": ids,
+            "created_at": created,
+            "last_updated": created,
+            "design_name": rng.choice(["Wooden", "Steel", "Bronze"], rows),
+            "file_location": rng.choice(["/usr", "/private", "/opt"], rows),
+            "file_name": [f"design-{i}.json" for i in ids],
+        }
+    )
+
+
+def make_currency(rows):
+    rng = random_generator(rows)
+    created = timestamps(rng, rows)
+    return records(
+        {
+            "currency_id": np.arange(1, rows + 1),
+            "currency_code": rng.choice(["GBP", "USD", "EUR"], rows),
+            "created_at": created,
+            "last_updated": created,
+        }
+    )
+
+
+# Row-wise transformations, benchmarked on their own output
+TRANSFORMS = {
+    "fact_sales_order": (util.transform_fact_sales_order, make_sales_order),
+    "fact_purchase_order": (
+        util.transform_fact_purchase_order,
+        make_purchase_order,
+    ),
+    "dim_location": (util.transform_dim_location, make_address),
+    "dim_design": (util.transform_dim_design, make_design),
+    "dim_currency": (util.transform_dim_currency, make_currency),
+    "dim_transaction": (util.transform_dim_transaction, make_transaction),
+    "dim_payment_type": (
+        util.transform_dim_payment_types,
+        make_payment_type,
+    ),
+    "dim_department": (util.transform_dim_department, make_department),
+}
+
+
+@pytest.mark.parametrize("output", TRANSFORMS)
+def test_benchmark_single_input_transform(benchmark, rows, output):
+    transform_function, make_data = TRANSFORMS[output]
+    data = make_data(rows)
+    assert transform_function(data) is not None
+
+    benchmark(rows, transform_function, data)
+
+
+def test_benchmark_transform_fact_payment(benchmark, rows):
+    payments = make_payment(rows)
+    transactions = make_transaction(rows)
+    payment_types = make_payment_type(4)
+    assert (
+        util.transform_fact_payment(payments, transactions, payment_types)
+        is not None
+    )
+
+    benchmark(
+        rows,
+        util.transform_fact_payment,
+        payments,
+        transactions,
+        payment_types,
+    )
+
+
+def test_benchmark_transform_dim_counterparty(benchmark, rows):
+    counterparties = make_counterparty(rows)
+    addresses = make_address(lookup_rows(rows))
+    assert (
+        util.transform_dim_counterparty(counterparties, addresses) is not None
+    )
+
+    benchmark(rows, util.transform_dim_counterparty, counterparties, addresses)
+
+
+def test_benchmark_transform_dim_staff(benchmark, rows):
+    staff = make_staff(rows)
+    departments = make_department(lookup_rows(rows))
+    assert util.transform_dim_staff(staff, departments) is not None
+
+    benchmark(rows, util.transform_dim_staff, staff, departments)
+
+
+def test_benchmark_transform_dim_date(benchmark, rows):
+    sales_orders = make_sales_order(rows)
+    assert util.transform_dim_date(sales_orders) is not None
+
+    benchmark(rows, util.transform_dim_date, sales_orders)
+
+
+def test_benchmark_dim_date(benchmark, rows):
+    sales_orders = pd.DataFrame(make_sales_order(rows))
+    assert util.dim_date(sales_orders) is not None
+
+    benchmark(rows, util.dim_date, sales_orders)
+
+
+def test_benchmark_extract_dates(benchmark, rows):
+    sales_orders = make_sales_order(rows)
+
+    benchmark(rows, util.extract_dates, sales_orders)
+
+
+def test_benchmark_iter_json_records(benchmark, rows):
+    body = json.dumps(make_sales_order(rows)).encode()
+
+    def parse():
+        for _ in util.iter_json_records(BytesIO(body), 50_000):
+            pass
+
+    benchmark(rows, parse)
+
+
+def test_benchmark_records_to_table(benchmark, rows):
+    sales_orders = make_sales_order(rows)
+    chunks = [
+        sales_orders[start:start + 50_000]
+        for start in range(0, rows, 50_000)
+    ]
+
+    benchmark(rows, util.records_to_table, chunks)
+
+
+def test_benchmark_row_hashes(benchmark, rows):
+    locations = util.transform_dim_location(make_address(rows))
+
+    benchmark(rows, util.row_hashes, locations, "location_id")
+
+
+def test_benchmark_partition_values(benchmark, rows):
+    fact = util.transform_fact_sales_order(make_sales_order(rows))
+
+    benchmark(rows, util.partition_values, fact, "created_date")
+
+
+def test_benchmark_write_parquet(benchmark, rows):
+    fact = util.transform_fact_sales_order(make_sales_order(rows))
+
+    benchmark(
+        rows, lambda: util.write_parquet("fact_sales_order", fact, BytesIO())
+    )
+
+
+def test_benchmark_save_transformed_data(benchmark, rows, processed_bucket):
+    # Includes the in-memory moto S3 round trip
+    fact = util.transform_fact_sales_order(make_sales_order(rows))
+
+    with patch("src.transformation.transformation.METRICS_ENABLED", False):
+        benchmark(
+            rows,
+            util.save_transformed_data,
+            "fact_sales_order",
+            fact,
+            processed_bucket,
+        )
@@ -97,6 +97,17 @@ def mock_s3_client():
         yield s3_client
 
 
+@pytest.fixture
+def processed_bucket(mock_s3_client):
+    """Creates the processed bucket in mocked S3, returning its name."""
+    bucket = "test-processed-bucket"
+    mock_s3_client.create_bucket(
+        Bucket=bucket,
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+    )
+    return bucket
+
+
 @pytest.fixture
 def sample_table_data():
     # Samples data
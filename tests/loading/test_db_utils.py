@@ -2,6 +2,12 @@ from src.loading.loading_utils import (
     retrieve_db_credentials,
     connect_to_db,
     load_data_into_warehouse,
+    frame_to_csv,
+    batch_size,
+    insert_rows,
+    load_data_concurrently,
+    read_load_ledger,
+    migrate_scd2_dimension,
 )
 import pytest
 from moto import mock_aws
@@ -9,8 +15,10 @@ import boto3
 import json
 import os
 from botocore.exceptions import ClientError
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 import pandas as pd
+from datetime import date, time
+from decimal import Decimal
 
 
 @pytest.fixture(scope="function")
@@ -160,6 +168,7 @@ class TestConnectToDb:
 
 
 class TestLoadDataIntoWarehouse:
+    @patch("src.loading.loading_utils.COPY_ENABLED", False)
     @patch("src.loading.loading_utils.Connection")
     def test_successfully_loads_data_into_warehouse(
         self, mock_pg_connect, mock_tables_data_frames, caplog
@@ -170,41 +179,43 @@ class TestLoadDataIntoWarehouse:
 
         mock_conn = mock_pg_connect.return_value
 
-        mock_conn.run.side_effect = [
-            None,
-            [
-                (100, 10, 15.25),
-            ],
-            None,
-        ]
+        mock_conn.row_count = 1
 
         expected_dimension_query = normalise_query(
             """
-            INSERT INTO "dim_staff" ("staff_id", "first_name", "last_name")
-            VALUES (%s, %s, %s)
+            INSERT INTO "dim_staff" AS target
+                ("staff_id", "first_name", "last_name")
+            VALUES (:p0, :p1, :p2), (:p3, :p4, :p5)
             ON CONFLICT ("staff_id") DO UPDATE
             SET "first_name" = EXCLUDED."first_name",
-                "last_name" = EXCLUDED."last_name";
+                "last_name" = EXCLUDED."last_name"
+            WHERE (target."first_name", target."last_name")
+                IS DISTINCT FROM (EXCLUDED."first_name", EXCLUDED."last_name")
+            RETURNING (target.xmax = 0);
         """
         )
 
-        expected_fact_query = normalise_query(
+        expected_stage_query = normalise_query(
             """
-            INSERT INTO "fact_sales_order"
+            INSERT INTO "stage_fact_sales_order"
                 ("sales_order_id", "units_sold", "unit_price")
-            VALUES (%s, %s, %s);
+            VALUES (:p0, :p1, :p2), (:p3, :p4, :p5);
         """
         )
         # Act
         results = load_data_into_warehouse(mock_conn, mock_tables_data_frames)
 
-        calls = mock_conn.run.call_args_list
+        prepared = mock_conn.prepare
         executed_queries = [
-            (
-                normalise_query(call.kwargs["sql"]),
-                call.kwargs.get("params", []),
+            (normalise_query(prepare_call.args[0]), run_call.kwargs)
+            for prepare_call, run_call in zip(
+                prepared.call_args_list,
+                prepared.return_value.run.call_args_list,
             )
-            for call in calls
+        ]
+        run_queries = [
+            normalise_query(call.kwargs["sql"])
+            for call in mock_conn.run.call_args_list
         ]
         # Assert
         assert results["successfully_loaded"] == [
@@ -223,18 +234,32 @@ class TestLoadDataIntoWarehouse:
 
         assert (
             expected_dimension_query,
-            [
-                (1, "North", "Coder"),
-                (2, "Pipeline", "Pioneer"),
-            ],
+            {
+                "p0": 1,
+                "p1": "North",
+                "p2": "Coder",
+                "p3": 2,
+                "p4": "Pipeline",
+                "p5": "Pioneer",
+            },
         ) in executed_queries
 
         assert (
-            expected_fact_query,
-            [
-                (101, 30, 42.30),
-            ],
+            expected_stage_query,
+            {
+                "p0": 100,
+                "p1": 10,
+                "p2": 15.25,
+                "p3": 101,
+                "p4": 30,
+                "p5": 42.30,
+            },
         ) in executed_queries
+        assert prepared.return_value.close.call_count == 2
+        assert not any(
+            query.startswith('SELECT "sales_order_id"')
+            for query in run_queries
+        )
 
     @patch("src.loading.loading_utils.Connection")
     def test_handles_exceptions(
@@ -253,3 +278,559 @@ class TestLoadDataIntoWarehouse:
 
         assert "Error loading data into 'dim_staff'" in caplog.text
         assert "Error loading data into 'fact_sales_order" in caplog.text
+
+
+class TestLoadScd2Dimension:
+    @patch("src.loading.loading_utils.Connection")
+    def test_closes_changed_versions_and_inserts_new_ones(
+        self, mock_pg_connect, caplog
+    ):
+        # Arrange
+        mock_conn = mock_pg_connect.return_value
+        tables_data_frames = {
+            "dim_staff": pd.DataFrame(
+                {
+                    "staff_id": [1],
+                    "first_name": ["North"],
+                    "valid_from": [pd.Timestamp("2024-11-20 09:30")],
+                    "valid_to": [pd.NaT],
+                    "is_current": [True],
+                }
+            )
+        }
+        # Act
+        results = load_data_into_warehouse(mock_conn, tables_data_frames)
+
+        queries = [
+            (" ").join(call.kwargs["sql"].split())
+            for call in mock_conn.run.call_args_list
+        ]
+        # Assert
+        assert results["successfully_loaded"] == ["dim_staff"]
+        assert queries[0] == "START TRANSACTION;"
+        # Already migrated, the surrogate key column exists
+        assert "information_schema.columns" in queries[1]
+        assert queries[2].startswith('CREATE TEMP TABLE "stage_dim_staff"')
+        assert queries[4].startswith(
+            'UPDATE "dim_staff" AS target SET "valid_to" = stage."valid_from"'
+        )
+        assert (
+            '(target."first_name") IS DISTINCT FROM (stage."first_name")'
+            in queries[4]
+        )
+        assert queries[5].startswith('INSERT INTO "dim_staff"')
+        assert 'WHERE target."staff_id" IS NULL' in queries[5]
+        assert queries[6] == "COMMIT;"
+        assert not any("ON CONFLICT" in query for query in queries)
+        assert "Successfully loaded 1 version(s) into 'dim_staff'" in (
+            caplog.text
+        )
+
+    @patch("src.loading.loading_utils.Connection")
+    def test_dedupes_natural_keys_within_a_chunk(self, mock_pg_connect):
+        # Arrange
+        mock_conn = mock_pg_connect.return_value
+        tables_data_frames = {
+            "dim_staff": pd.DataFrame(
+                {
+                    "staff_id": [1, 1],
+                    "first_name": ["North", "South"],
+                    "is_current": [True, True],
+                }
+            )
+        }
+        # Act
+        with patch("src.loading.loading_utils.stage_rows") as mock_stage:
+            results = load_data_into_warehouse(mock_conn, tables_data_frames)
+        # Assert
+        assert results["successfully_loaded"] == ["dim_staff"]
+        staged = mock_stage.call_args.args[2]
+        assert staged["first_name"].tolist() == ["South"]
+
+    @patch("src.loading.loading_utils.Connection")
+    def test_fails_without_surrogate_key(self, mock_pg_connect, caplog):
+        # Arrange
+        mock_conn = mock_pg_connect.return_value
+        mock_conn.run.side_effect = lambda sql, **params: (
+            [] if "information_schema.columns" in sql else MagicMock()
+        )
+        tables_data_frames = {
+            "dim_staff": pd.DataFrame({"staff_id": [1], "is_current": [True]})
+        }
+        # Act
+        results = load_data_into_warehouse(mock_conn, tables_data_frames)
+
+        queries = [call.kwargs["sql"] for call in mock_conn.run.call_args_list]
+        # Assert
+        assert results["failed_to_load"] == ["dim_staff"]
+        assert not any("ALTER TABLE" in query for query in queries)
+        assert queries[-1] == "ROLLBACK;"
+        assert (
+            "'dim_staff' has no surrogate key 'staff_key', run "
+            "'make migrate-scd2 TABLES=dim_staff' first." in caplog.text
+        )
+
+    @patch("src.loading.loading_utils.Connection")
+    def test_rolls_back_on_error(self, mock_pg_connect, caplog):
+        # Arrange
+        mock_conn = mock_pg_connect.return_value
+        mock_conn.run.side_effect = [None, Exception("SQL failed"), None]
+        tables_data_frames = {
+            "dim_staff": pd.DataFrame(
+                {"staff_id": [1], "is_current": [True]}
+            )
+        }
+        # Act
+        results = load_data_into_warehouse(mock_conn, tables_data_frames)
+        # Assert
+        assert results["failed_to_load"] == ["dim_staff"]
+        last_query = mock_conn.run.call_args_list[-1].kwargs["sql"]
+        assert last_query == "ROLLBACK;"
+
+
+class TestMigrateScd2Dimension:
+    @staticmethod
+    def connection(migrated=False, foreign_keys=()):
+        conn = MagicMock()
+
+        def run(sql, **params):
+            if "information_schema.columns" in sql:
+                assert params["column_name"] == "staff_key"
+                return [[1]] if migrated else []
+            if "contype = 'f'" in sql:
+                return list(foreign_keys)
+            if "contype = 'p'" in sql:
+                return [["dim_staff_pkey"]]
+            return None
+
+        conn.run.side_effect = run
+        return conn
+
+    @staticmethod
+    def queries(conn):
+        return [
+            (" ").join(call.kwargs["sql"].split())
+            for call in conn.run.call_args_list
+        ]
+
+    def test_migrates_dimension_to_surrogate_key(self, caplog):
+        # Arrange
+        conn = self.connection()
+        # Act
+        migrated = migrate_scd2_dimension(conn, "dim_staff")
+
+        queries = self.queries(conn)
+        # Assert
+        assert migrated
+        assert queries[0] == "START TRANSACTION;"
+        assert queries[3].startswith('ALTER TABLE "dim_staff" ADD COLUMN')
+        assert (
+            'ADD COLUMN "staff_key" BIGINT GENERATED ALWAYS AS IDENTITY'
+            in queries[3]
+        )
+        assert queries[5] == (
+            'ALTER TABLE "dim_staff" DROP CONSTRAINT "dim_staff_pkey";'
+        )
+        assert queries[6] == (
+            'ALTER TABLE "dim_staff" ADD PRIMARY KEY ("staff_key");'
+        )
+        assert queries[7] == (
+            'CREATE UNIQUE INDEX IF NOT EXISTS "dim_staff_current_version" '
+            'ON "dim_staff" ("staff_id") WHERE "is_current";'
+        )
+        assert queries[8] == "COMMIT;"
+        assert not any("CASCADE" in query for query in queries)
+        assert "Migrated 'dim_staff' to type 2 with key 'staff_key'" in (
+            caplog.text
+        )
+
+    def test_skips_migrated_dimension(self):
+        # Arrange
+        conn = self.connection(migrated=True)
+        # Act
+        migrated = migrate_scd2_dimension(conn, "dim_staff")
+        # Assert
+        assert not migrated
+        assert self.queries(conn)[-1] == "ROLLBACK;"
+        assert not any("ALTER" in query for query in self.queries(conn))
+
+    def test_refuses_to_drop_foreign_keys(self):
+        # Arrange
+        conn = self.connection(
+            foreign_keys=[["fact_sales_order", "fact_sales_order_staff_fk"]]
+        )
+        # Act
+        with pytest.raises(ValueError, match="fact_sales_order_staff_fk"):
+            migrate_scd2_dimension(conn, "dim_staff")
+        # Assert
+        assert self.queries(conn)[-1] == "ROLLBACK;"
+        assert not any("ALTER" in query for query in self.queries(conn))
+
+    def test_drops_foreign_keys_when_asked(self, caplog):
+        # Arrange
+        conn = self.connection(
+            foreign_keys=[["fact_sales_order", "fact_sales_order_staff_fk"]]
+        )
+        # Act
+        migrate_scd2_dimension(conn, "dim_staff", drop_foreign_keys=True)
+        # Assert
+        assert (
+            "ALTER TABLE fact_sales_order DROP CONSTRAINT "
+            '"fact_sales_order_staff_fk";'
+        ) in self.queries(conn)
+        assert "Dropped foreign key fact_sales_order_staff_fk" in (
+            caplog.text
+        )
+        assert self.queries(conn)[-1] == "COMMIT;"
+
+
+class TestLoadFactTable:
+    @patch("src.loading.loading_utils.Connection")
+    def test_inserts_only_rows_missing_from_the_fact_table(
+        self, mock_pg_connect, mock_tables_data_frames, caplog
+    ):
+        # Arrange
+        mock_conn = mock_pg_connect.return_value
+        mock_conn.row_count = 0
+        tables_data_frames = {
+            "fact_sales_order": mock_tables_data_frames["fact_sales_order"]
+        }
+        # Act
+        results = load_data_into_warehouse(mock_conn, tables_data_frames)
+
+        queries = [
+            (" ").join(call.kwargs["sql"].split())
+            for call in mock_conn.run.call_args_list
+        ]
+        # Assert
+        assert results["successfully_loaded"] == ["fact_sales_order"]
+        assert queries[0] == "START TRANSACTION;"
+        assert queries[1] == (
+            'CREATE TEMP TABLE "stage_fact_sales_order" ON COMMIT DROP AS '
+            'SELECT "sales_order_id", "units_sold", "unit_price" '
+            'FROM "fact_sales_order" WITH NO DATA;'
+        )
+        assert queries[2].startswith('COPY "stage_fact_sales_order"')
+        assert queries[3].startswith(
+            'INSERT INTO "fact_sales_order" '
+            '("sales_order_id", "units_sold", "unit_price") SELECT DISTINCT'
+        )
+        assert (
+            'WHERE target."sales_order_id" = stage."sales_order_id" AND '
+            'target."units_sold" IS NOT DISTINCT FROM stage."units_sold"'
+            in queries[3]
+        )
+        assert queries[4] == "COMMIT;"
+        assert "No new rows to insert into 'fact_sales_order'" in caplog.text
+
+    @patch("src.loading.loading_utils.Connection")
+    def test_rolls_back_on_error(
+        self, mock_pg_connect, mock_tables_data_frames
+    ):
+        # Arrange
+        mock_conn = mock_pg_connect.return_value
+        mock_conn.run.side_effect = [None, None, Exception("SQL failed"), None]
+        tables_data_frames = {
+            "fact_sales_order": mock_tables_data_frames["fact_sales_order"]
+        }
+        # Act
+        results = load_data_into_warehouse(mock_conn, tables_data_frames)
+        # Assert
+        assert results["failed_to_load"] == ["fact_sales_order"]
+        last_query = mock_conn.run.call_args_list[-1].kwargs["sql"]
+        assert last_query == "ROLLBACK;"
+
+
+class TestCopyBulkLoad:
+    @patch("src.loading.loading_utils.Connection")
+    def test_copies_dimension_into_stage_and_upserts(
+        self, mock_pg_connect, mock_tables_data_frames, caplog
+    ):
+        # Arrange
+        mock_conn = mock_pg_connect.return_value
+        tables_data_frames = {
+            "dim_staff": pd.DataFrame(
+                {
+                    "staff_id": [1, 2, 1],
+                    "first_name": ["North", "Pipeline", "South"],
+                    "last_name": ["Coder", None, "Coder"],
+                }
+            )
+        }
+        # Act
+        results = load_data_into_warehouse(mock_conn, tables_data_frames)
+
+        calls = mock_conn.run.call_args_list
+        queries = [(" ").join(call.kwargs["sql"].split()) for call in calls]
+        # Assert
+        assert results["successfully_loaded"] == ["dim_staff"]
+        assert queries[0] == "START TRANSACTION;"
+        assert queries[1].startswith('CREATE TEMP TABLE "stage_dim_staff"')
+        assert queries[2] == (
+            'COPY "stage_dim_staff" ("staff_id", "first_name", "last_name") '
+            "FROM STDIN WITH (FORMAT csv);"
+        )
+        assert calls[2].kwargs["stream"].read() == (
+            b'2,"Pipeline",\n1,"South","Coder"\n'
+        )
+        assert queries[3] == (
+            'INSERT INTO "dim_staff" AS target '
+            '("staff_id", "first_name", "last_name") '
+            'SELECT "staff_id", "first_name", "last_name" '
+            'FROM "stage_dim_staff" ON CONFLICT ("staff_id") DO UPDATE '
+            'SET "first_name" = EXCLUDED."first_name", '
+            '"last_name" = EXCLUDED."last_name" '
+            'WHERE (target."first_name", target."last_name") '
+            'IS DISTINCT FROM (EXCLUDED."first_name", EXCLUDED."last_name") '
+            "RETURNING (target.xmax = 0);"
+        )
+        assert queries[4] == "COMMIT;"
+        assert not any("params" in call.kwargs for call in calls)
+        assert "Successfully loaded data into 'dim_staff'" in caplog.text
+
+    def test_frame_to_csv_encodes_columns_for_postgres(self):
+        # Arrange
+        df = pd.DataFrame(
+            {
+                "sales_order_id": [100.0, None],
+                "unit_price": [Decimal("15.25"), Decimal("42.00")],
+                "agreed_delivery_location": ["", 'Leeds "North"'],
+                "agreed_delivery_date": [date(2024, 11, 20), None],
+                "created_time": [time(9, 30), None],
+                "is_current": [True, None],
+                "mixed": [1, "a"],
+            }
+        )
+        # Act
+        csv = frame_to_csv(df).read()
+        # Assert
+        assert csv == (
+            b'100,15.25,"",2024-11-20,09:30:00.000000,true,"1"\n'
+            b',42.00,"Leeds ""North""",,,,"a"\n'
+        )
+
+    def test_frame_to_csv_writes_large_whole_floats_as_integers(self):
+        # Arrange
+        df = pd.DataFrame(
+            {"counterparty_ac_number": [12345678901.0, None], "rate": [1.5, 2]}
+        )
+        # Act
+        csv = frame_to_csv(df).read()
+        # Assert
+        assert csv == b"12345678901,1.5\n,2\n"
+
+
+class TestBatchedInserts:
+    @patch("src.loading.loading_utils.MAX_BIND_PARAMETERS", 6)
+    def test_batches_stay_under_the_parameter_limit(self):
+        # Arrange
+        df = pd.DataFrame({"a": range(5), "b": range(5), "c": range(5)})
+        # Act
+        size = batch_size(df)
+        # Assert
+        assert size == 2
+
+    @patch("src.loading.loading_utils.INSERT_BATCH_BYTES", 100)
+    def test_batches_stay_under_the_byte_budget(self):
+        # Arrange
+        df = pd.DataFrame({"a": range(100), "b": range(100)})
+        # Act
+        size = batch_size(df)
+        # Assert
+        assert size == 6
+
+    @patch("src.loading.loading_utils.MAX_BIND_PARAMETERS", 4)
+    @patch("src.loading.loading_utils.Connection")
+    def test_reuses_prepared_statement_per_batch_size(
+        self, mock_pg_connect, caplog
+    ):
+        # Arrange
+        mock_conn = mock_pg_connect.return_value
+        df = pd.DataFrame(
+            {"staff_id": [1, 2, 3, 4, 5], "email": ["a", "b", None, "d", "e"]}
+        )
+        # Act
+        batches = insert_rows(mock_conn, "stage_dim_staff", df)
+
+        prepared = mock_conn.prepare
+        runs = prepared.return_value.run.call_args_list
+        # Assert
+        assert len(batches) == 3
+        assert [call.args[0] for call in prepared.call_args_list] == [
+            'INSERT INTO "stage_dim_staff" ("staff_id", "email") '
+            "VALUES (:p0, :p1), (:p2, :p3);",
+            'INSERT INTO "stage_dim_staff" ("staff_id", "email") '
+            "VALUES (:p0, :p1);",
+        ]
+        assert runs[1].kwargs == {"p0": 3, "p1": None, "p2": 4, "p3": "d"}
+        assert runs[2].kwargs == {"p0": 5, "p1": "e"}
+        assert prepared.return_value.close.call_count == 2
+        assert (
+            "Wrote 5 row(s) to 'stage_dim_staff' in 3 batch(es) of up to 2"
+            in caplog.text
+        )
+
+
+class TestLoadDataConcurrently:
+    @patch("src.loading.loading_utils.load_data_into_warehouse")
+    def test_loads_dimensions_before_facts_on_pooled_connections(
+        self, mock_load_data
+    ):
+        # Arrange
+        loaded = []
+
+        def load(conn, tables_data_frames):
+            loaded.extend(tables_data_frames)
+            return {"successfully_loaded": list(tables_data_frames)}
+
+        mock_load_data.side_effect = load
+        connect = MagicMock(side_effect=lambda: MagicMock())
+        tables_data_frames = {
+            "fact_sales_order": pd.DataFrame({"sales_order_id": [1]}),
+            "dim_staff": pd.DataFrame({"staff_id": [1]}),
+            "dim_currency": pd.DataFrame({"currency_id": [1]}),
+            "fact_payment": pd.DataFrame({"payment_id": [1]}),
+        }
+        # Act
+        results = load_data_concurrently(
+            connect, tables_data_frames, workers=2
+        )
+        # Assert
+        assert sorted(loaded[:2]) == ["dim_currency", "dim_staff"]
+        assert sorted(loaded[2:]) == ["fact_payment", "fact_sales_order"]
+        assert results["successfully_loaded"] == [
+            "dim_staff",
+            "dim_currency",
+            "fact_sales_order",
+            "fact_payment",
+        ]
+        assert 1 <= connect.call_count <= 2
+        for call in mock_load_data.call_args_list:
+            assert len(call.args[1]) == 1
+        for conn in {call.args[0] for call in mock_load_data.call_args_list}:
+            conn.close.assert_called_once()
+
+    def test_reports_tables_whose_connection_fails(self, caplog):
+        # Arrange
+        connect = MagicMock(side_effect=Exception("Connection failed"))
+        tables_data_frames = {
+            "dim_staff": pd.DataFrame({"staff_id": [1]}),
+            "dim_location": pd.DataFrame({"location_id": [1]}),
+        }
+        # Act
+        results = load_data_concurrently(connect, tables_data_frames)
+        # Assert
+        assert results["successfully_loaded"] == []
+        assert results["failed_to_load"] == ["dim_staff", "dim_location"]
+        assert "Error loading data into 'dim_staff'" in caplog.text
+
+
+class TestLoadLedger:
+    def test_reads_loaded_files_from_the_ledger(self):
+        # Arrange
+        conn = MagicMock()
+        conn.run.side_effect = [None, [("s3://bucket/a.parquet", '"etag-a"')]]
+        file_paths = ["s3://bucket/a.parquet", "s3://bucket/b.parquet"]
+        # Act
+        loaded_files = read_load_ledger(lambda: conn, file_paths)
+        # Assert
+        assert loaded_files == {"s3://bucket/a.parquet": '"etag-a"'}
+        create_query = (" ").join(
+            conn.run.call_args_list[0].kwargs["sql"].split()
+        )
+        assert create_query.startswith(
+            'CREATE TABLE IF NOT EXISTS "load_ledger"'
+        )
+        assert conn.run.call_args_list[1].kwargs["uris"] == file_paths
+        conn.close.assert_called_once()
+
+    def test_loads_everything_when_ledger_is_unavailable(self, caplog):
+        # Arrange
+        connect = MagicMock(side_effect=Exception("Connection failed"))
+        # Act
+        loaded_files = read_load_ledger(connect, ["s3://bucket/a.parquet"])
+        # Assert
+        assert loaded_files == {}
+        assert "Unable to read the load ledger" in caplog.text
+
+    @patch("src.loading.loading_utils.Connection")
+    def test_records_files_in_the_same_transaction_as_the_data(
+        self, mock_pg_connect, mock_tables_data_frames
+    ):
+        # Arrange
+        mock_conn = mock_pg_connect.return_value
+        mock_conn.row_count = 2
+        df = mock_tables_data_frames["fact_sales_order"]
+        df.attrs["files"] = [("s3://bucket/a.parquet", '"etag-a"', 2)]
+        # Act
+        results = load_data_into_warehouse(
+            mock_conn, {"fact_sales_order": df}
+        )
+
+        queries = [
+            (" ").join(call.kwargs["sql"].split())
+            for call in mock_conn.run.call_args_list
+        ]
+        prepared = mock_conn.prepare
+        # Assert
+        assert results["successfully_loaded"] == ["fact_sales_order"]
+        assert queries[0] == "START TRANSACTION;"
+        assert queries[-1] == "COMMIT;"
+        ledger_query = (" ").join(prepared.call_args.args[0].split())
+        assert ledger_query.startswith(
+            'INSERT INTO "load_ledger" ("uri", "etag", "row_count") '
+            "VALUES (:p0, :p1, :p2)"
+        )
+        prepared.return_value.run.assert_called_once_with(
+            p0="s3://bucket/a.parquet", p1='"etag-a"', p2=2
+        )
+
+
+class TestConditionalUpsert:
+    @patch("src.loading.loading_utils.Connection")
+    def test_reports_inserted_updated_and_unchanged_rows(
+        self, mock_pg_connect, caplog
+    ):
+        # Arrange
+        mock_conn = mock_pg_connect.return_value
+        mock_conn.run.side_effect = [
+            None,
+            None,
+            None,
+            [(True,), (False,)],
+            None,
+        ]
+        tables_data_frames = {
+            "dim_counterparty": pd.DataFrame(
+                {"counterparty_id": [1, 2, 3], "name": ["a", "b", "c"]}
+            )
+        }
+        # Act
+        results = load_data_into_warehouse(mock_conn, tables_data_frames)
+        # Assert
+        assert results["successfully_loaded"] == ["dim_counterparty"]
+        assert (
+            "Successfully loaded data into 'dim_counterparty': "
+            "1 inserted, 1 updated, 1 unchanged." in caplog.text
+        )
+
+    @patch("src.loading.loading_utils.COPY_ENABLED", False)
+    @patch("src.loading.loading_utils.Connection")
+    def test_key_only_dimension_skips_existing_rows(
+        self, mock_pg_connect, caplog
+    ):
+        # Arrange
+        mock_conn = mock_pg_connect.return_value
+        mock_conn.prepare.return_value.run.return_value = [(True,)]
+        tables_data_frames = {"dim_date": pd.DataFrame({"date_id": [1, 2]})}
+        # Act
+        load_data_into_warehouse(mock_conn, tables_data_frames)
+        # Assert
+        query = (" ").join(mock_conn.prepare.call_args.args[0].split())
+        assert query.endswith(
+            'ON CONFLICT ("date_id") DO NOTHING RETURNING TRUE;'
+        )
+        assert (
+            "Successfully loaded data into 'dim_date': "
+            "1 inserted, 0 updated, 1 unchanged." in caplog.text
+        )
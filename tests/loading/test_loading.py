@@ -80,7 +80,7 @@ class TestLambdaHandler:
     @patch("src.loading.loading.read_file_list")
     @patch("src.loading.loading.process_parquet_files")
     @patch("src.loading.loading.connect_to_db")
-    @patch("src.loading.loading.load_data_into_warehouse")
+    @patch("src.loading.loading.load_data_concurrently")
     def test_lambda_handler_loads_all_data_successfully(
         self,
         mock_load_data,
@@ -144,6 +144,30 @@ class TestLambdaHandler:
         assert result["message"] == "No files to process this time."
         assert "No files to process this time." in caplog.text
 
+    @patch("src.loading.loading.read_file_list")
+    @patch("src.loading.loading.read_load_ledger")
+    @patch("src.loading.loading.process_parquet_files")
+    def test_handles_all_files_already_loaded(
+        self,
+        mock_process_parquet,
+        mock_read_ledger,
+        mock_read_file,
+        mock_s3,
+        mock_processed_bucket,
+        caplog,
+    ):
+        # Arrange
+        file_path = f"s3://{mock_processed_bucket}/dim_staff/dim_staff.parquet"
+        mock_read_file.return_value = [file_path]
+        mock_read_ledger.return_value = {file_path: '"etag"'}
+        mock_process_parquet.return_value = {}
+        # Act
+        result = lambda_handler({}, None)
+        # Assert
+        assert result["status"] == "Success"
+        assert result["message"] == "All files have already been loaded."
+        assert mock_process_parquet.call_args.args[2] == {file_path: '"etag"'}
+
     @patch("src.loading.loading.read_file_list")
     @patch("src.loading.loading.process_parquet_files")
     def test_handles_no_data_frames(
@@ -171,7 +195,7 @@ class TestLambdaHandler:
     @patch("src.loading.loading.read_file_list")
     @patch("src.loading.loading.process_parquet_files")
     @patch("src.loading.loading.connect_to_db")
-    @patch("src.loading.loading.load_data_into_warehouse")
+    @patch("src.loading.loading.load_data_concurrently")
     def test_handles_partial_success(
         self,
         mock_load_data,
@@ -219,7 +243,7 @@ class TestLambdaHandler:
     @patch("src.loading.loading.read_file_list")
     @patch("src.loading.loading.process_parquet_files")
     @patch("src.loading.loading.connect_to_db")
-    @patch("src.loading.loading.load_data_into_warehouse")
+    @patch("src.loading.loading.load_data_concurrently")
     def test_handles_full_failure_in_warehouse_loading(
         self,
         mock_load_data,
@@ -265,3 +289,28 @@ class TestLambdaHandler:
             == "Lambda execution failed. Check logs for details."
         )
         assert "Lambda execution failed" in caplog.text
+
+    @patch("src.loading.loading.read_file_list")
+    def test_reads_manifest_from_s3_event(self, mock_read_file):
+        # Arrange
+        mock_read_file.return_value = []
+        event = {
+            "Records": [
+                {
+                    "s3": {
+                        "bucket": {"name": "processed-bucket"},
+                        "object": {
+                            "key": "manifests/20241120000000-abc.json"
+                        },
+                    }
+                }
+            ]
+        }
+        # Act
+        result = lambda_handler(event, None)
+        # Assert
+        assert result["status"] == "Success"
+        assert mock_read_file.call_args.args[1:] == (
+            "processed-bucket",
+            "manifests/20241120000000-abc.json",
+        )
@@ -0,0 +1,15 @@
+from src.loading.migrations import main
+from unittest.mock import patch
+
+
+@patch("src.loading.migrations.migrate_scd2_dimension")
+@patch("src.loading.migrations.connect_to_db")
+def test_main_migrates_each_dimension(mock_connect, mock_migrate):
+    main(["dim_staff", "dim_location", "--drop-foreign-keys"])
+
+    conn = mock_connect.return_value
+    assert [call.args for call in mock_migrate.call_args_list] == [
+        (conn, "dim_staff", True),
+        (conn, "dim_location", True),
+    ]
+    conn.close.assert_called_once()
@@ -1,4 +1,9 @@
-from src.loading.loading_utils import read_file_list, process_parquet_files
+from src.loading.loading_utils import (
+    read_file_list,
+    process_parquet_files,
+    list_table_files,
+    stream_tables_into_warehouse,
+)
 import pytest
 from moto import mock_aws
 import boto3
@@ -7,6 +12,8 @@ import os
 from botocore.exceptions import ClientError
 import pandas as pd
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
 
 
 @pytest.fixture(scope="function")
@@ -197,3 +204,265 @@ class TestProcessParquetFiles:
         # Assert
         assert len(tables_data_frames) == 0
         assert "Error processing file" in caplog.text
+
+    @patch("src.loading.loading_utils.DOWNLOAD_WORKERS", 2)
+    @patch(
+        "src.loading.loading_utils.ThreadPoolExecutor",
+        wraps=ThreadPoolExecutor,
+    )
+    def test_downloads_concurrently_and_reports_each_failure(
+        self, mock_executor, mock_s3, mock_processed_bucket, caplog
+    ):
+        # Arrange
+        file_paths = []
+        for number in range(3):
+            key = f"processed/table1/file{number}.parquet"
+            buffer = BytesIO()
+            pd.DataFrame({"col1": [number]}).to_parquet(buffer, index=False)
+            mock_s3.put_object(
+                Bucket=mock_processed_bucket, Key=key, Body=buffer.getvalue()
+            )
+            file_paths.append(f"s3://{mock_processed_bucket}/{key}")
+        missing_path = (
+            f"s3://{mock_processed_bucket}/processed/table2/missing.parquet"
+        )
+        file_paths.insert(1, missing_path)
+        # Act
+        tables_data_frames = process_parquet_files(mock_s3, file_paths)
+        # Assert
+        mock_executor.assert_called_once_with(max_workers=2)
+        assert list(tables_data_frames) == ["table1"]
+        assert tables_data_frames["table1"]["col1"].tolist() == [0, 1, 2]
+        assert (
+            f"Error accessing Parquet file from S3: {missing_path}"
+            in caplog.text
+        )
+
+    def test_merges_dimension_files_with_latest_row_winning(
+        self, mock_s3, mock_processed_bucket
+    ):
+        # Arrange
+        files = {
+            "processed/dim_staff/20241121093000-"
+            "0123456789abcdef0123456789abcdef.parquet": pd.DataFrame(
+                {
+                    "staff_id": [1, 3],
+                    "first_name": ["Newer", "Third"],
+                    "email_address": ["new@example.com", None],
+                }
+            ),
+            "processed/dim_staff/20241120093000.parquet": pd.DataFrame(
+                {"staff_id": [1, 2], "first_name": ["Older", "Second"]}
+            ),
+        }
+        for key, df in files.items():
+            buffer = BytesIO()
+            df.to_parquet(buffer, index=False)
+            mock_s3.put_object(
+                Bucket=mock_processed_bucket, Key=key, Body=buffer.getvalue()
+            )
+        file_paths = [f"s3://{mock_processed_bucket}/{key}" for key in files]
+        # Act
+        tables_data_frames = process_parquet_files(mock_s3, file_paths)
+        # Assert
+        pd.testing.assert_frame_equal(
+            tables_data_frames["dim_staff"],
+            pd.DataFrame(
+                {
+                    "staff_id": [2, 1, 3],
+                    "first_name": ["Second", "Newer", "Third"],
+                    "email_address": [None, "new@example.com", None],
+                }
+            ),
+        )
+
+    def test_appends_fact_files_in_timestamp_order(
+        self, mock_s3, mock_processed_bucket
+    ):
+        # Arrange
+        prefix = "processed/fact_sales_order"
+        files = {
+            f"{prefix}/created_date=2024-11-21/20241121093000.parquet": (
+                pd.DataFrame({"sales_order_id": [3], "units_sold": [1.5]})
+            ),
+            f"{prefix}/created_date=2024-11-20/20241120093000.parquet": (
+                pd.DataFrame({"sales_order_id": [1, 1], "units_sold": [1, 2]})
+            ),
+        }
+        for key, df in files.items():
+            buffer = BytesIO()
+            df.to_parquet(buffer, index=False)
+            mock_s3.put_object(
+                Bucket=mock_processed_bucket, Key=key, Body=buffer.getvalue()
+            )
+        file_paths = [f"s3://{mock_processed_bucket}/{key}" for key in files]
+        # Act
+        tables_data_frames = process_parquet_files(mock_s3, file_paths)
+        # Assert
+        fact = tables_data_frames["fact_sales_order"]
+        assert fact["sales_order_id"].tolist() == [1, 1, 3]
+        assert fact["units_sold"].tolist() == [1.0, 2.0, 1.5]
+
+    def test_skips_files_already_in_the_load_ledger(
+        self, mock_s3, mock_processed_bucket, caplog
+    ):
+        # Arrange
+        file_paths = []
+        etags = {}
+        for number in range(2):
+            key = f"processed/table1/2024112100000{number}.parquet"
+            buffer = BytesIO()
+            pd.DataFrame({"col1": [number]}).to_parquet(buffer, index=False)
+            response = mock_s3.put_object(
+                Bucket=mock_processed_bucket, Key=key, Body=buffer.getvalue()
+            )
+            file_path = f"s3://{mock_processed_bucket}/{key}"
+            file_paths.append(file_path)
+            etags[file_path] = response["ETag"]
+        loaded_files = {
+            file_paths[0]: etags[file_paths[0]],
+            file_paths[1]: '"changed-since-loaded"',
+        }
+        # Act
+        tables_data_frames = process_parquet_files(
+            mock_s3, file_paths, loaded_files
+        )
+        # Assert
+        df = tables_data_frames["table1"]
+        assert df["col1"].tolist() == [1]
+        assert df.attrs["files"] == [(file_paths[1], etags[file_paths[1]], 1)]
+        assert f"Skipping already loaded file: {file_paths[0]}" in (
+            caplog.text
+        )
+
+
+class TestStreamTablesIntoWarehouse:
+    def put_parquet(self, mock_s3, bucket, key, df):
+        buffer = BytesIO()
+        df.to_parquet(buffer, index=False, row_group_size=2)
+        return mock_s3.put_object(
+            Bucket=bucket, Key=key, Body=buffer.getvalue()
+        )["ETag"]
+
+    def test_lists_table_files_oldest_first_skipping_loaded(
+        self, mock_s3, mock_processed_bucket, caplog
+    ):
+        # Arrange
+        prefix = f"s3://{mock_processed_bucket}/processed/fact_sales_order"
+        etags = {}
+        for timestamp in ["20241121000000", "20241120000000"]:
+            etags[timestamp] = self.put_parquet(
+                mock_s3,
+                mock_processed_bucket,
+                f"processed/fact_sales_order/{timestamp}.parquet",
+                pd.DataFrame({"sales_order_id": [1]}),
+            )
+        dim_etag = self.put_parquet(
+            mock_s3,
+            mock_processed_bucket,
+            "processed/dim_staff/20241120000000.parquet",
+            pd.DataFrame({"staff_id": [1]}),
+        )
+        file_paths = [
+            f"{prefix}/20241121000000.parquet",
+            f"{prefix}/20241120000000.parquet",
+            f"s3://{mock_processed_bucket}/processed/dim_staff/"
+            "20241120000000.parquet",
+            f"{prefix}/missing.parquet",
+        ]
+        loaded_files = {file_paths[2]: dim_etag}
+        # Act
+        table_files = list_table_files(mock_s3, file_paths, loaded_files)
+        # Assert
+        assert table_files == {
+            "fact_sales_order": [
+                (file_paths[1], etags["20241120000000"]),
+                (file_paths[0], etags["20241121000000"]),
+            ]
+        }
+        assert f"Skipping already loaded file: {file_paths[2]}" in (
+            caplog.text
+        )
+        assert f"Error accessing Parquet file from S3: {file_paths[3]}" in (
+            caplog.text
+        )
+
+    @patch("src.loading.loading_utils.LOAD_BATCH_ROWS", 2)
+    def test_loads_row_groups_in_batches(
+        self, mock_s3, mock_processed_bucket
+    ):
+        # Arrange
+        prefix = "processed/fact_sales_order"
+        old_etag = self.put_parquet(
+            mock_s3,
+            mock_processed_bucket,
+            f"{prefix}/20241120000000.parquet",
+            pd.DataFrame({"sales_order_id": [1, 2, 3]}),
+        )
+        new_etag = self.put_parquet(
+            mock_s3,
+            mock_processed_bucket,
+            f"{prefix}/20241121000000.parquet",
+            pd.DataFrame({"sales_order_id": [4], "units_sold": [10]}),
+        )
+        uri = f"s3://{mock_processed_bucket}/{prefix}"
+        table_files = {
+            "fact_sales_order": [
+                (f"{uri}/20241120000000.parquet", old_etag),
+                (f"{uri}/20241121000000.parquet", new_etag),
+            ]
+        }
+        conn = MagicMock()
+        conn.row_count = 1
+        # Act
+        results = stream_tables_into_warehouse(mock_s3, conn, table_files)
+
+        calls = conn.run.call_args_list
+        queries = [(" ").join(call.kwargs["sql"].split()) for call in calls]
+        copied = [
+            call.kwargs["stream"].read()
+            for call in calls
+            if "stream" in call.kwargs
+        ]
+        # Assert
+        assert results["successfully_loaded"] == ["fact_sales_order"]
+        assert copied == [b"1,\n2,\n", b"3,\n", b"4,10\n"]
+        assert queries.count('TRUNCATE "stage_fact_sales_order";') == 2
+        assert queries[1].startswith(
+            'CREATE TEMP TABLE "stage_fact_sales_order" ON COMMIT DROP AS '
+            'SELECT "sales_order_id", "units_sold"'
+        )
+        assert queries[-1] == "COMMIT;"
+        ledger_run = conn.prepare.return_value.run
+        ledger_run.assert_called_once_with(
+            p0=f"{uri}/20241120000000.parquet",
+            p1=old_etag,
+            p2=3,
+            p3=f"{uri}/20241121000000.parquet",
+            p4=new_etag,
+            p5=1,
+        )
+
+    def test_fails_table_when_file_changed_after_listing(
+        self, mock_s3, mock_processed_bucket, caplog
+    ):
+        # Arrange
+        key = "processed/dim_staff/20241120000000.parquet"
+        self.put_parquet(
+            mock_s3,
+            mock_processed_bucket,
+            key,
+            pd.DataFrame({"staff_id": [1]}),
+        )
+        table_files = {
+            "dim_staff": [
+                (f"s3://{mock_processed_bucket}/{key}", '"stale-etag"')
+            ]
+        }
+        conn = MagicMock()
+        # Act
+        results = stream_tables_into_warehouse(mock_s3, conn, table_files)
+        # Assert
+        assert results["failed_to_load"] == ["dim_staff"]
+        assert "Error loading data into 'dim_staff'" in caplog.text
+        conn.run.assert_not_called()
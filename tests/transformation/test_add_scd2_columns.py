@@ -0,0 +1,23 @@
+from src.transformation.transformationutil import add_scd2_columns
+from datetime import datetime
+import pandas as pd
+
+
+def test_add_scd2_columns_marks_rows_as_current_versions():
+    data = pd.DataFrame({"staff_id": [1, 2], "first_name": ["Ann", "Bo"]})
+    valid_from = datetime(2024, 11, 20, 9, 30)
+
+    result = add_scd2_columns(data, valid_from)
+
+    assert list(result.columns) == [
+        "staff_id",
+        "first_name",
+        "valid_from",
+        "valid_to",
+        "is_current",
+    ]
+    assert (result["valid_from"] == pd.Timestamp(valid_from)).all()
+    assert result["valid_to"].isna().all()
+    assert result["is_current"].all()
+    # Input is left untouched
+    assert list(data.columns) == ["staff_id", "first_name"]
@@ -0,0 +1,69 @@
+from src.transformation.transformationutil import (
+    affected_outputs,
+    dag_levels,
+    dag_sources,
+    reference_sources,
+)
+from src.transformation.transformation import TRANSFORMATION_DAG
+import pytest
+
+
+CHAINED_DAG = {
+    "a": {"inputs": ["source_1"], "function": None},
+    "b": {"inputs": ["a", "source_2"], "function": None},
+    "c": {"inputs": ["source_2"], "function": None},
+    "d": {"inputs": ["b", "c"], "function": None},
+}
+
+
+def test_affected_outputs_multi_source_output():
+    result = affected_outputs(TRANSFORMATION_DAG, {"address"})
+
+    assert result == {"dim_location", "dim_counterparty"}
+
+
+def test_affected_outputs_ignores_lookup_only_inputs():
+    result = affected_outputs(TRANSFORMATION_DAG, {"transaction"})
+
+    assert "fact_payment" not in result
+
+
+def test_affected_outputs_follows_output_dependencies():
+    result = affected_outputs(CHAINED_DAG, {"source_1"})
+
+    assert result == {"a", "b", "d"}
+
+
+def test_dag_levels_orders_dependencies_and_includes_upstream():
+    # 'c' is not affected but 'd' reads it
+    levels = dag_levels(CHAINED_DAG, {"d"})
+
+    assert levels == [["a", "c"], ["b"], ["d"]]
+
+
+def test_dag_levels_detects_cycles():
+    dag = {
+        "a": {"inputs": ["b"], "function": None},
+        "b": {"inputs": ["a"], "function": None},
+    }
+
+    with pytest.raises(ValueError):
+        dag_levels(dag, {"a"})
+
+
+def test_dag_sources_and_reference_sources():
+    assert dag_sources(CHAINED_DAG) == {"source_1", "source_2"}
+    assert reference_sources(TRANSFORMATION_DAG) == {
+        "staff",
+        "department",
+        "counterparty",
+        "address",
+        "transaction",
+        "payment_type",
+    }
+
+
+def test_affected_outputs_payment_builds_fact_and_dates():
+    result = affected_outputs(TRANSFORMATION_DAG, {"payment"})
+
+    assert result == {"fact_payment", "dim_date"}
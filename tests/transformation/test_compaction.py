@@ -0,0 +1,173 @@
+import json
+import pandas as pd
+import pytest
+from datetime import datetime
+from io import BytesIO
+from unittest.mock import patch
+from src.transformation.compaction import (
+    compact_table,
+    list_live_files,
+    plan_compaction,
+    lambda_handler,
+)
+
+
+PREFIX = "history/fact_sales_order/"
+NOW = datetime(2024, 11, 20, 12, 0, 0)
+
+
+@pytest.fixture
+def s3(mock_s3_client, processed_bucket):
+    with patch("src.transformation.compaction.s3_client", mock_s3_client):
+        yield mock_s3_client
+
+
+def put_parquet(s3, bucket, timestamp, data):
+    buffer = BytesIO()
+    data.to_parquet(buffer, index=False)
+    s3.put_object(
+        Bucket=bucket,
+        Key=f"{PREFIX}{timestamp}.parquet",
+        Body=buffer.getvalue(),
+    )
+
+
+def read_parquet(s3, bucket, key):
+    body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+    return pd.read_parquet(BytesIO(body))
+
+
+def order(order_id, created_date):
+    return pd.DataFrame(
+        {"sales_order_id": [order_id], "created_date": [created_date]}
+    )
+
+
+def test_plan_compaction_respects_watermark_cutoff_and_size():
+    objects = [
+        {"Key": f"{PREFIX}20241120100000.parquet", "Size": 60},
+        {"Key": f"{PREFIX}20241120101000.parquet", "Size": 60},
+        {"Key": f"{PREFIX}20241120102000.parquet", "Size": 60},
+        {"Key": f"{PREFIX}20241120115500.parquet", "Size": 60},
+        {"Key": f"{PREFIX}compacted-0000000001-0.parquet", "Size": 60},
+        {"Key": f"{PREFIX}20241120090000.parquet", "Size": 60},
+    ]
+    manifest = {"version": 1, "watermark": "20241120093000", "files": []}
+
+    batches = plan_compaction(objects, manifest, "20241120114500", 100)
+
+    assert [[obj["Key"] for obj in batch] for batch in batches] == [
+        [
+            f"{PREFIX}20241120100000.parquet",
+            f"{PREFIX}20241120101000.parquet",
+        ],
+        [f"{PREFIX}20241120102000.parquet"],
+    ]
+
+
+def test_compact_table_merges_files_and_writes_manifest(s3, processed_bucket):
+    put_parquet(s3, processed_bucket, "20241120100000", order(2, "2024-11-02"))
+    put_parquet(s3, processed_bucket, "20241120101000", order(1, "2024-11-01"))
+    # Too recent, left for the next run
+    put_parquet(s3, processed_bucket, "20241120115900", order(3, "2024-11-03"))
+
+    result = compact_table(
+        processed_bucket, PREFIX, "fact_sales_order", now=NOW
+    )
+
+    assert result["compacted"] == 2
+    assert result["rows"] == 2
+    compacted_key = f"{PREFIX}compacted-0000000001-0.parquet"
+    assert result["files"] == [compacted_key]
+    # Rows are sorted by the table's writer profile
+    compacted = read_parquet(s3, processed_bucket, compacted_key)
+    assert compacted["sales_order_id"].tolist() == [1, 2]
+
+    manifest = json.loads(
+        s3.get_object(
+            Bucket=processed_bucket, Key=f"{PREFIX}_manifests/0000000001.json"
+        )["Body"].read()
+    )
+    assert manifest["watermark"] == "20241120110000"
+    assert manifest["files"] == [compacted_key]
+
+    assert list_live_files(processed_bucket, PREFIX) == [
+        compacted_key,
+        f"{PREFIX}20241120115900.parquet",
+    ]
+
+
+def test_compact_table_rejects_min_age_within_write_duration(
+    s3, processed_bucket
+):
+    put_parquet(s3, processed_bucket, "20241120100000", order(1, "2024-11-01"))
+    put_parquet(s3, processed_bucket, "20241120101000", order(2, "2024-11-02"))
+
+    with pytest.raises(ValueError, match="maximum write duration"):
+        compact_table(
+            processed_bucket,
+            PREFIX,
+            "fact_sales_order",
+            now=NOW,
+            min_age_minutes=15,
+        )
+
+    assert list_live_files(processed_bucket, PREFIX) == [
+        f"{PREFIX}20241120100000.parquet",
+        f"{PREFIX}20241120101000.parquet",
+    ]
+
+
+def test_compact_table_nothing_to_compact(s3, processed_bucket):
+    put_parquet(s3, processed_bucket, "20241120100000", order(1, "2024-11-01"))
+
+    result = compact_table(
+        processed_bucket, PREFIX, "fact_sales_order", now=NOW
+    )
+
+    assert result["compacted"] == 0
+    assert list_live_files(processed_bucket, PREFIX) == [
+        f"{PREFIX}20241120100000.parquet"
+    ]
+
+
+def test_compact_table_loses_concurrent_swap(s3, processed_bucket, caplog):
+    put_parquet(s3, processed_bucket, "20241120100000", order(1, "2024-11-01"))
+    put_parquet(s3, processed_bucket, "20241120101000", order(2, "2024-11-02"))
+
+    # Another run commits version 1 after this run read the manifest
+    empty_manifest = {"version": 0, "watermark": None, "files": []}
+    with patch(
+        "src.transformation.compaction.load_manifest",
+        return_value=empty_manifest,
+    ):
+        s3.put_object(
+            Bucket=processed_bucket,
+            Key=f"{PREFIX}_manifests/0000000001.json",
+            Body=json.dumps({**empty_manifest, "version": 1}),
+        )
+        result = compact_table(
+            processed_bucket, PREFIX, "fact_sales_order", now=NOW
+        )
+
+    assert result["compacted"] == 0
+    assert "Concurrent compaction" in caplog.text
+    keys = [
+        obj["Key"]
+        for obj in s3.list_objects_v2(Bucket=processed_bucket)["Contents"]
+    ]
+    assert not any("compacted-" in key for key in keys)
+
+
+def test_lambda_handler_compacts_each_table(s3, processed_bucket):
+    put_parquet(s3, processed_bucket, "20241120100000", order(1, "2024-11-01"))
+    put_parquet(s3, processed_bucket, "20241120101000", order(2, "2024-11-02"))
+
+    with patch(
+        "src.transformation.compaction.S3_PROCESSED_BUCKET", processed_bucket
+    ), patch("src.transformation.compaction.datetime") as mock_datetime:
+        mock_datetime.utcnow.return_value = NOW
+        response = lambda_handler({"folders": ["history"]}, None)
+
+    assert response["statusCode"] == 200
+    assert [r["compacted"] for r in response["body"]["results"]] == [2]
@@ -0,0 +1,136 @@
+from src.transformation.transformationutil import (
+    filter_changed_rows,
+    save_hash_index,
+    load_hash_index,
+    latest_snapshot,
+    row_hashes,
+)
+from unittest.mock import patch
+import pandas as pd
+
+
+def dim_currency(codes):
+    return pd.DataFrame(
+        {
+            "currency_id": list(range(1, len(codes) + 1)),
+            "currency_code": codes,
+        }
+    )
+
+
+def test_row_hashes_ignore_key_and_are_stable():
+    first = row_hashes(dim_currency(["GBP", "USD"]), "currency_id")
+    second = row_hashes(dim_currency(["GBP", "USD"]), "currency_id")
+
+    assert (first == second).all()
+    assert first[0] != first[1]
+
+
+def test_filter_changed_rows_first_run_emits_all_rows(processed_bucket):
+    data = dim_currency(["GBP", "USD"])
+
+    changed, hash_index = filter_changed_rows(
+        "dim_currency", data, "currency_id", processed_bucket
+    )
+
+    pd.testing.assert_frame_equal(changed, data)
+    assert hash_index["currency_id"].tolist() == [1, 2]
+
+
+def test_filter_changed_rows_emits_only_delta(processed_bucket):
+    _, hash_index = filter_changed_rows(
+        "dim_currency",
+        dim_currency(["GBP", "USD"]),
+        "currency_id",
+        processed_bucket,
+    )
+    save_hash_index("dim_currency", hash_index, processed_bucket)
+
+    # USD -> EUR changed, JPY is new, GBP unchanged
+    changed, hash_index = filter_changed_rows(
+        "dim_currency",
+        dim_currency(["GBP", "EUR", "JPY"]),
+        "currency_id",
+        processed_bucket,
+    )
+
+    assert changed["currency_id"].tolist() == [2, 3]
+    assert sorted(hash_index["currency_id"]) == [1, 2, 3]
+
+
+def test_filter_changed_rows_unsaved_index_is_not_advanced(processed_bucket):
+    data = dim_currency(["GBP"])
+    filter_changed_rows("dim_currency", data, "currency_id", processed_bucket)
+
+    changed, _ = filter_changed_rows(
+        "dim_currency", data, "currency_id", processed_bucket
+    )
+
+    assert len(changed) == 1
+
+
+def test_filter_changed_rows_missing_key_returns_all_rows(
+    processed_bucket, caplog
+):
+    data = pd.DataFrame({"id": [1]})
+
+    changed, hash_index = filter_changed_rows(
+        "dim_currency", data, "currency_id", processed_bucket
+    )
+
+    assert changed is data
+    assert hash_index is None
+    assert "Error detecting changed rows for dim_currency" in caplog.text
+
+
+def test_save_hash_index_merges_batches(processed_bucket):
+    _, first = filter_changed_rows(
+        "dim_currency",
+        dim_currency(["GBP", "USD"]),
+        "currency_id",
+        processed_bucket,
+    )
+    save_hash_index("dim_currency", first, processed_bucket)
+
+    # A later batch only carries currency 3
+    batch = dim_currency(["GBP", "USD", "EUR"]).iloc[[2]]
+    _, second = filter_changed_rows(
+        "dim_currency", batch, "currency_id", processed_bucket
+    )
+    save_hash_index("dim_currency", second, processed_bucket)
+
+    index = load_hash_index("dim_currency", "currency_id", processed_bucket)
+    assert sorted(index["currency_id"]) == [1, 2, 3]
+
+
+def test_save_hash_index_retries_concurrent_save(processed_bucket, caplog):
+    _, ours = filter_changed_rows(
+        "dim_currency", dim_currency(["GBP"]), "currency_id", processed_bucket
+    )
+    _, theirs = filter_changed_rows(
+        "dim_currency",
+        dim_currency(["GBP", "USD"]),
+        "currency_id",
+        processed_bucket,
+    )
+    calls = []
+
+    def list_then_race(prefix, bucket):
+        result = latest_snapshot(prefix, bucket)
+        calls.append(result[0])
+        if len(calls) == 1:
+            # Another invocation saves its hashes after this one listed
+            save_hash_index("dim_currency", theirs.iloc[[1]], bucket)
+        return result
+
+    with patch(
+        "src.transformation.transformationutil.latest_snapshot",
+        side_effect=list_then_race,
+    ):
+        save_hash_index("dim_currency", ours, processed_bucket)
+
+    # Listed version 0, lost the race to version 1, retried over it
+    assert calls == [0, 0, 1]
+    assert "Concurrent update of hash index for dim_currency" in caplog.text
+    index = load_hash_index("dim_currency", "currency_id", processed_bucket)
+    assert sorted(index["currency_id"]) == [1, 2]
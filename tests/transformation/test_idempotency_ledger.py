@@ -0,0 +1,46 @@
+from src.transformation.transformationutil import (
+    is_already_transformed,
+    record_transformed,
+    ledger_key,
+)
+from unittest.mock import patch
+
+
+KEY = "ingestion/sales_order/2024/11/20/sales_order.json"
+
+
+def test_ledger_key_prefers_version_id():
+    assert ledger_key(KEY, '"abc"') == f"ledger/{KEY}/abc"
+    assert ledger_key(KEY, "abc", "v2") == f"ledger/{KEY}/v2"
+
+
+@patch("src.transformation.transformationutil.transformed_inputs", set())
+def test_record_then_check_transformed(processed_bucket, mock_s3_client):
+    assert not is_already_transformed(KEY, "abc", processed_bucket)
+
+    record_transformed(KEY, "abc", processed_bucket)
+
+    response = mock_s3_client.list_objects_v2(Bucket=processed_bucket)
+    assert [obj["Key"] for obj in response["Contents"]] == [
+        f"ledger/{KEY}/abc"
+    ]
+    assert is_already_transformed(KEY, "abc", processed_bucket)
+    # A new version of the same key is not skipped
+    assert not is_already_transformed(KEY, "def", processed_bucket)
+
+
+@patch("src.transformation.transformationutil.transformed_inputs", set())
+def test_is_already_transformed_checks_s3_ledger(
+    processed_bucket, mock_s3_client
+):
+    # e.g. a marker written by another container
+    mock_s3_client.put_object(
+        Bucket=processed_bucket, Key=f"ledger/{KEY}/abc", Body=b""
+    )
+
+    assert is_already_transformed(KEY, "abc", processed_bucket)
+
+
+@patch("src.transformation.transformationutil.transformed_inputs", set())
+def test_is_already_transformed_missing_bucket(mock_s3_client, caplog):
+    assert not is_already_transformed(KEY, "abc", "missing-bucket")
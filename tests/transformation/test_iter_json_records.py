@@ -0,0 +1,72 @@
+from src.transformation.transformationutil import iter_json_records
+from io import BytesIO
+import json
+import pytest
+
+
+def test_iter_json_records_yields_chunks():
+    data = [{"id": i, "value": f"test{i}"} for i in range(5)]
+    stream = BytesIO(json.dumps(data).encode("utf-8"))
+
+    chunks = list(iter_json_records(stream, chunk_rows=2, read_size=7))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert [record for chunk in chunks for record in chunk] == data
+
+
+def test_iter_json_records_handles_multibyte_split_across_reads():
+    data = [{"city": "Zürich"}, {"city": "Kraków"}]
+    stream = BytesIO(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    chunks = list(iter_json_records(stream, chunk_rows=10, read_size=1))
+
+    assert chunks == [data]
+
+
+def test_iter_json_records_empty_array():
+    stream = BytesIO(b"[ ]")
+
+    assert list(iter_json_records(stream, chunk_rows=10)) == []
+
+
+def test_iter_json_records_not_an_array():
+    stream = BytesIO(b'{"id": 1}')
+
+    with pytest.raises(ValueError):
+        list(iter_json_records(stream, chunk_rows=10))
+
+
+def test_iter_json_records_truncated_array():
+    stream = BytesIO(b'[{"id": 1}, {"id":')
+
+    with pytest.raises(ValueError):
+        list(iter_json_records(stream, chunk_rows=10))
+
+
+def test_iter_json_records_braces_inside_strings():
+    data = [{"id": 1, "note": "{}, {"}, {"id": 2, "nested": {"a": "}"}}]
+    stream = BytesIO(json.dumps(data).encode("utf-8"))
+
+    chunks = list(iter_json_records(stream, chunk_rows=10, read_size=20))
+
+    assert chunks == [data]
+
+
+def test_iter_json_records_prefix_already_read():
+    stream = BytesIO(b'"b"}]')
+
+    chunks = list(iter_json_records(stream, chunk_rows=10, prefix=b'[{"a":'))
+
+    assert chunks == [[{"a": "b"}]]
+
+
+def test_iter_json_records_shares_keys_within_a_read():
+    data = [{"sales_order_id": i} for i in range(100)]
+    stream = BytesIO(json.dumps(data).encode("utf-8"))
+
+    records = next(iter_json_records(stream, chunk_rows=100))
+
+    assert records == data
+    assert all(
+        next(iter(record)) is next(iter(records[0])) for record in records
+    )
@@ -2,6 +2,7 @@ from unittest.mock import patch
 from src.transformation.transformationutil import load_data_from_s3_ingestion
 import logging
 import json
+import tracemalloc
 
 
 VALID_KEY = "valid-key.json"
@@ -105,3 +106,98 @@ def test_load_data_from_s3_ingestion_no_such_key(mock_s3_client, caplog):
         f"The specified key {invalid_key} does not exist in bucket"
         in caplog.text
     )
+
+
+@patch("src.transformation.transformation.STREAM_CHUNK_ROWS", 2)
+@patch("src.transformation.transformationutil.STREAM_READ_SIZE", 16)
+@patch(
+    "src.transformation.transformation.S3_INGESTION_BUCKET", "test_bucket"
+)
+def test_load_data_from_s3_ingestion_streams_json_array(mock_s3_client):
+    # Input: JSON array larger than one read
+    mock_s3_client.create_bucket(
+        Bucket="test_bucket",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+    )
+    records = [{"id": i, "name": f"name {i}"} for i in range(5)]
+    mock_s3_client.put_object(
+        Bucket="test_bucket", Key=VALID_KEY, Body=json.dumps(records)
+    )
+
+    assert load_data_from_s3_ingestion(VALID_KEY) == records
+
+
+@patch("src.transformation.transformation.STREAM_CHUNK_ROWS", 2)
+@patch(
+    "src.transformation.transformation.S3_INGESTION_BUCKET", "test_bucket"
+)
+def test_load_data_from_s3_ingestion_columnar(mock_s3_client):
+    # Input: JSON array, column types promoted across chunks
+    mock_s3_client.create_bucket(
+        Bucket="test_bucket",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+    )
+    records = [
+        {"id": 1, "price": None},
+        {"id": 2, "price": None},
+        {"id": 3, "price": 2.5},
+    ]
+    mock_s3_client.put_object(
+        Bucket="test_bucket", Key=VALID_KEY, Body=json.dumps(records)
+    )
+
+    table = load_data_from_s3_ingestion(VALID_KEY, columnar=True)
+
+    assert table.column_names == ["id", "price"]
+    assert table.to_pylist() == records
+    assert str(table.schema.field("price").type) == "double"
+
+
+def traced_peak(function):
+    tracemalloc.start()
+    try:
+        result = function()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@patch("src.transformation.transformation.STREAM_CHUNK_ROWS", 5000)
+@patch("src.transformation.transformationutil.STREAM_READ_SIZE", 64 * 1024)
+@patch(
+    "src.transformation.transformation.S3_INGESTION_BUCKET", "test_bucket"
+)
+def test_load_data_from_s3_ingestion_json_array_memory(mock_s3_client):
+    # Input: JSON array spanning many reads, records with the same keys
+    mock_s3_client.create_bucket(
+        Bucket="test_bucket",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+    )
+    records = [
+        {"sales_order_id": i, "currency_code": "GBP", "units_sold": i % 100}
+        for i in range(20000)
+    ]
+    mock_s3_client.put_object(
+        Bucket="test_bucket", Key=VALID_KEY, Body=json.dumps(records)
+    )
+
+    def read_and_decode():
+        response = mock_s3_client.get_object(
+            Bucket="test_bucket", Key=VALID_KEY
+        )
+        return json.loads(response["Body"].read().decode("utf-8"))
+
+    data, peak = traced_peak(lambda: load_data_from_s3_ingestion(VALID_KEY))
+    expected, baseline_peak = traced_peak(read_and_decode)
+    table, columnar_peak = traced_peak(
+        lambda: load_data_from_s3_ingestion(VALID_KEY, columnar=True)
+    )
+
+    assert data == expected == records
+    # The raw bytes and decoded str are not held next to the records
+    assert peak < baseline_peak * 0.9
+    # Only one chunk of dicts is alive next to the Arrow buffers
+    assert table.to_pylist() == records
+    assert columnar_peak + table.nbytes < peak
+    # Key strings are shared between the records of a read
+    assert all(a is b for a, b in zip(data[0], data[1]))
@@ -0,0 +1,121 @@
+import pandas as pd
+from unittest.mock import patch
+from src.transformation.transformationutil import (
+    load_reference_data,
+    read_reference_snapshot,
+    update_reference_data,
+)
+
+
+ADDRESSES = [{"address_id": 1, "city": "Leeds"}]
+
+
+@patch("src.transformation.transformationutil.reference_snapshots", {})
+def test_load_reference_data_reuses_unchanged_snapshot(processed_bucket):
+    update_reference_data("address", ADDRESSES, processed_bucket)
+
+    with patch(
+        "src.transformation.transformationutil.pd.read_parquet",
+        wraps=pd.read_parquet,
+    ) as mock_read:
+        first = load_reference_data("address", processed_bucket)
+        again = load_reference_data("address", processed_bucket)
+
+    assert first == ADDRESSES
+    # Same object, so lookup indexes built over it are reused
+    assert again is first
+    mock_read.assert_not_called()
+
+
+@patch("src.transformation.transformationutil.reference_snapshots", {})
+def test_load_reference_data_reloads_changed_snapshot(
+    processed_bucket, mock_s3_client
+):
+    update_reference_data("address", ADDRESSES, processed_bucket)
+    first = load_reference_data("address", processed_bucket)
+
+    # e.g. updated by another container
+    buffer = pd.DataFrame([{"address_id": 1, "city": "York"}]).to_parquet()
+    mock_s3_client.put_object(
+        Bucket=processed_bucket,
+        Key="reference/address/0000000002.parquet",
+        Body=buffer,
+    )
+
+    assert load_reference_data("address", processed_bucket) == [
+        {"address_id": 1, "city": "York"}
+    ]
+    assert first == ADDRESSES
+
+
+@patch("src.transformation.transformationutil.reference_snapshots", {})
+def test_load_reference_data_missing(processed_bucket, caplog):
+    assert load_reference_data("address", processed_bucket) is None
+    assert "No reference data for table: address" in caplog.text
+
+
+@patch("src.transformation.transformationutil.reference_snapshots", {})
+def test_load_reference_data_reads_unversioned_snapshot(
+    processed_bucket, mock_s3_client
+):
+    mock_s3_client.put_object(
+        Bucket=processed_bucket,
+        Key="reference/address.parquet",
+        Body=pd.DataFrame(ADDRESSES).to_parquet(),
+    )
+
+    assert load_reference_data("address", processed_bucket) == ADDRESSES
+
+    update_reference_data(
+        "address", [{"address_id": 2, "city": "York"}], processed_bucket
+    )
+    response = mock_s3_client.list_objects_v2(
+        Bucket=processed_bucket, Prefix="reference/address/"
+    )
+    assert [obj["Key"] for obj in response["Contents"]] == [
+        "reference/address/0000000001.parquet"
+    ]
+
+
+@patch("src.transformation.transformationutil.reference_snapshots", {})
+def test_update_reference_data_retries_concurrent_update(
+    processed_bucket, mock_s3_client
+):
+    update_reference_data("address", ADDRESSES, processed_bucket)
+    calls = []
+
+    def read_then_race(table_name, bucket):
+        result = read_reference_snapshot(table_name, bucket)
+        if not calls:
+            # Another invocation saves its rows after this one read
+            mock_s3_client.put_object(
+                Bucket=bucket,
+                Key="reference/address/0000000002.parquet",
+                Body=pd.DataFrame(
+                    ADDRESSES + [{"address_id": 2, "city": "York"}]
+                ).to_parquet(),
+            )
+        calls.append(result[0])
+        return result
+
+    with patch(
+        "src.transformation.transformationutil.read_reference_snapshot",
+        side_effect=read_then_race,
+    ):
+        records = update_reference_data(
+            "address", [{"address_id": 3, "city": "Hull"}], processed_bucket
+        )
+
+    # Retried over the other invocation's version, keeping its rows
+    assert calls == [1, 2]
+    assert sorted(record["address_id"] for record in records) == [1, 2, 3]
+    assert load_reference_data("address", processed_bucket) == records
+
+    # Only the latest and previous versions are kept
+    response = mock_s3_client.list_objects_v2(
+        Bucket=processed_bucket, Prefix="reference/address/"
+    )
+    assert [obj["Key"] for obj in response["Contents"]] == [
+        "reference/address/0000000002.parquet",
+        "reference/address/0000000003.parquet",
+    ]
@@ -0,0 +1,67 @@
+import pandas as pd
+from unittest.mock import patch
+from src.transformation.transformationutil import (
+    lookup_index,
+    join_lookup,
+    transform_dim_staff,
+)
+
+
+DEPARTMENTS = [
+    {"department_id": 1, "department_name": "Sales", "location": "Leeds"},
+    {"department_id": 2, "department_name": "HR", "location": "York"},
+    {"department_id": 2, "department_name": "People", "location": "York"},
+]
+
+
+@patch("src.transformation.transformationutil.lookup_indexes", {})
+def test_lookup_index_keeps_last_duplicate_key():
+    index, arrays = lookup_index(
+        DEPARTMENTS, "department_id", ["department_name"]
+    )
+
+    assert list(index) == [1, 2]
+    assert list(arrays["department_name"]) == ["Sales", "People"]
+
+
+@patch("src.transformation.transformationutil.lookup_indexes", {})
+def test_lookup_index_is_reused_for_the_same_dataset():
+    first = lookup_index(DEPARTMENTS, "department_id", ["location"])
+    again = lookup_index(DEPARTMENTS, "department_id", ["location"])
+    copied = lookup_index(list(DEPARTMENTS), "department_id", ["location"])
+
+    assert again is first
+    assert copied is not first
+
+
+def test_join_lookup_inner_joins_in_key_order():
+    index, arrays = lookup_index(
+        pd.DataFrame(DEPARTMENTS[:2]), "department_id", ["department_name"]
+    )
+
+    matched, values = join_lookup(pd.Series([2, 3, 1, 2]), index, arrays)
+
+    assert list(matched) == [True, False, True, True]
+    assert list(values["department_name"]) == ["HR", "Sales", "HR"]
+
+
+@patch("src.transformation.transformationutil.lookup_indexes", {})
+def test_transform_dim_staff_builds_department_index_once():
+    staff = [
+        {
+            "staff_id": 1,
+            "first_name": "North",
+            "last_name": "Coder",
+            "department_id": 1,
+            "email_address": "north@terrifictotes.com",
+        }
+    ]
+
+    with patch(
+        "src.transformation.transformationutil.pd.Index",
+        wraps=pd.Index,
+    ) as mock_index:
+        transform_dim_staff(staff, DEPARTMENTS)
+        transform_dim_staff(staff, DEPARTMENTS)
+
+    assert mock_index.call_count == 1
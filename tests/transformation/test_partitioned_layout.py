@@ -0,0 +1,169 @@
+import pandas as pd
+from datetime import date, datetime
+from io import BytesIO
+from unittest.mock import patch
+from src.transformation.transformationutil import (
+    save_partitioned_data,
+    list_partitioned_files,
+    partition_values,
+)
+from src.transformation.transformation import save_output
+from src.transformation.compaction import compact_table
+
+
+def fact_rows():
+    return pd.DataFrame(
+        {
+            "sales_order_id": [1, 2, 3, 4],
+            "created_date": [
+                date(2024, 11, 20),
+                date(2024, 11, 21),
+                date(2024, 11, 20),
+                None,
+            ],
+        }
+    )
+
+
+def test_partition_values():
+    assert partition_values(fact_rows(), "created_date").tolist() == [
+        "2024-11-20",
+        "2024-11-21",
+        "2024-11-20",
+        "__HIVE_DEFAULT_PARTITION__",
+    ]
+
+
+def test_save_partitioned_data_splits_by_date(
+    processed_bucket, mock_s3_client
+):
+    keys = save_partitioned_data(
+        "fact_sales_order", fact_rows(), processed_bucket, "created_date"
+    )
+
+    assert [key.rsplit("/", 1)[0] for key in keys] == [
+        "processed/fact_sales_order/created_date=2024-11-20",
+        "processed/fact_sales_order/created_date=2024-11-21",
+        "processed/fact_sales_order/"
+        "created_date=__HIVE_DEFAULT_PARTITION__",
+    ]
+    body = mock_s3_client.get_object(Bucket=processed_bucket, Key=keys[0])[
+        "Body"
+    ]
+    saved = pd.read_parquet(BytesIO(body.read()))
+    assert saved["sales_order_id"].tolist() == [1, 3]
+
+    history = mock_s3_client.list_objects_v2(
+        Bucket=processed_bucket, Prefix="history/fact_sales_order/"
+    )
+    assert len(history["Contents"]) == 3
+
+
+def test_save_partitioned_data_empty_input(processed_bucket, caplog):
+    assert (
+        save_partitioned_data(
+            "fact_sales_order",
+            pd.DataFrame(),
+            processed_bucket,
+            "created_date",
+        )
+        is None
+    )
+    assert "Invalid or empty DataFrame" in caplog.text
+
+
+def test_list_partitioned_files_prunes_by_date_range(
+    processed_bucket, mock_s3_client
+):
+    prefix = "processed/fact_sales_order"
+    for key in [
+        f"{prefix}/created_date=2024-11-19/20241121000000.parquet",
+        f"{prefix}/created_date=2024-11-20/20241121000000.parquet",
+        f"{prefix}/created_date=2024-11-21/20241121000000.parquet",
+        f"{prefix}/created_date=__HIVE_DEFAULT_PARTITION__/"
+        "20241121000000.parquet",
+        # Written before partitioning, cannot be pruned
+        f"{prefix}/20241118000000.parquet",
+    ]:
+        mock_s3_client.put_object(Bucket=processed_bucket, Key=key, Body=b"")
+
+    keys = list_partitioned_files(
+        "fact_sales_order",
+        processed_bucket,
+        start_date=date(2024, 11, 20),
+        end_date=date(2024, 11, 20),
+    )
+
+    assert keys == [
+        f"{prefix}/20241118000000.parquet",
+        f"{prefix}/created_date=2024-11-20/20241121000000.parquet",
+    ]
+    assert (
+        len(list_partitioned_files("fact_sales_order", processed_bucket)) == 5
+    )
+
+
+def test_list_partitioned_files_skips_compacted_sources(
+    processed_bucket, mock_s3_client
+):
+    prefix = "processed/fact_sales_order"
+    partition = f"{prefix}/created_date=2024-11-20"
+    for index, key in enumerate(
+        [
+            f"{partition}/20241120100000.parquet",
+            f"{partition}/20241120101000.parquet",
+            # Written after the compaction's cutoff
+            f"{partition}/20241120115900.parquet",
+        ]
+    ):
+        mock_s3_client.put_object(
+            Bucket=processed_bucket,
+            Key=key,
+            Body=fact_rows().iloc[[index]].to_parquet(index=False),
+        )
+
+    compact_table(
+        processed_bucket,
+        f"{prefix}/",
+        "fact_sales_order",
+        now=datetime(2024, 11, 20, 12, 0, 0),
+    )
+
+    keys = list_partitioned_files(
+        "fact_sales_order",
+        processed_bucket,
+        start_date=date(2024, 11, 20),
+        end_date=date(2024, 11, 20),
+    )
+
+    # The merged sources are still in the bucket but no longer listed
+    assert keys == [
+        f"{partition}/20241120115900.parquet",
+        f"{partition}/compacted-0000000001-0.parquet",
+    ]
+    rows = pd.concat(
+        pd.read_parquet(
+            BytesIO(
+                mock_s3_client.get_object(Bucket=processed_bucket, Key=key)[
+                    "Body"
+                ].read()
+            )
+        )
+        for key in keys
+    )
+    assert sorted(rows["sales_order_id"]) == [1, 2, 3]
+
+
+@patch("src.transformation.transformation.PARTITIONED_LAYOUT_ENABLED", True)
+def test_save_output_uses_partitioned_layout_for_facts(processed_bucket):
+    with patch(
+        "src.transformation.transformation.S3_PROCESSED_BUCKET",
+        processed_bucket,
+    ):
+        assert save_output("fact_sales_order", fact_rows().iloc[:2])
+
+    keys = list_partitioned_files(
+        "fact_sales_order", processed_bucket, start_date=date(2024, 11, 21)
+    )
+    assert len(keys) == 1
+    assert "/created_date=2024-11-21/" in keys[0]
@@ -1,6 +1,11 @@
 from unittest.mock import Mock, patch
 from src.transformation.transformationutil import process_table
 import pandas as pd
+import json
+import logging
+import pstats
+import tempfile
+import tracemalloc
 
 
 @patch("src.transformation.transformation.logger")
@@ -69,3 +74,80 @@ def test_process_table_invalid_table_name(mock_logger):
     pd.testing.assert_frame_equal(result, expected_output)
     mock_transform_function.assert_called_once_with(data)
     mock_logger.info.assert_called_once_with("Processing table: None")
+
+
+def logged_metrics(caplog, stage):
+    return [
+        json.loads(record.message)
+        for record in caplog.records
+        if record.name == "metrics" and f'"stage": "{stage}"' in record.message
+    ]
+
+
+def test_process_table_emits_metrics(caplog):
+    caplog.set_level(logging.INFO)
+    data = [{"column1": 1}, {"column1": 2}, {"column1": 3}]
+
+    process_table(
+        "dim_test", lambda rows: pd.DataFrame(rows).iloc[:2], data
+    )
+
+    [metrics] = logged_metrics(caplog, "transform")
+    assert metrics["table"] == "dim_test"
+    assert metrics["input_rows"] == 3
+    assert metrics["output_rows"] == 2
+    assert metrics["wall_time_ms"] >= 0
+    assert metrics["cpu_time_ms"] >= 0
+    assert metrics["peak_memory_bytes"] >= 0
+    [definition] = metrics["_aws"]["CloudWatchMetrics"]
+    assert definition["Dimensions"] == [["table", "stage"]]
+    assert {"Name": "wall_time_ms", "Unit": "Milliseconds"} in definition[
+        "Metrics"
+    ]
+
+
+@patch("src.transformation.transformation.TRACE_MEMORY", True)
+def test_process_table_traces_memory_peak(caplog):
+    caplog.set_level(logging.INFO)
+
+    try:
+        process_table(
+            "dim_test", lambda rows: bytearray(5 * 1024 * 1024), []
+        )
+    finally:
+        tracemalloc.stop()
+
+    [metrics] = logged_metrics(caplog, "transform")
+    assert metrics["peak_memory_bytes"] >= 5 * 1024 * 1024
+
+
+@patch("src.transformation.transformation.METRICS_ENABLED", False)
+def test_process_table_metrics_disabled(caplog):
+    caplog.set_level(logging.INFO)
+
+    process_table("dim_test", lambda rows: pd.DataFrame(rows), [])
+
+    assert not logged_metrics(caplog, "transform")
+
+
+@patch("src.transformation.transformation.PROFILE_THRESHOLD_SECONDS", 1e-9)
+def test_process_table_saves_profile_of_slow_transform(
+    processed_bucket, mock_s3_client
+):
+    with patch(
+        "src.transformation.transformation.S3_PROCESSED_BUCKET",
+        processed_bucket,
+    ):
+        process_table(
+            "dim_test", lambda rows: pd.DataFrame(rows), [{"a": 1}]
+        )
+
+    response = mock_s3_client.list_objects_v2(
+        Bucket=processed_bucket, Prefix="profiles/dim_test/"
+    )
+    assert len(response["Contents"]) == 1
+    with tempfile.NamedTemporaryFile() as dump:
+        mock_s3_client.download_file(
+            processed_bucket, response["Contents"][0]["Key"], dump.name
+        )
+        assert pstats.Stats(dump.name).total_calls > 0
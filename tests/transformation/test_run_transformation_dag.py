@@ -0,0 +1,218 @@
+from src.transformation.transformationutil import (
+    run_transformation_dag,
+    update_reference_data,
+    load_reference_data,
+    transform_dim_design,
+    transform_dim_currency,
+    transform_fact_sales_order,
+    run_node_in_process,
+    write_arrow_file,
+    read_arrow_file,
+)
+from unittest.mock import Mock, patch
+import pandas as pd
+
+
+def test_run_transformation_dag_builds_each_output_once(
+    processed_bucket, valid_sales_order_data
+):
+    fact = Mock(return_value=pd.DataFrame({"id": [1]}))
+    dates = Mock(return_value=pd.DataFrame({"date_id": [20230101]}))
+    design = Mock()
+    dag = {
+        "fact_sales_order": {"inputs": ["sales_order"], "function": fact},
+        "dim_date": {"inputs": ["sales_order"], "function": dates},
+        "dim_design": {"inputs": ["design"], "function": design},
+    }
+
+    result = run_transformation_dag(
+        {"sales_order": valid_sales_order_data}, processed_bucket, dag=dag
+    )
+
+    assert set(result) == {"fact_sales_order", "dim_date"}
+    fact.assert_called_once_with(valid_sales_order_data)
+    dates.assert_called_once_with(valid_sales_order_data)
+    design.assert_not_called()
+
+
+def test_run_transformation_dag_reads_lookups_from_reference(processed_bucket):
+    address = [{"address_id": 1, "city": "Leeds"}]
+    counterparty = [{"counterparty_id": 7, "legal_address_id": 1}]
+    update_reference_data("address", address, processed_bucket)
+    transform = Mock(return_value=pd.DataFrame({"counterparty_id": [7]}))
+    dag = {
+        "dim_counterparty": {
+            "inputs": ["counterparty", "address"],
+            "function": transform,
+        }
+    }
+
+    result = run_transformation_dag(
+        {"counterparty": counterparty}, processed_bucket, dag=dag
+    )
+
+    transform.assert_called_once_with(counterparty, address)
+    assert result["dim_counterparty"]["counterparty_id"].tolist() == [7]
+    # The changed table is added to its own reference snapshot
+    assert (
+        load_reference_data("counterparty", processed_bucket) == counterparty
+    )
+
+
+def test_run_transformation_dag_skips_outputs_missing_inputs(
+    processed_bucket, caplog
+):
+    transform = Mock()
+    dag = {
+        "dim_staff": {
+            "inputs": ["staff", "department"],
+            "function": transform,
+        }
+    }
+
+    result = run_transformation_dag(
+        {"staff": [{"staff_id": 1, "department_id": 2}]},
+        processed_bucket,
+        dag=dag,
+    )
+
+    assert result == {"dim_staff": None}
+    transform.assert_not_called()
+    assert "Missing input data, skipping output: dim_staff" in caplog.text
+
+
+def test_run_transformation_dag_passes_missing_optional_inputs_as_empty(
+    processed_bucket,
+):
+    payment = [{"payment_id": 1, "transaction_id": 2}]
+    transform = Mock(return_value=pd.DataFrame({"payment_id": [1]}))
+    dag = {
+        "fact_payment": {
+            "inputs": ["payment", "transaction"],
+            "triggers": ["payment"],
+            "optional": ["transaction"],
+            "function": transform,
+        }
+    }
+
+    result = run_transformation_dag(
+        {"payment": payment}, processed_bucket, dag=dag
+    )
+
+    transform.assert_called_once_with(payment, [])
+    assert result["fact_payment"]["payment_id"].tolist() == [1]
+
+
+def test_update_reference_data_keeps_latest_row_per_key(processed_bucket):
+    update_reference_data(
+        "department",
+        [
+            {"department_id": 1, "department_name": "Sales"},
+            {"department_id": 2, "department_name": "Finance"},
+        ],
+        processed_bucket,
+    )
+
+    result = update_reference_data(
+        "department",
+        [{"department_id": 1, "department_name": "Purchasing"}],
+        processed_bucket,
+    )
+
+    assert sorted(result, key=lambda row: row["department_id"]) == [
+        {"department_id": 1, "department_name": "Purchasing"},
+        {"department_id": 2, "department_name": "Finance"},
+    ]
+
+
+def test_run_transformation_dag_process_executor(processed_bucket):
+    design = [
+        {
+            "design_id": 1,
+            "design_name": "Wooden",
+            "file_location": "/usr",
+            "file_name": "wooden.json",
+            "created_at": "2022-11-03 14:20:49.962000",
+            "last_updated": "2022-11-03 14:20:49.962000",
+        }
+    ]
+    currency = [
+        {
+            "currency_id": 1,
+            "currency_code": "GBP",
+            "created_at": "2022-11-03 14:20:49.962000",
+            "last_updated": "2022-11-03 14:20:49.962000",
+        }
+    ]
+    dag = {
+        "dim_design": {
+            "inputs": ["design"],
+            "function": transform_dim_design,
+        },
+        "dim_currency": {
+            "inputs": ["currency"],
+            "function": transform_dim_currency,
+        },
+    }
+    sources = {"design": design, "currency": currency}
+
+    result = run_transformation_dag(
+        sources, processed_bucket, dag=dag, max_workers=2, executor="process"
+    )
+
+    expected = run_transformation_dag(sources, processed_bucket, dag=dag)
+    for output in ["dim_design", "dim_currency"]:
+        pd.testing.assert_frame_equal(
+            result[output].reset_index(drop=True),
+            expected[output].reset_index(drop=True),
+        )
+
+
+def test_run_node_in_process_hands_dataframes_to_transform(
+    tmp_path, valid_sales_order_data
+):
+    input_path = str(tmp_path / "sales_order.arrow")
+    output_path = str(tmp_path / "fact_sales_order.arrow")
+    write_arrow_file(valid_sales_order_data, input_path)
+    received = []
+
+    def transform(sales_order):
+        received.append(sales_order)
+        return transform_fact_sales_order(sales_order)
+
+    assert run_node_in_process(
+        "fact_sales_order", transform, [input_path], output_path
+    )
+
+    assert isinstance(received[0], pd.DataFrame)
+    pd.testing.assert_frame_equal(
+        read_arrow_file(output_path).to_pandas(),
+        transform_fact_sales_order(valid_sales_order_data),
+        check_dtype=False,
+    )
+
+
+def test_run_transformation_dag_process_executor_falls_back(
+    processed_bucket, valid_sales_order_data, caplog
+):
+    transform = Mock(return_value=pd.DataFrame({"id": [1]}))
+    dag = {
+        "fact_sales_order": {
+            "inputs": ["sales_order"],
+            "function": transform,
+        }
+    }
+
+    with patch(
+        "src.transformation.transformationutil.ProcessPoolExecutor",
+        side_effect=OSError("Function not implemented"),
+    ):
+        result = run_transformation_dag(
+            {"sales_order": valid_sales_order_data},
+            processed_bucket,
+            dag=dag,
+            executor="process",
+        )
+
+    assert result["fact_sales_order"]["id"].tolist() == [1]
+    assert "Process pool unavailable, using threads" in caplog.text
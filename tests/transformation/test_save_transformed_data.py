@@ -1,9 +1,11 @@
 import pandas as pd
 from src.transformation.transformationutil import save_transformed_data
+from src.transformation.compaction import file_timestamp
+from src.loading.loading_utils import FILE_TIMESTAMP
+from datetime import datetime
+from unittest.mock import patch
 import logging
 
-# from unittest.mock import patch
-
 
 S3_BUCKET = "test-processed-bucket"
 PROCESSED_FOLDER = "processed"
@@ -30,7 +32,7 @@ def test_save_transformed_data_valid_input(mock_s3_client):
         CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
     )
 
-    save_transformed_data(table_name, data, S3_BUCKET)
+    processed_key = save_transformed_data(table_name, data, S3_BUCKET)
 
     # Validate processed file exists
     processed_key_prefix = f"{PROCESSED_FOLDER}/{table_name}/"
@@ -39,6 +41,7 @@ def test_save_transformed_data_valid_input(mock_s3_client):
     )
     assert "Contents" in response
     assert len(response["Contents"]) == 1
+    assert response["Contents"][0]["Key"] == processed_key
 
     # Validate history file exists
     history_key_prefix = f"{HISTORY_FOLDER}/{table_name}/"
@@ -62,8 +65,9 @@ def test_save_transformed_data_empty_dataframe(mock_s3_client, caplog):
         CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
     )
 
-    save_transformed_data(table_name, data, S3_BUCKET)
+    result = save_transformed_data(table_name, data, S3_BUCKET)
 
+    assert result is None
     assert (
         f"Validation error in saving data for table: {table_name}"
         in caplog.text
@@ -123,3 +127,31 @@ def test_save_transformed_data_no_history(mock_s3_client):
         Bucket=S3_BUCKET, Prefix=history_key_prefix
     )
     assert "Contents" not in response
+
+
+def test_save_transformed_data_same_second_writers(mock_s3_client):
+    """
+    Test files saved in the same second do not overwrite each other.
+    """
+    mock_s3_client.create_bucket(
+        Bucket=S3_BUCKET,
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+    )
+    with patch("src.transformation.transformationutil.datetime") as mock_dt:
+        mock_dt.utcnow.return_value = datetime(2024, 11, 20, 9, 30, 0)
+        first = save_transformed_data(
+            "dim_staff", pd.DataFrame({"id": [1]}), S3_BUCKET
+        )
+        second = save_transformed_data(
+            "dim_staff", pd.DataFrame({"id": [2]}), S3_BUCKET
+        )
+
+    assert first != second
+    response = mock_s3_client.list_objects_v2(
+        Bucket=S3_BUCKET, Prefix=f"{PROCESSED_FOLDER}/dim_staff/"
+    )
+    assert len(response["Contents"]) == 2
+
+    # Compaction and the loader still read the write time
+    assert file_timestamp(first) == "20241120093000"
+    assert FILE_TIMESTAMP.search(first).group(1) == "20241120093000"
@@ -0,0 +1,149 @@
+from src.transformation.transformationutil import (
+    stream_transform_table,
+    transform_fact_sales_order,
+)
+from src.transformation.transformation import STREAM_OUTPUT_SCHEMAS
+from unittest.mock import patch
+from io import BytesIO
+import pyarrow.parquet as pq
+import json
+import logging
+
+
+INGESTION_BUCKET = "test_ingestion_bucket"
+KEY = "ingestion/sales_order/2024/11/20/sales_order.json"
+
+
+def put_ingestion_file(mock_s3_client, data):
+    mock_s3_client.create_bucket(
+        Bucket=INGESTION_BUCKET,
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+    )
+    mock_s3_client.put_object(
+        Bucket=INGESTION_BUCKET, Key=KEY, Body=json.dumps(data)
+    )
+
+
+@patch(
+    "src.transformation.transformation.S3_INGESTION_BUCKET", INGESTION_BUCKET
+)
+def test_stream_transform_table_writes_row_groups(
+    processed_bucket, mock_s3_client, valid_sales_order_data
+):
+    data = [
+        dict(valid_sales_order_data[0], sales_order_id=i) for i in range(5)
+    ]
+    put_ingestion_file(mock_s3_client, data)
+    chunks = []
+
+    processed_key = stream_transform_table(
+        "fact_sales_order",
+        KEY,
+        transform_fact_sales_order,
+        processed_bucket,
+        chunk_rows=2,
+        on_chunk=chunks.append,
+    )
+
+    body = mock_s3_client.get_object(
+        Bucket=processed_bucket, Key=processed_key
+    )["Body"].read()
+    parquet_file = pq.ParquetFile(BytesIO(body))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert parquet_file.metadata.num_row_groups == 3
+    assert parquet_file.read().num_rows == 5
+    assert parquet_file.read().column("sales_order_id").to_pylist() == [
+        0,
+        1,
+        2,
+        3,
+        4,
+    ]
+
+    # Facts are also kept in the history folder
+    response = mock_s3_client.list_objects_v2(
+        Bucket=processed_bucket, Prefix="history/fact_sales_order/"
+    )
+    assert len(response["Contents"]) == 1
+
+
+@patch(
+    "src.transformation.transformation.S3_INGESTION_BUCKET", INGESTION_BUCKET
+)
+def test_stream_transform_table_uses_declared_schema(
+    processed_bucket, mock_s3_client, valid_sales_order_data
+):
+    # The first chunk has no delivery locations, so its inferred
+    # type would be null rather than int64
+    data = [
+        dict(
+            valid_sales_order_data[0],
+            sales_order_id=i,
+            agreed_delivery_location_id=None if i < 2 else 400 + i,
+        )
+        for i in range(4)
+    ]
+    put_ingestion_file(mock_s3_client, data)
+
+    processed_key = stream_transform_table(
+        "fact_sales_order",
+        KEY,
+        transform_fact_sales_order,
+        processed_bucket,
+        chunk_rows=2,
+    )
+
+    body = mock_s3_client.get_object(
+        Bucket=processed_bucket, Key=processed_key
+    )["Body"].read()
+    table = pq.read_table(BytesIO(body))
+
+    assert table.schema.equals(STREAM_OUTPUT_SCHEMAS["fact_sales_order"])
+    assert table.column("agreed_delivery_location_id").to_pylist() == [
+        None,
+        None,
+        402,
+        403,
+    ]
+
+
+@patch(
+    "src.transformation.transformation.S3_INGESTION_BUCKET", INGESTION_BUCKET
+)
+def test_stream_transform_table_no_rows(
+    processed_bucket, mock_s3_client, caplog
+):
+    caplog.set_level(logging.WARNING)
+    put_ingestion_file(mock_s3_client, [])
+
+    result = stream_transform_table(
+        "fact_sales_order",
+        KEY,
+        transform_fact_sales_order,
+        processed_bucket,
+        chunk_rows=2,
+    )
+
+    assert result is None
+    assert "No rows to write for table: fact_sales_order" in caplog.text
+
+
+@patch(
+    "src.transformation.transformation.S3_INGESTION_BUCKET", INGESTION_BUCKET
+)
+def test_stream_transform_table_missing_key(
+    processed_bucket, mock_s3_client, caplog
+):
+    put_ingestion_file(mock_s3_client, [])
+
+    result = stream_transform_table(
+        "fact_sales_order",
+        "missing.json",
+        transform_fact_sales_order,
+        processed_bucket,
+        chunk_rows=2,
+    )
+
+    assert result is None
+    assert "Client error occurred streaming fact_sales_order" in caplog.text
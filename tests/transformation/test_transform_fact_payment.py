@@ -0,0 +1,98 @@
+from src.transformation.transformationutil import transform_fact_payment
+import datetime
+import logging
+import pytest
+
+
+@pytest.fixture
+def payment_data():
+    return [
+        {
+            "payment_id": 2,
+            "created_at": "2022-11-03 14:20:52.187000",
+            "last_updated": "2022-11-03 14:20:52.187000",
+            "transaction_id": 2,
+            "counterparty_id": 15,
+            "payment_amount": "552548.62",
+            "currency_id": 2,
+            "payment_type_id": 3,
+            "paid": False,
+            "payment_date": "2022-11-04",
+            "company_ac_number": 67305075,
+            "counterparty_ac_number": 31622269,
+        }
+    ]
+
+
+@pytest.fixture
+def transaction_data():
+    return [
+        {
+            "transaction_id": 2,
+            "transaction_type": "PURCHASE",
+            "sales_order_id": None,
+            "purchase_order_id": 2,
+        }
+    ]
+
+
+@pytest.fixture
+def payment_type_data():
+    return [{"payment_type_id": 3, "payment_type_name": "PURCHASE_PAYMENT"}]
+
+
+def test_transform_fact_payment_valid_data(
+    payment_data, transaction_data, payment_type_data, caplog
+):
+    caplog.set_level(logging.WARNING)
+    result = transform_fact_payment(
+        payment_data, transaction_data, payment_type_data
+    )
+
+    assert list(result.columns) == [
+        "payment_id",
+        "created_date",
+        "created_time",
+        "last_updated_date",
+        "last_updated_time",
+        "transaction_id",
+        "counterparty_id",
+        "payment_amount",
+        "currency_id",
+        "payment_type_id",
+        "paid",
+        "payment_date",
+    ]
+    row = result.iloc[0]
+    assert row["created_date"] == datetime.date(2022, 11, 3)
+    assert row["created_time"] == datetime.time(14, 20, 52, 187000)
+    assert row["payment_amount"] == pytest.approx(552548.62)
+    assert row["payment_date"] == datetime.date(2022, 11, 4)
+    assert not row["paid"]
+    assert "unknown" not in caplog.text
+
+
+def test_transform_fact_payment_unknown_lookups(
+    payment_data, transaction_data, caplog
+):
+    result = transform_fact_payment(
+        payment_data, transaction_data, [{"payment_type_id": 1}]
+    )
+
+    assert len(result) == 1
+    assert "0 row(s) with an unknown transaction" in caplog.text
+    assert "1 row(s) with an unknown payment type" in caplog.text
+
+
+def test_transform_fact_payment_lookups_not_ingested_yet(
+    payment_data, caplog
+):
+    result = transform_fact_payment(payment_data, [], [])
+
+    assert result["payment_id"].tolist() == [2]
+    assert "unknown" not in caplog.text
+
+
+def test_transform_fact_payment_empty_data(caplog):
+    assert transform_fact_payment([], [], []) is None
+    assert "Validation error: payments_data must be populated" in caplog.text
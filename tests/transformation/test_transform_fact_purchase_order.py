@@ -0,0 +1,86 @@
+from src.transformation.transformationutil import (
+    transform_fact_purchase_order,
+    write_parquet,
+)
+from io import BytesIO
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pandas as pd
+import datetime
+import pytest
+
+
+@pytest.fixture
+def purchase_order_data():
+    return [
+        {
+            "purchase_order_id": 1,
+            "created_at": "2022-11-03 14:20:52.187000",
+            "last_updated": "2022-11-04 09:00:00",
+            "staff_id": 12,
+            "counterparty_id": 11,
+            "item_code": "ZDOI5EA",
+            "item_quantity": 371,
+            "item_unit_price": "361.39",
+            "currency_id": 2,
+            "agreed_delivery_date": "2022-11-09",
+            "agreed_payment_date": "2022-11-07",
+            "agreed_delivery_location_id": 6,
+        }
+    ]
+
+
+def test_transform_fact_purchase_order_valid_data(purchase_order_data):
+    result = transform_fact_purchase_order(purchase_order_data)
+
+    assert list(result.columns) == [
+        "purchase_order_id",
+        "created_date",
+        "created_time",
+        "last_updated_date",
+        "last_updated_time",
+        "staff_id",
+        "counterparty_id",
+        "item_code",
+        "item_quantity",
+        "item_unit_price",
+        "currency_id",
+        "agreed_delivery_date",
+        "agreed_payment_date",
+        "agreed_delivery_location_id",
+    ]
+    row = result.iloc[0]
+    assert row["created_date"] == datetime.date(2022, 11, 3)
+    assert row["created_time"] == datetime.time(14, 20, 52, 187000)
+    assert row["last_updated_time"] == datetime.time(9, 0)
+    assert row["agreed_delivery_date"] == datetime.date(2022, 11, 9)
+    assert row["item_unit_price"] == pytest.approx(361.39)
+
+
+def test_transform_fact_purchase_order_columns_are_not_objects(
+    purchase_order_data,
+):
+    result = transform_fact_purchase_order(purchase_order_data)
+
+    assert result["created_date"].dtype == pd.ArrowDtype(pa.date32())
+    assert result["created_time"].dtype == pd.ArrowDtype(pa.time64("us"))
+
+    buffer = BytesIO()
+    write_parquet("fact_purchase_order", result, buffer)
+    buffer.seek(0)
+    schema = pq.read_schema(buffer)
+    assert schema.field("created_date").type == pa.date32()
+    assert schema.field("created_time").type == pa.time64("us")
+
+
+def test_transform_fact_purchase_order_missing_columns(caplog):
+    result = transform_fact_purchase_order([{"purchase_order_id": 1}])
+
+    assert result is None
+    assert "purchase_order_data is missing columns" in caplog.text
+
+
+def test_transform_fact_purchase_order_invalid_input(caplog):
+    assert transform_fact_purchase_order("invalid") is None
+    assert transform_fact_purchase_order([]) is None
+    assert "Validation error:" in caplog.text
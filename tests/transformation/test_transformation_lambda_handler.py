@@ -1,5 +1,6 @@
 from src.transformation.transformation import lambda_handler
 import pandas as pd
+import json
 
 # from unittest.mock import
 
@@ -112,3 +113,267 @@ def test_lambda_handler_critical_error(mock_s3_event, mocker, caplog):
     response = lambda_handler(event, None)  # noqa: F841
     assert f"Error parsing record {VALID_KEY_SALES_ORDER}" in caplog.text
     # assert response["statusCode"] == 500 # ?
+
+
+def test_lambda_handler_streaming_sales_order(mock_s3_event, mocker):
+    """Test Lambda streams large row-wise tables when enabled."""
+    event = mock_s3_event(VALID_KEY_SALES_ORDER)
+
+    mocker.patch("src.transformation.transformation.STREAMING_ENABLED", True)
+    mock_load = mocker.patch(
+        "src.transformation.transformationutil.load_data_from_s3_ingestion"
+    )
+    mock_stream = mocker.patch(
+        "src.transformation.transformationutil.stream_transform_table"
+    )
+
+    response = lambda_handler(event, None)
+
+    assert response["statusCode"] == 200
+    mock_load.assert_not_called()
+    assert mock_stream.call_args.args[:2] == (
+        "fact_sales_order",
+        VALID_KEY_SALES_ORDER,
+    )
+
+
+def test_lambda_handler_builds_each_output_once(
+    mock_s3_event, mocker, valid_sales_order_data
+):
+    """Test sales_order is transformed once per star-schema output."""
+    event = mock_s3_event(VALID_KEY_SALES_ORDER)
+
+    mocker.patch(
+        "src.transformation.transformationutil.load_data_from_s3_ingestion",
+        return_value=valid_sales_order_data,
+    )
+    mock_process = mocker.patch(
+        "src.transformation.transformationutil.process_table",
+        return_value=pd.DataFrame({"id": [1]}),
+    )
+    mock_save = mocker.patch(
+        "src.transformation.transformationutil.save_transformed_data"
+    )
+
+    response = lambda_handler(event, None)
+
+    assert response["statusCode"] == 200
+    assert sorted(call.args[0] for call in mock_process.call_args_list) == [
+        "dim_date",
+        "fact_sales_order",
+    ]
+    assert sorted(call.args[0] for call in mock_save.call_args_list) == [
+        "dim_date",
+        "fact_sales_order",
+    ]
+
+
+def test_lambda_handler_skips_duplicate_events(
+    processed_bucket, mock_s3_event, mocker, valid_sales_order_data
+):
+    """Test a redelivered S3 event is not transformed twice."""
+    mocker.patch(
+        "src.transformation.transformation.S3_PROCESSED_BUCKET",
+        processed_bucket,
+    )
+    mocker.patch(
+        "src.transformation.transformationutil.transformed_inputs", set()
+    )
+    event = mock_s3_event(VALID_KEY_SALES_ORDER)
+    event["Records"][0]["s3"]["object"]["eTag"] = "abc123"
+
+    mock_load = mocker.patch(
+        "src.transformation.transformationutil.load_data_from_s3_ingestion",
+        return_value=valid_sales_order_data,
+    )
+    mocker.patch(
+        "src.transformation.transformationutil.save_transformed_data",
+        return_value="processed/fact_sales_order/20241120000000.parquet",
+    )
+
+    lambda_handler(event, None)
+    lambda_handler(event, None)
+
+    mock_load.assert_called_once()
+
+
+def test_lambda_handler_retries_inputs_of_unbuilt_outputs(
+    mock_s3_client,
+    processed_bucket,
+    mock_s3_event,
+    mocker,
+    valid_sales_order_data,
+):
+    """Test an input is not recorded while an output it feeds failed."""
+    mocker.patch(
+        "src.transformation.transformation.S3_PROCESSED_BUCKET",
+        processed_bucket,
+    )
+    mocker.patch(
+        "src.transformation.transformationutil.transformed_inputs", set()
+    )
+    event = mock_s3_event(VALID_KEY_SALES_ORDER)
+    event["Records"][0]["s3"]["object"]["eTag"] = "abc123"
+
+    mock_load = mocker.patch(
+        "src.transformation.transformationutil.load_data_from_s3_ingestion",
+        return_value=valid_sales_order_data,
+    )
+    # fact_sales_order's transform fails and comes back as None
+    mocker.patch(
+        "src.transformation.transformationutil.process_table",
+        side_effect=lambda output, function, *data: (
+            None if output == "fact_sales_order" else pd.DataFrame()
+        ),
+    )
+    mocker.patch("src.transformation.transformationutil.save_transformed_data")
+
+    lambda_handler(event, None)
+    lambda_handler(event, None)
+
+    assert mock_load.call_count == 2
+    response = mock_s3_client.list_objects_v2(
+        Bucket=processed_bucket, Prefix="ledger/"
+    )
+    assert response["KeyCount"] == 0
+
+
+def test_lambda_handler_skips_unchanged_dimension_rows(
+    processed_bucket, mock_s3_event, mocker
+):
+    """Test re-ingested, unchanged dimension rows are not written again."""
+    mocker.patch(
+        "src.transformation.transformation.S3_PROCESSED_BUCKET",
+        processed_bucket,
+    )
+    event = mock_s3_event("ingestion/currency/sample_data.json")
+    mocker.patch(
+        "src.transformation.transformationutil.load_data_from_s3_ingestion",
+        return_value=[
+            {
+                "currency_id": 1,
+                "currency_code": "GBP",
+                "created_at": "2022-11-03 14:20:49.962000",
+                "last_updated": "2022-11-03 14:20:49.962000",
+            }
+        ],
+    )
+    mock_save = mocker.patch(
+        "src.transformation.transformationutil.save_transformed_data",
+        return_value="processed/dim_currency/20241120000000.parquet",
+    )
+
+    lambda_handler(event, None)
+    lambda_handler(event, None)
+
+    mock_save.assert_called_once()
+
+
+def test_lambda_handler_scd2_dimension_versions(mock_s3_event, mocker):
+    """Test SCD2 dimensions are saved with type 2 history columns."""
+    mocker.patch(
+        "src.transformation.transformation.SCD2_DIMENSIONS", {"dim_location"}
+    )
+    mocker.patch(
+        "src.transformation.transformation.CHANGE_DETECTION_ENABLED", False
+    )
+    mocker.patch(
+        "src.transformation.transformation.util.update_reference_data"
+    )
+    event = mock_s3_event("ingestion/address/sample_data.json")
+    mocker.patch(
+        "src.transformation.transformationutil.load_data_from_s3_ingestion",
+        return_value=[{"address_id": 1}],
+    )
+    mocker.patch(
+        "src.transformation.transformationutil.process_table",
+        return_value=pd.DataFrame({"location_id": [1], "city": ["Leeds"]}),
+    )
+    mock_save = mocker.patch(
+        "src.transformation.transformationutil.save_transformed_data"
+    )
+
+    lambda_handler(event, None)
+
+    saved = {call.args[0]: call.args[1] for call in mock_save.call_args_list}
+    assert {"valid_from", "valid_to", "is_current"} <= set(
+        saved["dim_location"].columns
+    )
+
+
+def test_lambda_handler_writes_batch_manifest(
+    mock_s3_client,
+    processed_bucket,
+    mock_s3_event,
+    mocker,
+    valid_sales_order_data,
+):
+    """Test the files written by one invocation are listed for loading."""
+    mocker.patch(
+        "src.transformation.transformation.S3_PROCESSED_BUCKET",
+        processed_bucket,
+    )
+    mocker.patch(
+        "src.transformation.transformationutil.load_data_from_s3_ingestion",
+        return_value=valid_sales_order_data,
+    )
+
+    lambda_handler(mock_s3_event(VALID_KEY_SALES_ORDER), None)
+
+    response = mock_s3_client.list_objects_v2(
+        Bucket=processed_bucket, Prefix="manifests/"
+    )
+    assert len(response["Contents"]) == 1
+    manifest = json.loads(
+        mock_s3_client.get_object(
+            Bucket=processed_bucket,
+            Key=response["Contents"][0]["Key"],
+        )["Body"].read()
+    )
+    assert sorted(entry["table"] for entry in manifest["entries"]) == [
+        "dim_date",
+        "fact_sales_order",
+    ]
+    assert manifest["files"] == [
+        entry["uri"] for entry in manifest["entries"]
+    ]
+    assert all(
+        uri.startswith(f"s3://{processed_bucket}/processed/")
+        for uri in manifest["files"]
+    )
+
+
+def test_lambda_handler_payment_before_lookups(
+    mock_s3_client, processed_bucket, mock_s3_event, mocker
+):
+    """Test payments are transformed before their lookups are ingested."""
+    mocker.patch(
+        "src.transformation.transformation.S3_PROCESSED_BUCKET",
+        processed_bucket,
+    )
+    mocker.patch(
+        "src.transformation.transformationutil.load_data_from_s3_ingestion",
+        return_value=[
+            {
+                "payment_id": 1,
+                "created_at": "2022-11-03 14:20:52.187000",
+                "last_updated": "2022-11-03 14:20:52.187000",
+                "transaction_id": 2,
+                "counterparty_id": 15,
+                "payment_amount": "552548.62",
+                "currency_id": 2,
+                "payment_type_id": 3,
+                "paid": False,
+                "payment_date": "2022-11-04",
+                "company_ac_number": 67305075,
+                "counterparty_ac_number": 31622269,
+            }
+        ],
+    )
+
+    lambda_handler(mock_s3_event("ingestion/payment/1.json"), None)
+
+    response = mock_s3_client.list_objects_v2(
+        Bucket=processed_bucket, Prefix="processed/fact_payment/"
+    )
+    assert response["KeyCount"] == 1
@@ -0,0 +1,91 @@
+import json
+import pandas as pd
+from unittest.mock import patch
+from src.transformation.transformationutil import (
+    write_batch_manifest,
+    save_transformed_data,
+    schema_hash,
+    write_parquet,
+)
+from io import BytesIO
+
+
+def test_save_transformed_data_appends_manifest_entry(
+    processed_bucket, mock_s3_client
+):
+    data = pd.DataFrame({"id": [1, 2], "value": [100, 200]})
+    manifest = []
+
+    processed_key = save_transformed_data(
+        "fact_sales_order", data, processed_bucket, manifest=manifest
+    )
+
+    size = mock_s3_client.head_object(
+        Bucket=processed_bucket, Key=processed_key
+    )["ContentLength"]
+    assert manifest == [
+        {
+            "uri": f"s3://{processed_bucket}/{processed_key}",
+            "table": "fact_sales_order",
+            "rows": 2,
+            "schema_hash": schema_hash(
+                write_parquet("fact_sales_order", data, BytesIO())
+            ),
+            "bytes": size,
+        }
+    ]
+
+
+def test_schema_hash_changes_with_columns():
+    first = write_parquet("dim_design", pd.DataFrame({"a": [1]}), BytesIO())
+    same = write_parquet("dim_design", pd.DataFrame({"a": [2]}), BytesIO())
+    other = write_parquet("dim_design", pd.DataFrame({"a": ["x"]}), BytesIO())
+
+    assert schema_hash(first) == schema_hash(same)
+    assert schema_hash(first) != schema_hash(other)
+
+
+def test_write_batch_manifest(processed_bucket, mock_s3_client):
+    entries = [
+        {
+            "uri": f"s3://{processed_bucket}/processed/dim_design/1.parquet",
+            "table": "dim_design",
+            "rows": 1,
+            "schema_hash": "abc",
+            "bytes": 10,
+        }
+    ]
+
+    key = write_batch_manifest(entries, processed_bucket)
+
+    assert key.startswith("manifests/")
+    body = json.loads(
+        mock_s3_client.get_object(Bucket=processed_bucket, Key=key)[
+            "Body"
+        ].read()
+    )
+    assert body["files"] == [entries[0]["uri"]]
+    assert body["entries"] == entries
+
+
+def test_write_batch_manifest_never_overwrites(
+    processed_bucket, mock_s3_client, caplog
+):
+    mock_s3_client.put_object(
+        Bucket=processed_bucket, Key="manifests/batch-1.json", Body=b"{}"
+    )
+
+    with patch("src.transformation.transformationutil.datetime") as mock_dt:
+        mock_dt.utcnow.return_value.strftime.return_value = "batch"
+        mock_dt.utcnow.return_value.isoformat.return_value = "now"
+        with patch(
+            "src.transformation.transformationutil.uuid.uuid4"
+        ) as mock_uuid:
+            mock_uuid.return_value.hex = "1"
+            assert write_batch_manifest([], processed_bucket) is None
+
+    assert "Error saving manifest manifests/batch-1.json" in caplog.text
+    body = mock_s3_client.get_object(
+        Bucket=processed_bucket, Key="manifests/batch-1.json"
+    )["Body"].read()
+    assert body == b"{}"
@@ -0,0 +1,103 @@
+from src.transformation.transformationutil import (
+    write_parquet,
+    get_parquet_profile,
+)
+from unittest.mock import patch
+from io import BytesIO
+import pyarrow.parquet as pq
+import pandas as pd
+
+
+PROFILES = {
+    "dim_currency": {
+        "compression": "zstd",
+        "compression_level": 5,
+        "row_group_size": 2,
+        "use_dictionary": ["currency_code", "missing_column"],
+        "sort_by": ["currency_id"],
+        "write_statistics": ["currency_id"],
+    }
+}
+
+
+def read_back(buffer):
+    buffer.seek(0)
+    return pq.ParquetFile(buffer)
+
+
+@patch("src.transformation.transformation.PARQUET_WRITER_PROFILES", PROFILES)
+def test_write_parquet_applies_table_profile():
+    data = pd.DataFrame(
+        {
+            "currency_id": [3, 1, 2],
+            "currency_code": ["USD", "GBP", "EUR"],
+            "currency_name": ["US Dollar", "British Pound", "Euro"],
+        }
+    )
+    buffer = BytesIO()
+
+    write_parquet("dim_currency", data, buffer)
+
+    parquet_file = read_back(buffer)
+    metadata = parquet_file.metadata
+    first_group = metadata.row_group(0)
+
+    assert metadata.num_row_groups == 2
+    assert first_group.column(0).compression == "ZSTD"
+    # Sorted by currency_id before writing
+    assert parquet_file.read().column("currency_id").to_pylist() == [1, 2, 3]
+    # Dictionary encoding only for the configured column
+    assert "RLE_DICTIONARY" in first_group.column(1).encodings
+    assert "RLE_DICTIONARY" not in first_group.column(2).encodings
+    # Statistics only for the configured column
+    assert first_group.column(0).is_stats_set
+    assert not first_group.column(2).is_stats_set
+
+
+@patch("src.transformation.transformation.PARQUET_WRITER_PROFILES", PROFILES)
+def test_write_parquet_uses_default_profile_for_unknown_table():
+    data = pd.DataFrame({"id": [2, 1], "value": ["b", "a"]})
+    buffer = BytesIO()
+
+    write_parquet("unknown_table", data, buffer)
+
+    parquet_file = read_back(buffer)
+    assert parquet_file.metadata.row_group(0).column(0).compression == (
+        "SNAPPY"
+    )
+    # No sort keys, original order is kept
+    assert parquet_file.read().column("id").to_pylist() == [2, 1]
+
+
+@patch("src.transformation.transformation.PARQUET_WRITER_PROFILES", PROFILES)
+def test_get_parquet_profile_merges_over_default():
+    profile = get_parquet_profile("dim_currency")
+
+    assert profile["compression"] == "zstd"
+    assert profile["row_group_size"] == 2
+
+    default_profile = get_parquet_profile("dim_staff")
+    assert default_profile["sort_by"] is None
+
+
+@patch(
+    "src.transformation.transformation.PARQUET_WRITER_PROFILES",
+    {"dim_currency": {"no_dictionary": ["currency_id"]}},
+)
+def test_write_parquet_no_dictionary_keeps_other_columns_encoded():
+    data = pd.DataFrame(
+        {
+            "currency_id": [1, 2, 3],
+            "currency_code": ["GBP", "GBP", "EUR"],
+            "currency_name": ["British Pound", "British Pound", "Euro"],
+        }
+    )
+    buffer = BytesIO()
+
+    write_parquet("dim_currency", data, buffer)
+
+    first_group = read_back(buffer).metadata.row_group(0)
+    assert "RLE_DICTIONARY" not in first_group.column(0).encodings
+    # Columns not listed as exceptions keep dictionary encoding
+    assert "RLE_DICTIONARY" in first_group.column(1).encodings
+    assert "RLE_DICTIONARY" in first_group.column(2).encodings